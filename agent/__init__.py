@@ -1,5 +1,19 @@
 """Agent modules for product generation."""
-from agent.category_brand import select_category_brand
-from agent.product import generate_product_text
+from agent.category_brand import aselect_category_brand, select_category_brand
+from agent.product import (
+    agenerate_product_text,
+    agenerate_product_texts,
+    astream_product_text,
+    generate_product_text,
+    generate_product_texts,
+)
 
-__all__ = ["generate_product_text", "select_category_brand"]
\ No newline at end of file
+__all__ = [
+    "generate_product_text",
+    "agenerate_product_text",
+    "generate_product_texts",
+    "agenerate_product_texts",
+    "astream_product_text",
+    "select_category_brand",
+    "aselect_category_brand",
+]
\ No newline at end of file
@@ -1,5 +1,25 @@
 """Category and Brand selection agent."""
-from agent.category_brand.agent import select_category_brand
+from agent.category_brand.agent import aselect_category_brand, select_category_brand
+from agent.category_brand.brand_index import BrandIndex, BrandMatch, get_brand_index
+from agent.category_brand.embeddings import CategoryEmbeddings, get_category_embeddings
+from agent.category_brand.index import CategoryIndex, get_category_index
+from agent.category_brand.memo import CategoryDecisionMemo, category_memo, title_tokens
+from agent.category_brand.shortlist import LexicalShortlist, get_lexical_shortlist
 
-__all__ = ["select_category_brand"]
+__all__ = [
+    "select_category_brand",
+    "aselect_category_brand",
+    "CategoryIndex",
+    "get_category_index",
+    "BrandIndex",
+    "BrandMatch",
+    "get_brand_index",
+    "LexicalShortlist",
+    "get_lexical_shortlist",
+    "CategoryEmbeddings",
+    "get_category_embeddings",
+    "CategoryDecisionMemo",
+    "category_memo",
+    "title_tokens",
+]
 
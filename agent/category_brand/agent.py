@@ -1,15 +1,45 @@
 """Category and Brand selection agent using OpenAI."""
 
-import difflib
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from functools import partial
+from itertools import zip_longest
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
+import numpy as np
 from pydantic import ValidationError
 
-from agent.category_brand.schemas import CategoryBrandSelectionSchema
+from agent.category_brand.brand_index import BrandMatch, get_brand_index
+from agent.category_brand.embeddings import (
+    CategoryEmbeddings,
+    aembed_texts,
+    catalog_fingerprint,
+    embed_texts,
+    get_category_embeddings,
+)
+from agent.category_brand.index import (
+    CATEGORY_LEVELS,
+    CategoryIndex,
+    CategoryPath,
+    get_category_index,
+)
+from agent.category_brand.memo import category_memo, title_tokens
+from agent.category_brand.schemas import (
+    CategoryBrandSelectionSchema,
+    CategoryPathChoiceSchema,
+)
+from agent.category_brand.shortlist import ScoredPath, get_lexical_shortlist
 from core.config import settings
-from core.openai_client import get_openai_client
+from core.executor import run_blocking
+from core.llm_steps import (
+    ChatRequest,
+    Steps,
+    acomplete,
+    arun_steps,
+    complete,
+    run_steps,
+)
+from core.openai_client import get_async_openai_client, get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -17,48 +47,13 @@ logger = logging.getLogger(__name__)
 client = get_openai_client()
 
 
-def _build_categories_tree(
-    categories: List[Dict[str, Any]],
-    parent_id: Optional[str] = None,
-    level: str = "category",
-) -> List[Dict[str, Any]]:
-    """Build a simplified structure for categories at a specific level."""
-    result = []
-
-    if level == "category":
-        for cat in categories:
-            result.append({"id": str(cat["id"]), "name": cat["name"]})
-    elif level == "sub_category" and parent_id:
-        for cat in categories:
-            if str(cat["id"]) == parent_id:
-                for sub_cat in cat.get("childes", []):
-                    result.append({"id": str(sub_cat["id"]), "name": sub_cat["name"]})
-                break
-    elif level == "sub_sub_category" and parent_id:
-        # parent_id here is the sub_category_id, so we need to find it across all main categories
-        for cat in categories:
-            for sub_cat in cat.get("childes", []):
-                if str(sub_cat["id"]) == parent_id:
-                    for sub_sub_cat in sub_cat.get("childes", []):
-                        result.append(
-                            {"id": str(sub_sub_cat["id"]), "name": sub_sub_cat["name"]}
-                        )
-                    return result
-    return result
-
-
-def _select_step(
+def _build_step_messages(
     prompt_level: str,
     product_name: str,
     brand_name: str,
     options: List[Dict[str, Any]],
-    model: str,
-    temperature: float,
-) -> Optional[Dict[str, Any]]:
-    """Helper to perform a single AI selection step."""
-    if not options:
-        return None
-
+) -> List[Dict[str, str]]:
+    """Build chat messages for a single selection step."""
     system_prompt = f"""
 You are a category selection assistant.
 Select the most appropriate {prompt_level.replace('_', ' ')} ID based on the product name and brand.
@@ -80,15 +75,37 @@ Available {prompt_level.replace('_', ' ')}s:
 Select the ID. Return ONLY JSON.
 """.strip()
 
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _select_step(
+    prompt_level: str,
+    product_name: str,
+    brand_name: str,
+    options: List[Dict[str, Any]],
+    model: str,
+    temperature: float,
+) -> Steps[Optional[Dict[str, Any]]]:
+    """Steps of a single AI selection step (see ``core.llm_steps``)."""
+    if not options:
+        return None
+
+    resp = yield ChatRequest(
+        "llm.category",
+        {
+            "model": model,
+            "temperature": temperature,
+            "messages": _build_step_messages(
+                prompt_level, product_name, brand_name, options
+            ),
+        },
+    )
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            temperature=temperature,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-        )
+        if isinstance(resp, Exception):
+            raise resp
         content = (resp.choices[0].message.content or "").strip()
         return json.loads(content)
     except Exception as e:
@@ -96,65 +113,311 @@ Select the ID. Return ONLY JSON.
         return None
 
 
-def _match_brand(brand_name: str, brands: List[Dict[str, Any]]) -> int:
-    """
-    Match brand name from API list using fuzzy matching.
+# (embedding index, query vector) for one product, when embeddings are enabled
+_Semantic = Optional[Tuple[CategoryEmbeddings, np.ndarray]]
 
-    Args:
-        brand_name: Input brand name to search for
-        brands: List of brands from API
 
-    Returns:
-        int: Best matching brand ID. Returns 0 (Unknown) if no good match.
-    """
-    if not brands:
-        return 0
+def _load_semantic(
+    product_name: str,
+    brand_name: str,
+    categories: List[Dict[str, Any]],
+    catalog_version: Optional[str],
+) -> _Semantic:
+    """Embedding index and product query vector; None if disabled or unavailable."""
+    if not settings.category_embeddings_enabled:
+        return None
+    try:
+        embeddings = get_category_embeddings(categories, catalog_version)
+        query = embed_texts([f"{product_name} {brand_name}"])[0]
+    except Exception as e:
+        logger.warning(f"Category embeddings unavailable, using full option lists: {e}")
+        return None
+    return embeddings, query
 
-    # Try exact match first (case-insensitive)
-    search_name = brand_name.strip().lower()
-    for brand in brands:
-        if brand["name"].strip().lower() == search_name:
-            return brand["id"]
 
-    # Use difflib for fuzzy matching
-    brand_names = [b["name"] for b in brands]
-    matches = difflib.get_close_matches(brand_name, brand_names, n=1, cutoff=0.6)
+async def _aload_semantic(
+    product_name: str,
+    brand_name: str,
+    categories: List[Dict[str, Any]],
+    catalog_version: Optional[str],
+) -> _Semantic:
+    """Async counterpart of :func:`_load_semantic`."""
+    if not settings.category_embeddings_enabled:
+        return None
+    try:
+        embeddings = await run_blocking(
+            get_category_embeddings, categories, catalog_version
+        )
+        query = (await aembed_texts([f"{product_name} {brand_name}"]))[0]
+    except Exception as e:
+        logger.warning(f"Category embeddings unavailable, using full option lists: {e}")
+        return None
+    return embeddings, query
+
 
-    if matches:
-        matched_name = matches[0]
-        for brand in brands:
-            if brand["name"] == matched_name:
-                return brand["id"]
+def _narrow_options(
+    options: List[Dict[str, Any]], semantic: _Semantic
+) -> List[Dict[str, Any]]:
+    """Keep the top-K options most similar to the product (all if few or no embeddings)."""
+    limit = settings.category_step_top_k
+    if semantic is None or len(options) <= limit:
+        return options
 
-    # Default to first brand if it exists, or 0
-    # Usually the first brand in 6Valley is "Unknown" or similar if not specified
-    # But here we just return 0 if no match found
-    return brands[0]["id"] if brands else 0
+    embeddings, query = semantic
+    ranked = embeddings.top_k(query, limit, [option["id"] for option in options])
+    if not ranked:
+        return options
+    by_id = {option["id"]: option for option in options}
+    return [by_id[node_id] for node_id, _ in ranked]
 
 
-def select_category_brand(
+def _shortlist_paths(
     product_name: str,
     brand_name: str,
     categories: List[Dict[str, Any]],
+    catalog_version: Optional[str],
+    semantic: _Semantic = None,
+) -> List[ScoredPath]:
+    """
+    Candidate leaf paths for the single-call mode.
+
+    Lexical and embedding candidates are interleaved (best of each first),
+    so products whose names share no words with the category still get
+    semantically close paths.
+    """
+    size = settings.category_shortlist_size
+    shortlist = get_lexical_shortlist(categories, catalog_version)
+    lexical = shortlist.search(f"{product_name} {brand_name}", size)
+    if semantic is None:
+        return lexical
+
+    embeddings, query = semantic
+    paths = {path.leaf_id: path for path in shortlist.paths}
+    semantic_hits = [
+        ScoredPath(path=paths[node_id], score=round(score, 3))
+        for node_id, score in embeddings.top_k(query, size, list(paths))
+    ]
+
+    merged: List[ScoredPath] = []
+    seen = set()
+    for pair in zip_longest(semantic_hits, lexical):
+        for candidate in pair:
+            if candidate is not None and candidate.path.leaf_id not in seen:
+                seen.add(candidate.path.leaf_id)
+                merged.append(candidate)
+    return merged[:size]
+
+
+def _build_path_messages(
+    product_name: str, brand_name: str, candidates: List[ScoredPath]
+) -> List[Dict[str, str]]:
+    """Build chat messages for picking a full path from the shortlist."""
+    system_prompt = """
+You are a category selection assistant.
+Select the category path that best fits the product from the candidate paths.
+Set "confidence" (0-1) to how sure you are that the product belongs there;
+use a low value if none of the candidates really fits.
+
+Return ONLY valid JSON:
+{
+  "leaf_id": "string",
+  "confidence": 0.0
+}
+""".strip()
+
+    lines = "\n".join(f"{c.path.leaf_id}: {c.path.label}" for c in candidates)
+    user_prompt = f"""
+Product: {product_name}
+Brand: {brand_name}
+
+Candidate paths (leaf_id: path):
+{lines}
+
+Select the leaf_id. Return ONLY JSON.
+""".strip()
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _path_response_format(candidates: List[ScoredPath]) -> Dict[str, Any]:
+    """Structured output schema restricting ``leaf_id`` to the shortlist."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "category_path_choice",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "leaf_id": {
+                        "type": "string",
+                        "enum": [c.path.leaf_id for c in candidates],
+                    },
+                    "confidence": {"type": "number"},
+                },
+                "required": ["leaf_id", "confidence"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def _parse_path_choice(
+    content: str, candidates: List[ScoredPath]
+) -> Optional[Tuple[CategoryPath, float]]:
+    """Validate a single-call answer; None if it is unusable or not confident enough."""
+    try:
+        choice = CategoryPathChoiceSchema(**json.loads(content))
+    except (ValueError, TypeError, ValidationError) as e:
+        logger.warning(f"Invalid category path answer: {e}")
+        return None
+
+    path = next((c.path for c in candidates if c.path.leaf_id == choice.leaf_id), None)
+    if path is None:
+        logger.warning(f"Category path answer outside the shortlist: {choice.leaf_id}")
+        return None
+    if choice.confidence < settings.category_single_call_min_confidence:
+        logger.info(
+            f"Low confidence for '{path.label}' ({choice.confidence}), "
+            "falling back to step-by-step selection"
+        )
+        return None
+    return path, choice.confidence
+
+
+def _select_path(
+    product_name: str,
+    brand_name: str,
+    candidates: List[ScoredPath],
+    model: str,
+    temperature: float,
+) -> Steps[Optional[Tuple[CategoryPath, float]]]:
+    """Steps of picking the full category path with one structured-output call."""
+    if not candidates:
+        return None
+
+    resp = yield ChatRequest(
+        "llm.category",
+        {
+            "model": model,
+            "temperature": temperature,
+            "messages": _build_path_messages(product_name, brand_name, candidates),
+            "response_format": _path_response_format(candidates),
+        },
+    )
+    if isinstance(resp, Exception):
+        logger.warning(f"AI category path selection failed: {resp}")
+        return None
+    return _parse_path_choice(
+        (resp.choices[0].message.content or "").strip(), candidates
+    )
+
+
+def _apply_path(result: Dict[str, Any], path: CategoryPath) -> None:
+    for level, node_id, name in zip(CATEGORY_LEVELS, path.ids, path.names):
+        result[f"{level}_id"] = node_id
+        result[level] = name
+
+
+# (title tokens, catalog version) identifying a title in the decision memo
+_MemoKey = Optional[Tuple[FrozenSet[str], str]]
+
+
+def _memo_key(
+    product_name: str,
+    brand_name: str,
+    brand: BrandMatch,
+    index: CategoryIndex,
+    catalog_version: Optional[str],
+) -> _MemoKey:
+    # Unmatched brands all share the fallback ID, so their titles are not
+    # comparable (and would pile up in one memo bucket)
+    if not settings.category_memo_enabled or brand.method == "fallback":
+        return None
+    tokens = title_tokens(product_name, brand_name)
+    if not tokens:
+        return None
+    return tokens, catalog_version or catalog_fingerprint(index)
+
+
+def _recall_decision(
+    memo_key: _MemoKey, brand_id: int, index: CategoryIndex
+) -> Optional[CategoryPath]:
+    """Memoized path for a near-identical title, if it is still in the catalog."""
+    if memo_key is None:
+        return None
+    tokens, version = memo_key
+    try:
+        hit = category_memo.lookup(tokens, brand_id, version)
+    except Exception as e:
+        logger.warning(f"Category memo lookup failed: {e}")
+        return None
+    if hit is None:
+        return None
+
+    path = index.path(hit.path_ids[-1])
+    if path is None or path.ids != hit.path_ids:
+        return None
+    logger.info(
+        f"Category reused from memo (similarity={hit.similarity:.2f}): {path.label}"
+    )
+    return path
+
+
+def _remember_decision(
+    memo_key: _MemoKey, brand_id: int, index: CategoryIndex, result: Dict[str, Any]
+) -> None:
+    """Memoize a selection that ended in a valid leaf category."""
+    if memo_key is None:
+        return
+    selected = tuple(
+        str(result[f"{level}_id"])
+        for level in CATEGORY_LEVELS
+        if result.get(f"{level}_id") not in (None, "0")
+    )
+    path = index.path(selected[-1]) if selected else None
+    if path is None or path.ids != selected or index.children.get(path.leaf_id):
+        return
+
+    tokens, version = memo_key
+    try:
+        category_memo.record(tokens, brand_id, version, path.ids)
+    except Exception as e:
+        logger.warning(f"Category memo write failed: {e}")
+
+
+def _match_brand(
+    brand_name: str,
     brands: List[Dict[str, Any]],
-    model: Optional[str] = None,
-    temperature: Optional[float] = None,
-) -> CategoryBrandSelectionSchema:
+    catalog_version: Optional[str] = None,
+) -> BrandMatch:
     """
-    Select category and brand IDs using AI based on product name and brand.
-    Uses 3-step process (Category -> Sub-category -> Sub-sub-category) to reduce tokens.
+    Match brand name from API list using the brand index.
+
+    Args:
+        brand_name: Input brand name to search for
+        brands: List of brands from API
+        catalog_version: Catalog version, so the index is built once per catalog
+
+    Returns:
+        BrandMatch: Best matching brand. Falls back to the first brand (or ID 0).
     """
-    model = model or settings.openai_model
-    temperature = (
-        temperature if temperature is not None else settings.openai_temperature
+    if not brands:
+        return BrandMatch(brand_id=0, name=None, confidence=0.0, method="fallback")
+
+    match = get_brand_index(brands, catalog_version).match(brand_name)
+    logger.debug(
+        f"Brand match for '{brand_name}': {match.name} "
+        f"({match.method}, confidence={match.confidence})"
     )
+    return match
 
-    # 1. Match brand using Python logic (Fast, no AI)
-    brand_id = _match_brand(brand_name, brands)
-    logger.info(f"Matched brand '{brand_name}' to ID {brand_id}")
 
-    # 2. Step-by-step category selection
-    result = {
+def _empty_result(brand_id: int) -> Dict[str, Any]:
+    return {
         "category_id": "0",
         "category": None,
         "sub_category_id": None,
@@ -164,50 +427,10 @@ def select_category_brand(
         "brand_id": brand_id,
     }
 
-    # Step A: Main Category
-    main_options = _build_categories_tree(categories, level="category")
-    main_sel = _select_step(
-        "category", product_name, brand_name, main_options, model, temperature
-    )
-
-    if main_sel and "id" in main_sel:
-        result["category_id"] = main_sel["id"]
-        result["category"] = main_sel.get("name")
-
-        # Step B: Sub Category
-        sub_options = _build_categories_tree(
-            categories, parent_id=main_sel["id"], level="sub_category"
-        )
-        if sub_options:
-            sub_sel = _select_step(
-                "sub_category",
-                product_name,
-                brand_name,
-                sub_options,
-                model,
-                temperature,
-            )
-            if sub_sel and "id" in sub_sel:
-                result["sub_category_id"] = sub_sel["id"]
-                result["sub_category"] = sub_sel.get("name")
-
-                # Step C: Sub-sub Category
-                sub_sub_options = _build_categories_tree(
-                    categories, parent_id=sub_sel["id"], level="sub_sub_category"
-                )
-                if sub_sub_options:
-                    ss_sel = _select_step(
-                        "sub_sub_category",
-                        product_name,
-                        brand_name,
-                        sub_sub_options,
-                        model,
-                        temperature,
-                    )
-                    if ss_sel and "id" in ss_sel:
-                        result["sub_sub_category_id"] = ss_sel["id"]
-                        result["sub_sub_category"] = ss_sel.get("name")
 
+def _finalize_selection(
+    result: Dict[str, Any], product_name: str
+) -> CategoryBrandSelectionSchema:
     try:
         selection = CategoryBrandSelectionSchema(**result)
         logger.info(
@@ -221,5 +444,179 @@ def select_category_brand(
         return CategoryBrandSelectionSchema(
             category_id=result["category_id"] or "0",
             category=result.get("category"),
-            brand_id=brand_id,
+            brand_id=result["brand_id"],
+        )
+
+
+def _selection_settings(
+    model: Optional[str], temperature: Optional[float], mode: Optional[str]
+) -> Tuple[str, float, str]:
+    return (
+        model or settings.openai_model,
+        temperature if temperature is not None else settings.openai_temperature,
+        mode or settings.category_selection_mode,
+    )
+
+
+def _begin_selection(
+    product_name: str,
+    brand_name: str,
+    categories: List[Dict[str, Any]],
+    brands: List[Dict[str, Any]],
+    catalog_version: Optional[str],
+) -> Tuple[Dict[str, Any], CategoryIndex, _MemoKey]:
+    """Match the brand (no AI); returns the empty result, category index and memo key."""
+    brand = _match_brand(brand_name, brands, catalog_version)
+    logger.info(f"Matched brand '{brand_name}' to ID {brand.brand_id}")
+    index = get_category_index(categories, catalog_version)
+    memo_key = _memo_key(product_name, brand_name, brand, index, catalog_version)
+    return _empty_result(brand.brand_id), index, memo_key
+
+
+def _selection_steps(
+    product_name: str,
+    brand_name: str,
+    categories: List[Dict[str, Any]],
+    index: CategoryIndex,
+    semantic: _Semantic,
+    result: Dict[str, Any],
+    model: str,
+    temperature: float,
+    catalog_version: Optional[str],
+    mode: str,
+) -> Steps[Dict[str, Any]]:
+    """AI part of the selection (see ``core.llm_steps``); fills in ``result``."""
+    # Single call over the shortlisted leaf paths
+    chosen = None
+    if mode == "single":
+        candidates = _shortlist_paths(
+            product_name, brand_name, categories, catalog_version, semantic
+        )
+        chosen = yield from _select_path(
+            product_name, brand_name, candidates, model, temperature
+        )
+
+    if chosen is not None:
+        _apply_path(result, chosen[0])
+        return result
+
+    # Step-by-step category selection, each level narrowed by its parent
+    # and, with embeddings, to the options most similar to the product
+    parent_id: Optional[str] = None
+    for level in CATEGORY_LEVELS:
+        options = _narrow_options(index.options(level, parent_id), semantic)
+        selected = yield from _select_step(
+            level, product_name, brand_name, options, model, temperature
         )
+        if not selected or "id" not in selected:
+            break
+        result[f"{level}_id"] = selected["id"]
+        result[level] = selected.get("name")
+        parent_id = selected["id"]
+    return result
+
+
+def select_category_brand(
+    product_name: str,
+    brand_name: str,
+    categories: List[Dict[str, Any]],
+    brands: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    catalog_version: Optional[str] = None,
+    mode: Optional[str] = None,
+) -> CategoryBrandSelectionSchema:
+    """
+    Select category and brand IDs using AI based on product name and brand.
+
+    Titles that differ from an already classified one only by color/size
+    reuse its memoized path without any AI call.
+    In "single" mode the full path is picked in one call from a local
+    shortlist of leaf paths.
+    The 3-step process (Category -> Sub-category -> Sub-sub-category) is
+    used in "steps" mode and as the fallback when the single call fails or
+    is not confident enough.
+
+    ``catalog_version`` (from the catalog cache) lets the category index be
+    built once and reused for every product of that catalog.
+    """
+    model, temperature, mode = _selection_settings(model, temperature, mode)
+
+    # 1. Match brand using Python logic (Fast, no AI)
+    result, index, memo_key = _begin_selection(
+        product_name, brand_name, categories, brands, catalog_version
+    )
+    brand_id = result["brand_id"]
+
+    # 2. Variants of an already classified title reuse its path (no AI)
+    remembered = _recall_decision(memo_key, brand_id, index)
+    if remembered is not None:
+        _apply_path(result, remembered)
+        return _finalize_selection(result, product_name)
+
+    # 3. Single call and/or step-by-step selection
+    semantic = _load_semantic(product_name, brand_name, categories, catalog_version)
+    run_steps(
+        _selection_steps(
+            product_name,
+            brand_name,
+            categories,
+            index,
+            semantic,
+            result,
+            model,
+            temperature,
+            catalog_version,
+            mode,
+        ),
+        partial(complete, client),
+    )
+
+    _remember_decision(memo_key, brand_id, index, result)
+    return _finalize_selection(result, product_name)
+
+
+async def aselect_category_brand(
+    product_name: str,
+    brand_name: str,
+    categories: List[Dict[str, Any]],
+    brands: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    catalog_version: Optional[str] = None,
+    mode: Optional[str] = None,
+) -> CategoryBrandSelectionSchema:
+    """Async counterpart of :func:`select_category_brand`."""
+    model, temperature, mode = _selection_settings(model, temperature, mode)
+
+    result, index, memo_key = _begin_selection(
+        product_name, brand_name, categories, brands, catalog_version
+    )
+    brand_id = result["brand_id"]
+
+    remembered = await run_blocking(_recall_decision, memo_key, brand_id, index)
+    if remembered is not None:
+        _apply_path(result, remembered)
+        return _finalize_selection(result, product_name)
+
+    semantic = await _aload_semantic(
+        product_name, brand_name, categories, catalog_version
+    )
+    await arun_steps(
+        _selection_steps(
+            product_name,
+            brand_name,
+            categories,
+            index,
+            semantic,
+            result,
+            model,
+            temperature,
+            catalog_version,
+            mode,
+        ),
+        partial(acomplete, get_async_openai_client()),
+    )
+
+    await run_blocking(_remember_decision, memo_key, brand_id, index, result)
+    return _finalize_selection(result, product_name)
@@ -0,0 +1,182 @@
+"""Brand lookup index: exact, alias and trigram fuzzy matching."""
+
+import difflib
+import heapq
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from agent.category_brand.index import VersionedIndexCache
+from core.config import settings
+from core.constants import BRAND_ALIASES
+
+# Number of trigram candidates re-scored with SequenceMatcher
+_FUZZY_CANDIDATES = 5
+
+_CYRILLIC_TO_LATIN = str.maketrans(
+    {
+        "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+        "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+        "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+        "ф": "f", "х": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh",
+        "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+        "ў": "o", "қ": "q", "ғ": "g", "ҳ": "h",
+    }
+)
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_brand_name(name: Any) -> str:
+    """
+    Normalize a brand name for lookups.
+
+    Case-folds, transliterates Cyrillic to Latin and drops everything that
+    is not a letter or digit, so "Shivaki", "SHIVAKI" and "Шиваки" collide.
+    """
+    if name is None:
+        return ""
+    text = unicodedata.normalize("NFKC", str(name)).casefold()
+    text = text.translate(_CYRILLIC_TO_LATIN)
+    return _NON_ALNUM_RE.sub("", text)
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class BrandMatch:
+    """Result of a brand lookup."""
+
+    brand_id: int
+    name: Optional[str]
+    # 1.0 for exact/alias matches, similarity ratio for fuzzy, 0.0 for fallback
+    confidence: float
+    method: str  # exact | alias | fuzzy | fallback
+
+
+class BrandIndex:
+    """
+    Brand catalog index built once per brand list.
+
+    Lookups are a hash probe for exact and alias matches. Fuzzy matching
+    only scores brands that share trigrams with the query, then re-ranks the
+    best few with ``difflib`` so the threshold keeps its old meaning.
+    """
+
+    def __init__(
+        self,
+        brands: List[Dict[str, Any]],
+        aliases: Optional[Dict[str, str]] = None,
+    ):
+        self._brands = brands
+        self._keys: List[str] = []
+        self._gram_counts: List[int] = []
+        self._by_key: Dict[str, int] = {}
+        self._trigram_index: Dict[str, List[int]] = defaultdict(list)
+
+        for position, brand in enumerate(brands):
+            key = normalize_brand_name(brand.get("name"))
+            self._keys.append(key)
+            if key and key not in self._by_key:
+                self._by_key[key] = position
+            grams = _trigrams(key)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._trigram_index[gram].append(position)
+
+        self._aliases: Dict[str, int] = {}
+        for alias, canonical in (aliases if aliases is not None else BRAND_ALIASES).items():
+            position = self._by_key.get(normalize_brand_name(canonical))
+            alias_key = normalize_brand_name(alias)
+            if position is not None and alias_key and alias_key not in self._by_key:
+                self._aliases[alias_key] = position
+
+    def _match(self, position: int, confidence: float, method: str) -> BrandMatch:
+        brand = self._brands[position]
+        return BrandMatch(
+            brand_id=brand["id"],
+            name=brand.get("name"),
+            confidence=round(confidence, 3),
+            method=method,
+        )
+
+    def _fallback(self) -> BrandMatch:
+        # Usually the first brand in 6Valley is "Unknown" or similar if not specified
+        if not self._brands:
+            return BrandMatch(brand_id=0, name=None, confidence=0.0, method="fallback")
+        return self._match(0, 0.0, "fallback")
+
+    def match(self, brand_name: Any, threshold: Optional[float] = None) -> BrandMatch:
+        """
+        Match a brand name against the catalog.
+
+        Args:
+            brand_name: Input brand name (any case/script)
+            threshold: Minimum fuzzy score (default: settings.brand_match_threshold)
+
+        Returns:
+            BrandMatch: Matched brand, or the first catalog brand as fallback
+        """
+        threshold = (
+            threshold if threshold is not None else settings.brand_match_threshold
+        )
+        key = normalize_brand_name(brand_name)
+        if not key:
+            return self._fallback()
+
+        position = self._by_key.get(key)
+        if position is not None:
+            return self._match(position, 1.0, "exact")
+
+        position = self._aliases.get(key)
+        if position is not None:
+            return self._match(position, 1.0, "alias")
+
+        # Candidate generation: brands sharing the most trigrams with the query
+        query_grams = _trigrams(key)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            for candidate in self._trigram_index.get(gram, ()):
+                shared[candidate] += 1
+        if not shared:
+            return self._fallback()
+
+        # Rank by Dice coefficient over trigram sets, re-score only the best few
+        query_count = len(query_grams)
+        candidates = heapq.nlargest(
+            _FUZZY_CANDIDATES,
+            shared,
+            key=lambda c: 2.0 * shared[c] / (query_count + self._gram_counts[c]),
+        )
+        best_position, best_score = -1, 0.0
+        for candidate in candidates:
+            score = difflib.SequenceMatcher(None, key, self._keys[candidate]).ratio()
+            if score > best_score:
+                best_position, best_score = candidate, score
+
+        if best_position >= 0 and best_score >= threshold:
+            return self._match(best_position, best_score, "fuzzy")
+        return self._fallback()
+
+
+_brand_indexes: VersionedIndexCache = VersionedIndexCache(BrandIndex)
+
+
+def get_brand_index(
+    brands: List[Dict[str, Any]], catalog_version: Optional[str] = None
+) -> BrandIndex:
+    """
+    Get the index for a brand list, building it only once per catalog version.
+
+    Args:
+        brands: Brands from ``VenuSellerAPI.get_brands()``
+        catalog_version: Version from the catalog cache, if known
+
+    Returns:
+        BrandIndex: Shared index instance
+    """
+    return _brand_indexes.get(brands, catalog_version)
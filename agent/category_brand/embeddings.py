@@ -0,0 +1,210 @@
+"""Local embedding index over category paths (NumPy cosine search, mmap-backed)."""
+
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agent.category_brand.index import (
+    CategoryIndex,
+    VersionedIndexCache,
+    get_category_index,
+)
+from core.config import settings
+from core.metrics import response_tokens, span
+from core.openai_client import get_async_openai_client, get_openai_client
+
+logger = logging.getLogger(__name__)
+
+# Inputs per embeddings request
+_EMBED_BATCH_SIZE = 512
+
+# Persisted indexes kept on disk (oldest are removed first)
+_MAX_FILES = 16
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^0-9A-Za-z_.-]+")
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def embed_texts(texts: Sequence[str], model: Optional[str] = None) -> np.ndarray:
+    """
+    Embed texts with the OpenAI embeddings API.
+
+    Args:
+        texts: Input strings
+        model: Embedding model (default: settings.category_embedding_model)
+
+    Returns:
+        np.ndarray: L2-normalized float32 matrix, one row per text
+    """
+    model = model or settings.category_embedding_model
+    client = get_openai_client()
+    rows: List[List[float]] = []
+    for start in range(0, len(texts), _EMBED_BATCH_SIZE):
+        with span("llm.embeddings") as s:
+            resp = client.embeddings.create(
+                model=model, input=list(texts[start : start + _EMBED_BATCH_SIZE])
+            )
+            s.add(tokens=response_tokens(resp))
+        rows.extend(item.embedding for item in resp.data)
+    return _normalize_rows(np.asarray(rows, dtype=np.float32))
+
+
+async def aembed_texts(texts: Sequence[str], model: Optional[str] = None) -> np.ndarray:
+    """Async counterpart of :func:`embed_texts`."""
+    model = model or settings.category_embedding_model
+    client = get_async_openai_client()
+    rows: List[List[float]] = []
+    for start in range(0, len(texts), _EMBED_BATCH_SIZE):
+        with span("llm.embeddings") as s:
+            resp = await client.embeddings.create(
+                model=model, input=list(texts[start : start + _EMBED_BATCH_SIZE])
+            )
+            s.add(tokens=response_tokens(resp))
+        rows.extend(item.embedding for item in resp.data)
+    return _normalize_rows(np.asarray(rows, dtype=np.float32))
+
+
+def catalog_fingerprint(index: CategoryIndex) -> str:
+    """Content hash of the category paths (used when no catalog version is known)."""
+    return index.fingerprint
+
+
+class CategoryEmbeddings:
+    """
+    Embeddings of every category path of one catalog.
+
+    Rows are L2-normalized, so cosine similarity is a dot product. The
+    matrix is memory-mapped from ``settings.category_embedding_dir`` and is
+    only computed (one batched API call per 512 paths) when the catalog
+    version has no file yet.
+    """
+
+    def __init__(self, node_ids: List[str], vectors: np.ndarray):
+        self.node_ids = node_ids
+        self.vectors = vectors
+        self._rows: Dict[str, int] = {node_id: row for row, node_id in enumerate(node_ids)}
+
+    @classmethod
+    def load_or_build(
+        cls, index: CategoryIndex, version: str, model: str
+    ) -> "CategoryEmbeddings":
+        directory = settings.category_embedding_dir
+        stem = _UNSAFE_FILENAME_RE.sub("_", f"categories-{version}-{model}")
+        vectors_path = os.path.join(directory, f"{stem}.npy")
+        ids_path = os.path.join(directory, f"{stem}.ids.json")
+
+        node_ids = list(index.paths)
+        if os.path.exists(vectors_path) and os.path.exists(ids_path):
+            with open(ids_path, encoding="utf-8") as f:
+                stored_ids = json.load(f)
+            if stored_ids == node_ids:
+                vectors = np.load(vectors_path, mmap_mode="r")
+                logger.debug(f"Loaded category embeddings from {vectors_path}")
+                return cls(node_ids, vectors)
+
+        logger.info(f"Kategoriya embeddinglari hisoblanmoqda: {len(node_ids)} ta yo'l")
+        vectors = embed_texts([index.paths[node_id].label for node_id in node_ids], model)
+
+        os.makedirs(directory, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp_vectors = f"{vectors_path}.{os.getpid()}.tmp"
+        with open(tmp_vectors, "wb") as f:
+            np.save(f, vectors)
+        tmp_ids = f"{ids_path}.{os.getpid()}.tmp"
+        with open(tmp_ids, "w", encoding="utf-8") as f:
+            json.dump(node_ids, f)
+        os.replace(tmp_ids, ids_path)
+        os.replace(tmp_vectors, vectors_path)
+        _prune_files(directory)
+
+        return cls(node_ids, np.load(vectors_path, mmap_mode="r"))
+
+    def top_k(
+        self,
+        query: np.ndarray,
+        k: int,
+        candidates: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Most similar category nodes to a query vector.
+
+        Args:
+            query: Normalized query embedding (1-D)
+            k: Number of results
+            candidates: Restrict the search to these node IDs
+
+        Returns:
+            List of (node_id, cosine similarity), best first
+        """
+        # Score every row (one mat-vec over the mmap) and gather the candidates;
+        # cheaper than copying a candidate sub-matrix on each query
+        scores = np.asarray(self.vectors @ query)
+        if candidates is None:
+            ids = self.node_ids
+        else:
+            ids = [node_id for node_id in candidates if node_id in self._rows]
+            if not ids:
+                return []
+            scores = scores[[self._rows[node_id] for node_id in ids]]
+
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top]
+
+
+def _prune_files(directory: str) -> None:
+    vector_files = sorted(
+        (
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.endswith(".npy")
+        ),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for path in vector_files[_MAX_FILES:]:
+        for stale in (path, path[: -len(".npy")] + ".ids.json"):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+_embedding_indexes: VersionedIndexCache = VersionedIndexCache(
+    lambda source: CategoryEmbeddings.load_or_build(*source)
+)
+
+
+def get_category_embeddings(
+    categories: List[Dict[str, Any]], catalog_version: Optional[str] = None
+) -> CategoryEmbeddings:
+    """
+    Get the embedding index for a catalog, loading or building it once per
+    category tree.
+
+    Keyed by the fingerprint of the category paths rather than the catalog
+    version, which also changes with the brand list. Blocking (file I/O
+    and, for new categories, embedding API calls); concurrent callers wait
+    for a single build.
+
+    Args:
+        categories: Category tree from ``VenuSellerAPI.get_categories()``
+        catalog_version: Version from the catalog cache, if known
+
+    Returns:
+        CategoryEmbeddings: Shared index instance
+    """
+    index = get_category_index(categories, catalog_version)
+    version = catalog_fingerprint(index)
+    model = settings.category_embedding_model
+    return _embedding_indexes.get((index, version, model), f"{model}:{version}")
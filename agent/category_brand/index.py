@@ -0,0 +1,215 @@
+"""Precomputed category hierarchy index."""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Category levels from root to leaf
+CATEGORY_LEVELS = ("category", "sub_category", "sub_sub_category")
+
+# How many catalog versions to keep indexes for
+_INDEX_CACHE_SIZE = 8
+
+
+@dataclass(frozen=True)
+class CategoryNode:
+    """A single category at any level of the tree."""
+
+    id: str
+    name: str
+    level: str
+    parent_id: Optional[str]
+
+
+@dataclass(frozen=True)
+class CategoryPath:
+    """Root-to-node path from the flattened path table."""
+
+    ids: Tuple[str, ...]
+    names: Tuple[str, ...]
+
+    @property
+    def leaf_id(self) -> str:
+        return self.ids[-1]
+
+    @property
+    def label(self) -> str:
+        return " > ".join(self.names)
+
+
+class CategoryIndex:
+    """
+    Index over the nested ``childes`` category tree returned by Venu.
+
+    Built once per catalog version; every lookup is a dict access:
+
+    - ``nodes``: id -> CategoryNode
+    - ``children``: parent id (None for roots) -> child ids
+    - ``paths``: id -> CategoryPath (flattened path table)
+    - prompt option lists per (level, parent) are precomputed and shared
+    """
+
+    def __init__(self, categories: List[Dict[str, Any]]):
+        self.nodes: Dict[str, CategoryNode] = {}
+        self.children: Dict[Optional[str], List[str]] = {}
+        self.paths: Dict[str, CategoryPath] = {}
+        self._options: Dict[Tuple[str, Optional[str]], List[Dict[str, str]]] = {}
+
+        self._add_level(categories, 0, None, (), ())
+
+        # Option lists sent to the model: [{"id", "name"}] per (level, parent)
+        for parent_id, child_ids in self.children.items():
+            if not child_ids:
+                continue
+            level = self.nodes[child_ids[0]].level
+            self._options[(level, parent_id)] = [
+                {"id": child_id, "name": self.nodes[child_id].name}
+                for child_id in child_ids
+            ]
+
+    def _add_level(
+        self,
+        items: List[Dict[str, Any]],
+        depth: int,
+        parent_id: Optional[str],
+        path_ids: Tuple[str, ...],
+        path_names: Tuple[str, ...],
+    ) -> None:
+        if depth >= len(CATEGORY_LEVELS):
+            return
+        level = CATEGORY_LEVELS[depth]
+        child_ids = self.children.setdefault(parent_id, [])
+        for item in items or []:
+            node_id = str(item["id"])
+            name = item.get("name", "")
+            self.nodes[node_id] = CategoryNode(
+                id=node_id, name=name, level=level, parent_id=parent_id
+            )
+            child_ids.append(node_id)
+            ids = path_ids + (node_id,)
+            names = path_names + (name,)
+            self.paths[node_id] = CategoryPath(ids=ids, names=names)
+            self._add_level(item.get("childes", []), depth + 1, node_id, ids, names)
+
+    def options(
+        self, level: str, parent_id: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Get the ``[{"id", "name"}]`` option list for a level.
+
+        Args:
+            level: 'category', 'sub_category' or 'sub_sub_category'
+            parent_id: Selected parent ID (ignored for 'category')
+
+        Returns:
+            List of options (shared, do not mutate); empty if none
+        """
+        if level == "category":
+            parent_id = None
+        elif parent_id is None:
+            return []
+        return self._options.get((level, str(parent_id) if parent_id else None), [])
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Content hash of the category paths (computed once per index)."""
+        digest = hashlib.sha1()
+        for node_id, path in self.paths.items():
+            digest.update(f"{node_id}\t{path.label}\n".encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    def node(self, node_id: Any) -> Optional[CategoryNode]:
+        return self.nodes.get(str(node_id))
+
+    def path(self, node_id: Any) -> Optional[CategoryPath]:
+        return self.paths.get(str(node_id))
+
+    def leaf_paths(self) -> List[CategoryPath]:
+        """Paths that end in a node without children (deepest selectable categories)."""
+        return [
+            path for node_id, path in self.paths.items() if not self.children.get(node_id)
+        ]
+
+
+class VersionedIndexCache:
+    """
+    Small LRU of derived indexes keyed by catalog version.
+
+    Without a version the source object itself is the key (the cached
+    entry keeps a reference to it, so the identity check stays valid).
+    Builds are single-flight: concurrent callers missing the same key wait
+    for the first caller's build instead of building it again.
+    """
+
+    def __init__(
+        self,
+        builder: Callable[[Any], T],
+        size: int = _INDEX_CACHE_SIZE,
+    ):
+        self._builder = builder
+        self._size = size
+        self._entries: "OrderedDict[str, Tuple[Any, T]]" = OrderedDict()
+        # Builds in progress: key -> future of the index
+        self._building: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source: Any, version: Optional[str] = None) -> T:
+        key = version or f"id:{id(source)}"
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and (version or cached[0] is source):
+                self._entries.move_to_end(key)
+                return cached[1]
+            building = self._building.get(key)
+            if building is None:
+                future: Future = Future()
+                self._building[key] = future
+
+        if building is not None:
+            return building.result()
+
+        try:
+            index = self._builder(source)
+        except BaseException as e:
+            with self._lock:
+                del self._building[key]
+            future.set_exception(e)
+            raise
+        logger.debug(f"Built {type(index).__name__} (key={key})")
+
+        with self._lock:
+            del self._building[key]
+            self._entries[key] = (source, index)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+        future.set_result(index)
+        return index
+
+
+_category_indexes: VersionedIndexCache = VersionedIndexCache(CategoryIndex)
+
+
+def get_category_index(
+    categories: List[Dict[str, Any]], catalog_version: Optional[str] = None
+) -> CategoryIndex:
+    """
+    Get the index for a catalog, building it only once per catalog version.
+
+    Args:
+        categories: Category tree from ``VenuSellerAPI.get_categories()``
+        catalog_version: Version from the catalog cache, if known
+
+    Returns:
+        CategoryIndex: Shared index instance
+    """
+    return _category_indexes.get(categories, catalog_version)
@@ -0,0 +1,274 @@
+"""Persistent memo of category decisions for near-identical product titles."""
+
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Tuple
+
+from core.config import settings
+from core.constants import TITLE_VARIANT_WORDS
+
+logger = logging.getLogger(__name__)
+
+# Words, keeping hyphenated model codes ("6400-G") and apostrophes ("ko'k") whole
+_TOKEN_RE = re.compile(r"\w+(?:['’\-]\w+)*")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS category_memo (
+    catalog_version TEXT NOT NULL,
+    brand_id INTEGER NOT NULL,
+    title_key TEXT NOT NULL,
+    path_ids TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (catalog_version, brand_id, title_key)
+);
+CREATE INDEX IF NOT EXISTS idx_category_memo_accessed ON category_memo(accessed_at);
+CREATE TABLE IF NOT EXISTS category_memo_tokens (
+    catalog_version TEXT NOT NULL,
+    brand_id INTEGER NOT NULL,
+    token TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    PRIMARY KEY (catalog_version, brand_id, token, title_key)
+);
+CREATE TRIGGER IF NOT EXISTS category_memo_tokens_cleanup
+AFTER DELETE ON category_memo
+BEGIN
+    DELETE FROM category_memo_tokens
+    WHERE catalog_version = old.catalog_version
+      AND brand_id = old.brand_id
+      AND title_key = old.title_key;
+END;
+"""
+
+# Run eviction once per this many writes instead of on every write
+_EVICT_EVERY = 50
+
+
+def title_tokens(title: str, brand_name: str = "") -> FrozenSet[str]:
+    """
+    Normalized token set of a product title.
+
+    Case-folds, drops the brand name and words from ``TITLE_VARIANT_WORDS``
+    (colors, sizes, fillers), so "6400-G Shivaki ГП с ГК Белый" and
+    "6400-G Shivaki ГП с ГК Черный" produce the same set.
+    """
+
+    def tokens(text: str) -> List[str]:
+        text = unicodedata.normalize("NFKC", text or "").casefold().replace("ё", "е")
+        return _TOKEN_RE.findall(text)
+
+    brand_tokens = set(tokens(brand_name))
+    return frozenset(
+        token
+        for token in tokens(title)
+        if token not in TITLE_VARIANT_WORDS and token not in brand_tokens
+    )
+
+
+@dataclass(frozen=True)
+class MemoHit:
+    """Memoized category path and how similar its title was."""
+
+    path_ids: Tuple[str, ...]
+    similarity: float
+    title_key: str
+
+
+class CategoryDecisionMemo:
+    """
+    Category paths chosen earlier, keyed by (catalog version, brand ID, title tokens).
+
+    Lookups try the exact token set first, then the most similar title of
+    the same brand and catalog version (Jaccard over token sets). Similar
+    titles are found through a token index, so a lookup only reads titles
+    that share enough tokens with the query. Entries
+    expire after ``ttl_seconds``; beyond ``max_entries`` the least recently
+    used are dropped.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.db_path = db_path or settings.cache_db_path
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None else settings.category_memo_ttl_seconds
+        )
+        self.max_entries = (
+            max_entries if max_entries is not None else settings.category_memo_max_entries
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(tokens: FrozenSet[str]) -> str:
+        return " ".join(sorted(tokens))
+
+    def lookup(
+        self,
+        tokens: FrozenSet[str],
+        brand_id: int,
+        catalog_version: str,
+        min_similarity: Optional[float] = None,
+    ) -> Optional[MemoHit]:
+        """
+        Find a memoized path for a title.
+
+        Args:
+            tokens: Output of :func:`title_tokens`
+            brand_id: Matched brand ID
+            catalog_version: Catalog the path belongs to
+            min_similarity: Minimum Jaccard similarity (default: settings)
+
+        Returns:
+            Optional[MemoHit]: Best match, or None
+        """
+        if not tokens:
+            return None
+        min_similarity = (
+            min_similarity
+            if min_similarity is not None
+            else settings.category_memo_min_similarity
+        )
+        conn = self._connection()
+        oldest = time.time() - self.ttl_seconds
+        key = self._key(tokens)
+        best: Optional[MemoHit] = None
+
+        row = conn.execute(
+            "SELECT path_ids FROM category_memo "
+            "WHERE catalog_version = ? AND brand_id = ? AND title_key = ? AND created_at >= ?",
+            (catalog_version, brand_id, key, oldest),
+        ).fetchone()
+        if row is not None:
+            best = MemoHit(tuple(json.loads(row[0])), 1.0, key)
+        else:
+            # Only titles sharing enough tokens can reach min_similarity
+            # (|A & B| / |A | B| <= |A & B| / |A|), so the token index gives
+            # the candidates without scanning the brand's whole memo.
+            min_shared = max(1, math.ceil(min_similarity * len(tokens) - 1e-9))
+            placeholders = ", ".join("?" * len(tokens))
+            rows = conn.execute(
+                "SELECT m.title_key, m.path_ids, COUNT(*) AS shared "
+                "FROM category_memo_tokens t JOIN category_memo m "
+                "ON m.catalog_version = t.catalog_version AND m.brand_id = t.brand_id "
+                "AND m.title_key = t.title_key "
+                f"WHERE t.catalog_version = ? AND t.brand_id = ? AND t.token IN ({placeholders}) "
+                "AND m.created_at >= ? "
+                "GROUP BY m.title_key HAVING shared >= ?",
+                (catalog_version, brand_id, *sorted(tokens), oldest, min_shared),
+            ).fetchall()
+            for title_key, path_ids, shared in rows:
+                union = len(tokens) + len(title_key.split(" ")) - shared
+                similarity = shared / union
+                if similarity >= min_similarity and (
+                    best is None or similarity > best.similarity
+                ):
+                    best = MemoHit(tuple(json.loads(path_ids)), similarity, title_key)
+
+        with self._lock:
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if best is not None:
+            conn.execute(
+                "UPDATE category_memo SET accessed_at = ? "
+                "WHERE catalog_version = ? AND brand_id = ? AND title_key = ?",
+                (time.time(), catalog_version, brand_id, best.title_key),
+            )
+        return best
+
+    def record(
+        self,
+        tokens: FrozenSet[str],
+        brand_id: int,
+        catalog_version: str,
+        path_ids: Tuple[str, ...],
+    ) -> None:
+        """Remember the category path chosen for a title."""
+        if not tokens or not path_ids:
+            return
+        now = time.time()
+        key = self._key(tokens)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO category_memo"
+                "(catalog_version, brand_id, title_key, path_ids, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (catalog_version, brand_id, key, json.dumps(list(path_ids)), now, now),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO category_memo_tokens"
+                "(catalog_version, brand_id, token, title_key) VALUES (?, ?, ?, ?)",
+                [(catalog_version, brand_id, token, key) for token in tokens],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._lock:
+            self._writes_since_evict += 1
+            due = self._writes_since_evict >= _EVICT_EVERY
+            if due:
+                self._writes_since_evict = 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Drop expired entries and trim the memo to ``max_entries``.
+
+        Returns:
+            int: Number of entries removed
+        """
+        conn = self._connection()
+        removed = conn.execute(
+            "DELETE FROM category_memo WHERE created_at < ?",
+            (time.time() - self.ttl_seconds,),
+        ).rowcount
+        removed += conn.execute(
+            "DELETE FROM category_memo WHERE rowid IN ("
+            "SELECT rowid FROM category_memo ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        if removed:
+            logger.debug(f"Evicted {removed} category memo entries")
+        return removed
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM category_memo")
+        self._connection().execute("DELETE FROM category_memo_tokens")
+
+
+# Global category decision memo instance
+category_memo = CategoryDecisionMemo()
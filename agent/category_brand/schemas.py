@@ -24,3 +24,10 @@ class CategoryBrandSelectionSchema(BaseModel):
         None, description="Selected sub-sub-sub-category name"
     )
     brand_id: int = Field(..., description="Selected brand ID")
+
+
+class CategoryPathChoiceSchema(BaseModel):
+    """Single-call selection of a full category path (leaf ID + confidence)."""
+
+    leaf_id: str = Field(..., description="ID of the selected leaf category")
+    confidence: float = Field(..., ge=0, le=1, description="Model confidence (0-1)")
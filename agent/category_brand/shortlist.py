@@ -0,0 +1,111 @@
+"""Local candidate shortlists of leaf category paths for single-call selection."""
+
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from agent.category_brand.brand_index import _CYRILLIC_TO_LATIN
+from agent.category_brand.index import (
+    CategoryIndex,
+    CategoryPath,
+    VersionedIndexCache,
+    get_category_index,
+)
+
+_WORD_RE = re.compile(r"[0-9a-z]+")
+
+# Leaf names describe the product far better than the root names
+_LEAF_WEIGHT = 2.0
+_ANCESTOR_WEIGHT = 1.0
+
+
+def _word_trigrams(text: str) -> Set[str]:
+    """Trigrams of each word (transliterated, case-folded), padded at both ends."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = text.translate(_CYRILLIC_TO_LATIN)
+    grams: Set[str] = set()
+    for word in _WORD_RE.findall(text):
+        padded = f" {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass(frozen=True)
+class ScoredPath:
+    """A leaf path with its shortlist score."""
+
+    path: CategoryPath
+    score: float
+
+
+class LexicalShortlist:
+    """
+    Trigram inverted index over the leaf paths of one catalog.
+
+    Queries only touch paths that share a trigram with the product text;
+    each shared trigram counts double when it comes from the leaf name.
+    Scores are normalized by path length so long labels are not favoured.
+    """
+
+    def __init__(self, index: CategoryIndex):
+        self.paths: List[CategoryPath] = index.leaf_paths()
+        self._norms: List[float] = []
+        self._postings: Dict[str, List[tuple]] = defaultdict(list)
+
+        for position, path in enumerate(self.paths):
+            leaf_grams = _word_trigrams(path.names[-1])
+            ancestor_grams = _word_trigrams(" ".join(path.names[:-1])) - leaf_grams
+            for gram in leaf_grams:
+                self._postings[gram].append((position, _LEAF_WEIGHT))
+            for gram in ancestor_grams:
+                self._postings[gram].append((position, _ANCESTOR_WEIGHT))
+            self._norms.append(math.sqrt(len(leaf_grams) + len(ancestor_grams)) or 1.0)
+
+    def search(self, text: str, limit: int) -> List[ScoredPath]:
+        """
+        Best leaf paths for a product text.
+
+        Args:
+            text: Product name (and brand)
+            limit: Maximum number of paths
+
+        Returns:
+            List[ScoredPath]: Best first; only paths with a positive score
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for gram in _word_trigrams(text):
+            for position, weight in self._postings.get(gram, ()):
+                scores[position] += weight
+
+        ranked = sorted(
+            ((score / self._norms[position], position) for position, score in scores.items()),
+            key=lambda item: (-item[0], item[1]),
+        )
+        return [
+            ScoredPath(path=self.paths[position], score=round(score, 3))
+            for score, position in ranked[:limit]
+        ]
+
+
+# Keyed by catalog version, or by the (shared) CategoryIndex object itself
+_shortlists: VersionedIndexCache = VersionedIndexCache(LexicalShortlist)
+
+
+def get_lexical_shortlist(
+    categories: List[Dict[str, Any]], catalog_version: Optional[str] = None
+) -> LexicalShortlist:
+    """
+    Get the leaf-path shortlist index for a catalog, built once per catalog version.
+
+    Args:
+        categories: Category tree from ``VenuSellerAPI.get_categories()``
+        catalog_version: Version from the catalog cache, if known
+
+    Returns:
+        LexicalShortlist: Shared shortlist instance
+    """
+    index = get_category_index(categories, catalog_version)
+    return _shortlists.get(index, catalog_version)
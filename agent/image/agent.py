@@ -5,7 +5,7 @@ from __future__ import annotations
 import base64
 import logging
 import os
-from typing import Optional
+from typing import BinaryIO, List, Optional
 
 from core.openai_client import get_openai_client
 
@@ -15,6 +15,76 @@ logger = logging.getLogger(__name__)
 client = get_openai_client()
 
 
+def _validate_poster_inputs(
+    template_image_path: str,
+    product_image_path: str,
+    mask_image_path: Optional[str],
+) -> None:
+    """Raise FileNotFoundError if any input image is missing."""
+    if not os.path.exists(template_image_path):
+        raise FileNotFoundError(f"Template image not found: {template_image_path}")
+    if not os.path.exists(product_image_path):
+        raise FileNotFoundError(f"Product image not found: {product_image_path}")
+    if mask_image_path and not os.path.exists(mask_image_path):
+        raise FileNotFoundError(f"Mask image not found: {mask_image_path}")
+
+
+def _build_poster_prompt(product_params: str) -> str:
+    return f"""
+1-rasimdagi posterdan andoza olib 2-rasimdagi maxsulot uchun poster yaratib ber.
+
+2-rasimdagi maxsulotning parametrlari
+{product_params}
+""".strip()
+
+
+def _open_poster_images(
+    template_image_path: str,
+    product_image_path: str,
+    mask_image_path: Optional[str],
+) -> List[BinaryIO]:
+    """Open input images in the order expected by the image edit API."""
+    # Prepare image files - matching rasim.py implementation exactly
+    # rasim.py uses: [mask.png, poster.png]
+    # So we use: [mask or template, template or product]
+    image_files = []
+
+    if mask_image_path:
+        # If mask provided, use it as first image (matching rasim.py: mask.png)
+        image_files.append(open(mask_image_path, "rb"))
+        # Second image: template (matching rasim.py: poster.png)
+        image_files.append(open(template_image_path, "rb"))
+    else:
+        # If no mask, use template as first image
+        image_files.append(open(template_image_path, "rb"))
+        # Second image: product image (to create poster for)
+        image_files.append(open(product_image_path, "rb"))
+
+    return image_files
+
+
+def _save_poster(
+    image_bytes: bytes, product_image_path: str, output_path: Optional[str]
+) -> str:
+    """Write generated poster bytes and return the output path."""
+    # Determine output path
+    if not output_path:
+        # Generate output path based on product image name
+        base_name = os.path.splitext(os.path.basename(product_image_path))[0]
+        output_dir = os.path.dirname(product_image_path) or "."
+        output_path = os.path.join(output_dir, f"{base_name}_poster.png")
+
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    # Save the image
+    with open(output_path, "wb") as f:
+        f.write(image_bytes)
+
+    logger.info(f"Successfully generated poster image: {output_path}")
+    return output_path
+
+
 def generate_poster(
     template_image_path: str,
     product_image_path: str,
@@ -42,51 +112,30 @@ def generate_poster(
         ValueError: If image generation fails
     """
     # Validate input files exist
-    if not os.path.exists(template_image_path):
-        raise FileNotFoundError(f"Template image not found: {template_image_path}")
-    if not os.path.exists(product_image_path):
-        raise FileNotFoundError(f"Product image not found: {product_image_path}")
-    if mask_image_path and not os.path.exists(mask_image_path):
-        raise FileNotFoundError(f"Mask image not found: {mask_image_path}")
+    _validate_poster_inputs(template_image_path, product_image_path, mask_image_path)
 
     # Build prompt
-    prompt = f"""
-1-rasimdagi posterdan andoza olib 2-rasimdagi maxsulot uchun poster yaratib ber.
-
-2-rasimdagi maxsulotning parametrlari
-{product_params}
-""".strip()
+    prompt = _build_poster_prompt(product_params)
 
     logger.info(f"Generating poster image from template: {template_image_path}")
 
     try:
-        # Prepare image files - matching rasim.py implementation exactly
-        # rasim.py uses: [mask.png, poster.png]
-        # So we use: [mask or template, template or product]
-        image_files = []
-
-        if mask_image_path:
-            # If mask provided, use it as first image (matching rasim.py: mask.png)
-            image_files.append(open(mask_image_path, "rb"))
-            # Second image: template (matching rasim.py: poster.png)
-            image_files.append(open(template_image_path, "rb"))
-        else:
-            # If no mask, use template as first image
-            image_files.append(open(template_image_path, "rb"))
-            # Second image: product image (to create poster for)
-            image_files.append(open(product_image_path, "rb"))
-
-        # Call OpenAI image edit API - matching rasim.py format
-        result = client.images.edit(
-            model="gpt-image-1",  # Using same model as rasim.py
-            image=image_files,  # List of image files
-            size=size,
-            prompt=prompt,
+        image_files = _open_poster_images(
+            template_image_path, product_image_path, mask_image_path
         )
 
-        # Close file handles
-        for img_file in image_files:
-            img_file.close()
+        # Call OpenAI image edit API - matching rasim.py format
+        try:
+            result = client.images.edit(
+                model="gpt-image-1",  # Using same model as rasim.py
+                image=image_files,  # List of image files
+                size=size,
+                prompt=prompt,
+            )
+        finally:
+            # Close file handles
+            for img_file in image_files:
+                img_file.close()
 
         # Get image data
         if hasattr(result.data[0], "b64_json") and result.data[0].b64_json:
@@ -101,22 +150,7 @@ def generate_poster(
         else:
             raise ValueError("No image data returned from API")
 
-        # Determine output path
-        if not output_path:
-            # Generate output path based on product image name
-            base_name = os.path.splitext(os.path.basename(product_image_path))[0]
-            output_dir = os.path.dirname(product_image_path) or "."
-            output_path = os.path.join(output_dir, f"{base_name}_poster.png")
-
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-
-        # Save the image
-        with open(output_path, "wb") as f:
-            f.write(image_bytes)
-
-        logger.info(f"Successfully generated poster image: {output_path}")
-        return output_path
+        return _save_poster(image_bytes, product_image_path, output_path)
 
     except Exception as e:
         logger.error(f"Error generating poster image: {e}", exc_info=True)
@@ -1,6 +1,23 @@
 """Product text generation agent."""
 
-from agent.product.agent import generate_product_text
-from agent.product.schemas import ProductGenSchema
+from agent.product.agent import (
+    agenerate_product_text,
+    agenerate_product_texts,
+    generate_product_text,
+    generate_product_texts,
+    get_generation_metrics,
+)
+from agent.product.schemas import ProductGenSchema, ProductTextRequest
+from agent.product.streaming import PartialJsonObject, astream_product_text
 
-__all__ = ["generate_product_text", "ProductGenSchema"]
+__all__ = [
+    "generate_product_text",
+    "agenerate_product_text",
+    "generate_product_texts",
+    "agenerate_product_texts",
+    "astream_product_text",
+    "PartialJsonObject",
+    "get_generation_metrics",
+    "ProductGenSchema",
+    "ProductTextRequest",
+]
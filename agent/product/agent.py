@@ -2,17 +2,37 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import logging
 import re
-from typing import Any, Dict, List, Optional
+import threading
+import unicodedata
+from collections import Counter
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from openai import OpenAI
 from pydantic import ValidationError
 
-from agent.product.schemas import ProductGenSchema
+from agent.product.schemas import (
+    ProductGenSchema,
+    ProductTextRequest,
+    product_json_schema,
+)
 from core.config import settings
-from core.openai_client import get_openai_client
+from core.executor import run_blocking
+from core.llm_steps import (
+    ChatRequest,
+    Steps,
+    acomplete,
+    arun_steps,
+    complete,
+    run_steps,
+)
+from core.openai_client import get_async_openai_client, get_openai_client
+from core.sqlite_cache import SqliteCache
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +43,36 @@ CYRILLIC_RE = re.compile(r"[\u0400-\u04FF]")
 # Get OpenAI client from core
 client = get_openai_client()
 
+# Persistent cache of validated results (price/stock are applied per call)
+generation_cache = SqliteCache(
+    settings.cache_db_path,
+    namespace="product_text",
+    ttl_seconds=settings.generation_cache_ttl_seconds,
+    max_entries=settings.generation_cache_max_entries,
+)
+
+# Per-process generation counters (see get_generation_metrics)
+_metrics_lock = threading.Lock()
+_metrics: Counter = Counter()
+
+
+def _record(**counts: int) -> None:
+    with _metrics_lock:
+        _metrics.update(counts)
+
+
+def get_generation_metrics() -> Dict[str, int]:
+    """
+    Snapshot of product text generation counters for this process.
+
+    Keys: ``requests`` (products generated by the model, cache hits
+    excluded), ``attempts`` and ``retries`` (per product),
+    ``failed_attempts_<reason>`` (api_error, invalid_json, validation,
+    missing_item), ``succeeded_on_attempt_<n>`` and ``failures``.
+    """
+    with _metrics_lock:
+        return dict(_metrics)
+
 
 # ---------------------------
 # Prompts
@@ -74,18 +124,8 @@ def _required_output_template() -> Dict[str, Any]:
     }
 
 
-def _build_user_prompt(name: str, brand: str, price: int, stock: int) -> str:
-    template = _required_output_template()
-
+def _product_requirements(template: Dict[str, Any]) -> str:
     return f"""
-Generate product data for the following product.
-
-Product info:
-- Name: {name}
-- Brand: {brand}
-- Price: {price}
-- Stock: {stock}
-
 Hard requirements:
 1) Output MUST be STRICT VALID JSON (no trailing commas).
 2) Output JSON MUST match this structure exactly (same keys, no extra keys):
@@ -125,6 +165,143 @@ Hard requirements:
 """.strip()
 
 
+def _build_user_prompt(name: str, brand: str, price: int, stock: int) -> str:
+    template = _required_output_template()
+
+    return f"""
+Generate product data for the following product.
+
+Product info:
+- Name: {name}
+- Brand: {brand}
+- Price: {price}
+- Stock: {stock}
+
+{_product_requirements(template)}
+""".strip()
+
+
+def _build_batch_user_prompt(products: List[Tuple[str, ProductTextRequest]]) -> str:
+    template = _required_output_template()
+    product_list = [
+        {"key": key, "name": p.name, "brand": p.brand, "price": p.price, "stock": p.stock}
+        for key, p in products
+    ]
+
+    return f"""
+Generate product data for EACH of the following products.
+
+Products:
+{json.dumps(product_list, ensure_ascii=False, indent=2)}
+
+Return ONE JSON object: {{"items": [...]}} with exactly one item per product.
+Each item MUST contain "key" (the product's key, unchanged) plus the fields below.
+
+{_product_requirements(template)}
+""".strip()
+
+
+# Structured outputs: the model can only return JSON matching ProductGenSchema
+PRODUCT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "product", "strict": True, "schema": product_json_schema()},
+}
+
+
+def _batch_response_format() -> Dict[str, Any]:
+    item_schema = product_json_schema()
+    item_schema["properties"] = {"key": {"type": "string"}, **item_schema["properties"]}
+    item_schema["required"] = list(item_schema["properties"])
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "product_batch",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {"items": {"type": "array", "items": item_schema}},
+                "required": ["items"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+BATCH_RESPONSE_FORMAT = _batch_response_format()
+
+
+def _prompt_version() -> str:
+    sample = ProductTextRequest(name="{name}", brand="{brand}", price=0, stock=0)
+    parts = [
+        SYSTEM_PROMPT,
+        _build_user_prompt("{name}", "{brand}", 0, 0),
+        _build_batch_user_prompt([("{key}", sample)]),
+        json.dumps(PRODUCT_RESPONSE_FORMAT, sort_keys=True),
+        json.dumps(BATCH_RESPONSE_FORMAT, sort_keys=True),
+    ]
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+# Fingerprint of the prompts and response schemas (single and batch);
+# changing any of them invalidates cached results
+PROMPT_VERSION = _prompt_version()
+
+
+# ---------------------------
+# Generation cache
+# ---------------------------
+
+
+def _normalize_cache_text(value: str) -> str:
+    text = unicodedata.normalize("NFKC", value or "").casefold()
+    return " ".join(text.split())
+
+
+def _generation_cache_key(
+    name: str, brand: str, model: str, temperature: float
+) -> str:
+    payload = json.dumps(
+        [
+            PROMPT_VERSION,
+            _normalize_cache_text(name),
+            _normalize_cache_text(brand),
+            model,
+            round(float(temperature), 3),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _load_cached_product(
+    key: str, price: int, stock: int
+) -> Optional[ProductGenSchema]:
+    """Cached product for ``key`` with the caller's price/stock, if any."""
+    try:
+        cached = generation_cache.get(key)
+    except Exception as e:
+        logger.warning(f"Generation cache read failed: {e}")
+        return None
+    if cached is None:
+        return None
+
+    try:
+        product = ProductGenSchema.model_validate_json(cached)
+    except ValidationError:
+        # Written by an older schema; regenerate and overwrite
+        return None
+    product.price = price
+    product.stock = stock
+    return product
+
+
+def _store_cached_product(key: str, product: ProductGenSchema) -> None:
+    try:
+        generation_cache.set(key, product.model_dump_json())
+    except Exception as e:
+        logger.warning(f"Generation cache write failed: {e}")
+
+
 # ---------------------------
 # Helpers
 # ---------------------------
@@ -203,6 +380,181 @@ def _cleanup_tags(tags: List[str], max_len: int = 10) -> List[str]:
     return cleaned
 
 
+class _InvalidOutputError(ValueError):
+    """Model output could not be turned into a product; carries a prompt correction."""
+
+    def __init__(self, error: Exception, correction: str, reason: str = "validation"):
+        super().__init__(str(error))
+        self.error = error
+        self.correction = correction
+        # Metrics label: invalid_json | validation
+        self.reason = reason
+
+
+def _parse_product_content(
+    content: str, price: int, stock: int, attempt: int
+) -> ProductGenSchema:
+    """
+    Parse, normalize and validate one completion.
+
+    Raises:
+        _InvalidOutputError: With the text to append to the user prompt for the retry
+    """
+    # 1) Parse JSON
+    try:
+        data = json.loads(content)
+        logger.debug(f"Parsed product JSON: {data}")
+    except json.JSONDecodeError:
+        logger.warning(
+            f"Invalid JSON response (attempt {attempt + 1}): {content[:300]}"
+        )
+        raise _InvalidOutputError(
+            ValueError(f"AI valid JSON qaytarmadi (attempt={attempt + 1})"),
+            "\n\nIMPORTANT: Output ONLY strict JSON. No text. No markdown.",
+            reason="invalid_json",
+        )
+
+    return _validate_product_data(data, price, stock, attempt)
+
+
+def _validate_product_data(
+    data: Any, price: int, stock: int, attempt: int
+) -> ProductGenSchema:
+    """
+    Normalize and validate one decoded product object.
+
+    Raises:
+        _InvalidOutputError: With the text to append to the user prompt for the retry
+    """
+    # 2) Normalize (tags etc.)
+    try:
+        data = _normalize_product_dict(data)
+    except Exception as e:
+        logger.warning(f"Normalization error (attempt {attempt + 1}): {e}")
+        raise _InvalidOutputError(
+            e, "\n\nYour previous JSON structure was wrong. Fix it and output ONLY JSON."
+        )
+
+    # 3) Validate schema
+    try:
+        product = ProductGenSchema(**data)
+        _assert_russian_only(product)
+        product.tags = _cleanup_tags(product.tags)
+        # Keep price/stock exact (hard rule)
+        product.price = price
+        product.stock = stock
+        return product
+    except (ValidationError, ValueError) as e:
+        logger.warning(f"Validation error (attempt {attempt + 1}): {e}")
+        raise _InvalidOutputError(
+            e,
+            "\n\nYour previous JSON did not validate. Fix it and output ONLY corrected JSON.\n"
+            + f"Validation error summary: {str(e)[:900]}",
+        )
+
+
+# ---------------------------
+# Request loops (shared by the sync and async entry points)
+# ---------------------------
+
+
+def _text_settings(
+    model: Optional[str], temperature: Optional[float], max_retries: Optional[int]
+) -> Tuple[str, float, int]:
+    return (
+        model or settings.openai_model,
+        temperature if temperature is not None else settings.openai_temperature,
+        max_retries if max_retries is not None else settings.openai_max_retries,
+    )
+
+
+def _text_cache_key(
+    name: str, brand: str, model: str, temperature: float, use_cache: bool
+) -> Optional[str]:
+    if not (use_cache and settings.generation_cache_enabled):
+        return None
+    return _generation_cache_key(name, brand, model, temperature)
+
+
+def _failed_result(error: Optional[Exception], attempts: int) -> ValueError:
+    return ValueError(
+        f"Failed to generate valid product JSON after {attempts} attempts. "
+        f"Last error: {error}"
+    )
+
+
+def _product_text_steps(
+    name: str,
+    brand: str,
+    price: int,
+    stock: int,
+    model: str,
+    temperature: float,
+    max_retries: int,
+) -> Steps[ProductGenSchema]:
+    """
+    Retry/validation loop of one product, run by ``run_steps``/``arun_steps``.
+
+    Yields a ChatRequest per attempt and receives its response (or the
+    exception it raised); an invalid answer is retried with a correction
+    appended to the prompt.
+
+    Raises:
+        Exception: The API error of the last attempt
+        ValueError: If no attempt returned a valid product
+    """
+    user_prompt = _build_user_prompt(name=name, brand=brand, price=price, stock=stock)
+    last_error: Optional[Exception] = None
+
+    logger.info(f"Generating product text for: {name} ({brand})")
+
+    _record(requests=1)
+    for attempt in range(max_retries + 1):
+        _record(attempts=1, retries=1 if attempt else 0)
+        resp = yield ChatRequest(
+            "llm.product_text",
+            {
+                "model": model,
+                "temperature": temperature,
+                "messages": [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt},
+                ],
+                "response_format": PRODUCT_RESPONSE_FORMAT,
+            },
+        )
+        if isinstance(resp, Exception):
+            logger.error(
+                f"OpenAI API error (attempt {attempt + 1}/{max_retries + 1}): {resp}",
+                exc_info=resp,
+            )
+            _record(failed_attempts_api_error=1)
+            last_error = resp
+            if attempt < max_retries:
+                continue
+            _record(failures=1)
+            raise resp
+
+        content = (resp.choices[0].message.content or "").strip()
+
+        try:
+            product = _parse_product_content(content, price, stock, attempt)
+        except _InvalidOutputError as e:
+            _record(**{f"failed_attempts_{e.reason}": 1})
+            last_error = e.error
+            user_prompt += e.correction
+            continue
+
+        _record(**{f"succeeded_on_attempt_{attempt + 1}": 1})
+        logger.info(f"Successfully generated bilingual product text for: {name}")
+        return product
+
+    _record(failures=1)
+    error = _failed_result(last_error, max_retries + 1)
+    logger.error(str(error))
+    raise error
+
+
 # ---------------------------
 # Public API
 # ---------------------------
@@ -216,6 +568,7 @@ def generate_product_text(
     model: Optional[str] = None,
     temperature: Optional[float] = None,
     max_retries: Optional[int] = None,
+    use_cache: bool = True,
 ) -> ProductGenSchema:
     """
     Generates bilingual (Russian and Uzbek) product JSON and validates it with Pydantic.
@@ -228,6 +581,9 @@ def generate_product_text(
         model: OpenAI model to use (default: from settings)
         temperature: Temperature for generation (default: from settings)
         max_retries: Maximum retry attempts (default: from settings)
+        use_cache: Reuse/store results in the generation cache; pass False to
+            force a fresh generation (the cache is also off when
+            ``settings.generation_cache_enabled`` is False)
 
     Returns:
         ProductGenSchema: Validated product schema with name_ru, name_uz, description_ru, description_uz
@@ -235,85 +591,295 @@ def generate_product_text(
     Raises:
         ValueError: If generation fails after all retries
     """
-    model = model or settings.openai_model
-    temperature = (
-        temperature if temperature is not None else settings.openai_temperature
+    model, temperature, max_retries = _text_settings(model, temperature, max_retries)
+
+    cache_key = _text_cache_key(name, brand, model, temperature, use_cache)
+    if cache_key is not None:
+        cached = _load_cached_product(cache_key, price, stock)
+        if cached is not None:
+            logger.info(f"Product text served from cache: {name} ({brand})")
+            return cached
+
+    product = run_steps(
+        _product_text_steps(name, brand, price, stock, model, temperature, max_retries),
+        partial(complete, client),
     )
-    max_retries = (
-        max_retries if max_retries is not None else settings.openai_max_retries
+    if cache_key is not None:
+        _store_cached_product(cache_key, product)
+    return product
+
+
+async def agenerate_product_text(
+    name: str,
+    brand: str,
+    price: int,
+    stock: int = 5,
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    use_cache: bool = True,
+) -> ProductGenSchema:
+    """
+    Async counterpart of :func:`generate_product_text` using the pooled async client.
+
+    Raises:
+        ValueError: If generation fails after all retries
+    """
+    model, temperature, max_retries = _text_settings(model, temperature, max_retries)
+
+    cache_key = _text_cache_key(name, brand, model, temperature, use_cache)
+    if cache_key is not None:
+        cached = await run_blocking(_load_cached_product, cache_key, price, stock)
+        if cached is not None:
+            logger.info(f"Product text served from cache: {name} ({brand})")
+            return cached
+
+    product = await arun_steps(
+        _product_text_steps(name, brand, price, stock, model, temperature, max_retries),
+        partial(acomplete, get_async_openai_client()),
     )
+    if cache_key is not None:
+        await run_blocking(_store_cached_product, cache_key, product)
+    return product
 
-    user_prompt = _build_user_prompt(name=name, brand=brand, price=price, stock=stock)
-    last_error: Optional[Exception] = None
 
-    logger.info(f"Generating product text for: {name} ({brand})")
+# ---------------------------
+# Batch generation
+# ---------------------------
 
-    for attempt in range(max_retries + 1):
+# Per-item outcome of batch generation: the product or the reason it failed
+ProductTextResult = Union[ProductGenSchema, Exception]
+
+
+def _chunks(positions: List[int], size: int) -> List[List[int]]:
+    return [positions[i : i + size] for i in range(0, len(positions), size)]
+
+
+def _batch_messages(
+    items: Sequence[ProductTextRequest], chunk: List[int]
+) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": _build_batch_user_prompt([(str(i), items[i]) for i in chunk]),
+        },
+    ]
+
+
+def _parse_batch_content(
+    content: str,
+    items: Sequence[ProductTextRequest],
+    chunk: List[int],
+    attempt: int,
+) -> Dict[int, ProductTextResult]:
+    """Validate every item of a batch answer independently."""
+    try:
+        data = json.loads(content)
+        answers = data["items"]
+        if not isinstance(answers, list):
+            raise TypeError("'items' is not a list")
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        logger.warning(f"Invalid batch JSON response (attempt {attempt + 1}): {e}")
+        _record(failed_attempts_invalid_json=len(chunk))
+        error = ValueError(f"AI valid JSON qaytarmadi (attempt={attempt + 1})")
+        return {i: error for i in chunk}
+
+    by_key: Dict[str, Any] = {}
+    for answer in answers:
+        if isinstance(answer, dict) and "key" in answer:
+            by_key[str(answer.pop("key"))] = answer
+
+    outcome: Dict[int, ProductTextResult] = {}
+    for i in chunk:
+        answer = by_key.get(str(i))
+        if answer is None:
+            _record(failed_attempts_missing_item=1)
+            outcome[i] = ValueError(f"Batch javobida mahsulot yo'q (key={i})")
+            continue
         try:
-            resp = client.chat.completions.create(
-                model=model,
-                temperature=temperature,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt},
-                ],
+            outcome[i] = _validate_product_data(
+                answer, items[i].price, items[i].stock, attempt
             )
-        except Exception as e:
-            logger.error(
-                f"OpenAI API error (attempt {attempt + 1}/{max_retries + 1}): {e}",
-                exc_info=True,
+            _record(**{f"succeeded_on_attempt_{attempt + 1}": 1})
+        except _InvalidOutputError as e:
+            _record(**{f"failed_attempts_{e.reason}": 1})
+            outcome[i] = e.error
+    return outcome
+
+
+def _batch_settings(
+    model: Optional[str],
+    temperature: Optional[float],
+    max_retries: Optional[int],
+    batch_size: Optional[int],
+) -> Tuple[str, float, int, int]:
+    return (
+        *_text_settings(model, temperature, max_retries),
+        max(1, batch_size or settings.product_text_batch_size),
+    )
+
+
+def _batch_cache_keys(
+    items: Sequence[ProductTextRequest], model: str, temperature: float, use_cache: bool
+) -> Dict[int, str]:
+    if not (use_cache and settings.generation_cache_enabled):
+        return {}
+    return {
+        i: _generation_cache_key(item.name, item.brand, model, temperature)
+        for i, item in enumerate(items)
+    }
+
+
+def _product_texts_steps(
+    items: Sequence[ProductTextRequest],
+    pending: List[int],
+    model: str,
+    temperature: float,
+    max_retries: int,
+    batch_size: int,
+) -> Steps[Dict[int, ProductTextResult]]:
+    """
+    Batched retry/validation loop, run by ``run_steps``/``arun_steps``.
+
+    Each attempt yields one ChatRequest per chunk of ``batch_size`` pending
+    items and receives their responses (or exceptions) in the same order;
+    only the items that failed are sent again.
+
+    Returns:
+        Dict[int, ProductTextResult]: Product or final error of every
+        position in ``pending``
+    """
+    results: Dict[int, ProductTextResult] = {}
+    errors: Dict[int, Exception] = {}
+    logger.info(
+        f"Generating product text for {len(pending)}/{len(items)} products "
+        f"in batches of {batch_size}"
+    )
+
+    _record(requests=len(pending))
+    for attempt in range(max_retries + 1):
+        if not pending:
+            break
+        _record(attempts=len(pending), retries=len(pending) if attempt else 0)
+        chunks = _chunks(pending, batch_size)
+        responses = yield [
+            ChatRequest(
+                "llm.product_text",
+                {
+                    "model": model,
+                    "temperature": temperature,
+                    "messages": _batch_messages(items, chunk),
+                    "response_format": BATCH_RESPONSE_FORMAT,
+                },
             )
-            last_error = e
-            if attempt < max_retries:
+            for chunk in chunks
+        ]
+
+        failed: List[int] = []
+        for chunk, resp in zip(chunks, responses):
+            if isinstance(resp, Exception):
+                logger.error(
+                    f"OpenAI API error (attempt {attempt + 1}/{max_retries + 1}): {resp}",
+                    exc_info=resp,
+                )
+                _record(failed_attempts_api_error=len(chunk))
+                errors.update({i: resp for i in chunk})
+                failed.extend(chunk)
                 continue
-            raise
 
-        content = (resp.choices[0].message.content or "").strip()
+            content = (resp.choices[0].message.content or "").strip()
+            for i, outcome in _parse_batch_content(content, items, chunk, attempt).items():
+                if isinstance(outcome, ProductGenSchema):
+                    results[i] = outcome
+                else:
+                    errors[i] = outcome
+                    failed.append(i)
+        pending = failed
 
-        # 1) Parse JSON
-        try:
-            data = json.loads(content)
-            print(data)
+    _record(failures=len(pending))
+    for i in pending:
+        results[i] = _failed_result(errors.get(i), max_retries + 1)
+        logger.error(f"Product text failed for '{items[i].name}': {results[i]}")
+    return results
 
-        except json.JSONDecodeError as e:
-            logger.warning(
-                f"Invalid JSON response (attempt {attempt + 1}): {content[:300]}"
-            )
-            last_error = ValueError(f"AI valid JSON qaytarmadi (attempt={attempt + 1})")
-            user_prompt += (
-                "\n\nIMPORTANT: Output ONLY strict JSON. No text. No markdown."
-            )
-            continue
 
-        # 2) Normalize (tags etc.)
-        try:
-            data = _normalize_product_dict(data)
-        except Exception as e:
-            logger.warning(f"Normalization error (attempt {attempt + 1}): {e}")
-            last_error = e
-            user_prompt += "\n\nYour previous JSON structure was wrong. Fix it and output ONLY JSON."
-            continue
+def generate_product_texts(
+    items: Sequence[ProductTextRequest],
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[ProductTextResult]:
+    """
+    Generate product texts for many products with few requests.
 
-        # 3) Validate schema
-        try:
-            product = ProductGenSchema(**data)
-            _assert_russian_only(product)
-            product.tags = _cleanup_tags(product.tags)
-            # Keep price/stock exact (hard rule)
-            product.price = price
-            product.stock = stock
-            logger.info(f"Successfully generated bilingual product text for: {name}")
-            return product
-        except (ValidationError, ValueError) as e:
-            logger.warning(f"Validation error (attempt {attempt + 1}): {e}")
-            last_error = e
-            user_prompt = (
-                user_prompt
-                + "\n\nYour previous JSON did not validate. Fix it and output ONLY corrected JSON.\n"
-                + f"Validation error summary: {str(e)[:900]}"
-            )
-            continue
+    Up to ``batch_size`` products share one completion (one system prompt
+    and template). Each returned item is validated on its own; only the
+    items that failed are sent again on the next attempt.
+
+    Args:
+        items: Products to generate
+        model: OpenAI model to use (default: from settings)
+        temperature: Temperature for generation (default: from settings)
+        max_retries: Maximum retry attempts per item (default: from settings)
+        batch_size: Products per request (default: settings.product_text_batch_size)
+        use_cache: Reuse/store results in the generation cache
 
-    error_msg = f"Failed to generate valid product JSON after {max_retries + 1} attempts. Last error: {last_error}"
-    logger.error(error_msg)
-    raise ValueError(error_msg)
+    Returns:
+        List[ProductTextResult]: In input order; a ProductGenSchema, or the
+        exception for items that still failed after all retries
+    """
+    model, temperature, max_retries, batch_size = _batch_settings(
+        model, temperature, max_retries, batch_size
+    )
+    cache_keys = _batch_cache_keys(items, model, temperature, use_cache)
+    results: List[Optional[ProductTextResult]] = [None] * len(items)
+    for i, key in cache_keys.items():
+        results[i] = _load_cached_product(key, items[i].price, items[i].stock)
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    generated = run_steps(
+        _product_texts_steps(items, pending, model, temperature, max_retries, batch_size),
+        lambda requests: [complete(client, request) for request in requests],
+    )
+    for i, result in generated.items():
+        results[i] = result
+        if i in cache_keys and isinstance(result, ProductGenSchema):
+            _store_cached_product(cache_keys[i], result)
+    return results
+
+
+async def agenerate_product_texts(
+    items: Sequence[ProductTextRequest],
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[ProductTextResult]:
+    """Async counterpart of :func:`generate_product_texts` (chunks run concurrently)."""
+    model, temperature, max_retries, batch_size = _batch_settings(
+        model, temperature, max_retries, batch_size
+    )
+    cache_keys = _batch_cache_keys(items, model, temperature, use_cache)
+    results: List[Optional[ProductTextResult]] = [None] * len(items)
+    for i, key in cache_keys.items():
+        results[i] = await run_blocking(
+            _load_cached_product, key, items[i].price, items[i].stock
+        )
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    async_client = get_async_openai_client()
+    generated = await arun_steps(
+        _product_texts_steps(items, pending, model, temperature, max_retries, batch_size),
+        lambda requests: asyncio.gather(
+            *(acomplete(async_client, request) for request in requests)
+        ),
+    )
+    for i, result in generated.items():
+        results[i] = result
+        if i in cache_keys and isinstance(result, ProductGenSchema):
+            await run_blocking(_store_cached_product, cache_keys[i], result)
+    return results
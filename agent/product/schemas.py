@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict, List
 from pydantic import BaseModel, Field, ConfigDict, conint, constr
 
 
@@ -31,3 +31,63 @@ class ProductGenSchema(BaseModel):
 
     price: float = Field(..., description="Product price")
     stock: conint(ge=0) = Field(default=5, description="Available stock quantity")
+
+
+class ProductTextRequest(BaseModel):
+    """Input of one product for batch text generation."""
+
+    name: str = Field(..., description="Product name (any language)")
+    brand: str = Field(..., description="Product brand")
+    price: float = Field(..., description="Product price")
+    stock: conint(ge=0) = Field(default=5, description="Available stock quantity")
+
+
+# JSON Schema keywords accepted by OpenAI structured outputs in strict mode;
+# everything else (titles, defaults, length limits) is dropped and still
+# enforced by Pydantic after parsing.
+_STRICT_SCHEMA_KEYS = {
+    "type",
+    "properties",
+    "items",
+    "required",
+    "additionalProperties",
+    "description",
+    "enum",
+    "anyOf",
+    "$ref",
+    "$defs",
+}
+
+
+def strict_json_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a Pydantic JSON schema to the strict structured-output subset.
+
+    Every object gets ``additionalProperties: false`` and lists all of its
+    properties as required (strict mode has no optional fields).
+    """
+    if isinstance(schema, list):
+        return [strict_json_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+
+    result: Dict[str, Any] = {}
+    for key, value in schema.items():
+        if key not in _STRICT_SCHEMA_KEYS:
+            continue
+        if key in ("properties", "$defs"):
+            result[key] = {name: strict_json_schema(sub) for name, sub in value.items()}
+        elif key in ("items", "anyOf"):
+            result[key] = strict_json_schema(value)
+        else:
+            result[key] = value
+
+    if result.get("type") == "object":
+        result["additionalProperties"] = False
+        result["required"] = list(result.get("properties", {}))
+    return result
+
+
+def product_json_schema() -> Dict[str, Any]:
+    """Strict structured-output schema of :class:`ProductGenSchema`."""
+    return strict_json_schema(ProductGenSchema.model_json_schema())
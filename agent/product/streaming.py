@@ -0,0 +1,380 @@
+"""Streaming product text generation with incremental JSON parsing."""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from agent.product.agent import (
+    PRODUCT_RESPONSE_FORMAT,
+    SYSTEM_PROMPT,
+    _build_user_prompt,
+    _failed_result,
+    _InvalidOutputError,
+    _load_cached_product,
+    _parse_product_content,
+    _record,
+    _store_cached_product,
+    _text_cache_key,
+    _text_settings,
+)
+from agent.product.schemas import ProductGenSchema
+from core.executor import run_blocking
+from core.metrics import response_tokens, span
+from core.openai_client import get_async_openai_client
+
+logger = logging.getLogger(__name__)
+
+# Fields owned by the caller, not the model; never streamed to the client
+_CALLER_FIELDS = frozenset({"price", "stock"})
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+# Parser states
+_START = "start"
+_KEY_OR_END = "key_or_end"
+_KEY = "key"
+_COLON = "colon"
+_VALUE = "value"
+_STRING = "string"
+_ARRAY = "array"
+_SCALAR = "scalar"
+_AFTER_VALUE = "after_value"
+_DONE = "done"
+
+
+class PartialJsonObject:
+    """
+    Incremental parser for a flat JSON object streamed in arbitrary chunks.
+
+    Values may be strings, arrays of strings or scalars (numbers, booleans,
+    null) - the shape of ``ProductGenSchema``. Every :meth:`feed` returns
+    the events produced by that chunk:
+
+    - ``{"type": "delta", "field": ..., "text": ...}`` - text appended to a
+      string field (consecutive pieces of one field are merged)
+    - ``{"type": "field", "field": ..., "value": ..., "done": bool}`` - a
+      finished string/scalar (``done`` True), or an array after each
+      finished item (``done`` False) and once it is closed (``done`` True)
+
+    Anything else (nested objects, malformed input) stops the incremental
+    events; the complete text is still validated by the caller.
+    """
+
+    def __init__(self) -> None:
+        self.values: Dict[str, Any] = {}
+        self.failed = False
+        self._state = _START
+        self._key: Optional[str] = None
+        self._chars: List[str] = []
+        self._items: Optional[List[str]] = None
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._events: List[Dict[str, Any]] = []
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume the next piece of the JSON text.
+
+        Args:
+            chunk: Next characters of the stream
+
+        Returns:
+            List[Dict[str, Any]]: Events produced by this chunk, in order
+        """
+        if self.failed or self.done:
+            return []
+        self._events = []
+        for char in chunk:
+            try:
+                self._step(char)
+            except ValueError as e:
+                logger.debug(f"Incremental JSON parsing stopped: {e}")
+                self.failed = True
+                break
+            if self.done:
+                break
+        return self._events
+
+    def _step(self, char: str) -> None:
+        state = self._state
+
+        if state in (_KEY, _STRING):
+            text, closed = self._string_char(char)
+            if state == _KEY:
+                self._chars.append(text)
+                if closed:
+                    self._key = "".join(self._chars)
+                    self._chars = []
+                    self._state = _COLON
+            elif self._items is not None:
+                self._chars.append(text)
+                if closed:
+                    self._items.append("".join(self._chars))
+                    self._chars = []
+                    self._state = _ARRAY
+                    self._emit_field(list(self._items), done=False)
+            else:
+                if text:
+                    self._chars.append(text)
+                    self._emit_delta(text)
+                if closed:
+                    self._finish_value("".join(self._chars))
+            return
+
+        if state == _SCALAR:
+            if char in ",}]" or char.isspace():
+                self._finish_value(self._decode_scalar("".join(self._chars)))
+                self._step(char)
+            else:
+                self._chars.append(char)
+            return
+
+        if char.isspace():
+            return
+
+        if state == _START:
+            self._expect(char, "{")
+            self._state = _KEY_OR_END
+        elif state == _KEY_OR_END:
+            if char == "}":
+                self._state = _DONE
+            else:
+                self._expect(char, '"')
+                self._chars = []
+                self._state = _KEY
+        elif state == _COLON:
+            self._expect(char, ":")
+            self._state = _VALUE
+        elif state == _VALUE:
+            self._chars = []
+            if char == '"':
+                self._state = _STRING
+            elif char == "[":
+                self._items = []
+                self._state = _ARRAY
+            elif char == "{":
+                raise ValueError("nested objects are not supported")
+            else:
+                self._chars.append(char)
+                self._state = _SCALAR
+        elif state == _ARRAY:
+            if char == "]":
+                items, self._items = self._items, None
+                self._finish_value(items)
+            elif char == '"':
+                self._chars = []
+                self._state = _STRING
+            elif char != ",":
+                raise ValueError("only arrays of strings are supported")
+        elif state == _AFTER_VALUE:
+            if char == "}":
+                self._state = _DONE
+            else:
+                self._expect(char, ",")
+                self._state = _KEY_OR_END
+
+    def _string_char(self, char: str):
+        """Decode one character inside a string; returns (text, string_closed)."""
+        if self._escape is not None:
+            if self._escape == "" and char != "u":
+                if char not in _ESCAPES:
+                    raise ValueError(f"invalid escape \\{char}")
+                self._escape = None
+                return _ESCAPES[char], False
+            self._escape += char
+            if len(self._escape) < 5:
+                return "", False
+            code = int(self._escape[1:], 16)
+            self._escape = None
+            if 0xD800 <= code < 0xDC00:
+                self._high_surrogate = code
+                return "", False
+            if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+            return chr(code), False
+
+        if char == "\\":
+            self._escape = ""
+            return "", False
+        if char == '"':
+            return "", True
+        return char, False
+
+    @staticmethod
+    def _expect(char: str, expected: str) -> None:
+        if char != expected:
+            raise ValueError(f"expected {expected!r}, got {char!r}")
+
+    @staticmethod
+    def _decode_scalar(token: str) -> Any:
+        try:
+            return json.loads(token)
+        except json.JSONDecodeError:
+            raise ValueError(f"invalid scalar {token!r}")
+
+    def _finish_value(self, value: Any) -> None:
+        self.values[self._key] = value
+        self._emit_field(value, done=True)
+        self._chars = []
+        self._state = _AFTER_VALUE
+
+    def _emit_delta(self, text: str) -> None:
+        last = self._events[-1] if self._events else None
+        if last and last["type"] == "delta" and last["field"] == self._key:
+            last["text"] += text
+        else:
+            self._events.append({"type": "delta", "field": self._key, "text": text})
+
+    def _emit_field(self, value: Any, done: bool) -> None:
+        self._events.append(
+            {"type": "field", "field": self._key, "value": value, "done": done}
+        )
+
+
+def _cached_events(product: ProductGenSchema) -> List[Dict[str, Any]]:
+    data = product.model_dump()
+    return [
+        {"type": "field", "field": field, "value": value, "done": True}
+        for field, value in data.items()
+        if field not in _CALLER_FIELDS
+    ]
+
+
+async def astream_product_text(
+    name: str,
+    brand: str,
+    price: int,
+    stock: int = 5,
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    use_cache: bool = True,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream product text generation as JSON-serializable events.
+
+    Fields are emitted while the model writes them (see
+    :class:`PartialJsonObject` for the ``delta``/``field`` events). When a
+    completion fails validation a ``{"type": "retry", "attempt": n}`` event
+    tells the client to discard what it has shown. The last event is
+    ``{"type": "product", "product": {...}}`` with the object validated
+    against ``ProductGenSchema``, exactly as :func:`agenerate_product_text`
+    would return it.
+
+    Args:
+        name: Product name (input, can be in any language)
+        brand: Product brand
+        price: Product price
+        stock: Product stock quantity (default: 5)
+        model: OpenAI model to use (default: from settings)
+        temperature: Temperature for generation (default: from settings)
+        max_retries: Maximum retry attempts (default: from settings)
+        use_cache: Reuse/store results in the generation cache
+
+    Yields:
+        Dict[str, Any]: Stream events
+
+    Raises:
+        ValueError: If generation fails after all retries
+    """
+    model, temperature, max_retries = _text_settings(model, temperature, max_retries)
+
+    cache_key = _text_cache_key(name, brand, model, temperature, use_cache)
+    if cache_key is not None:
+        cached = await run_blocking(_load_cached_product, cache_key, price, stock)
+        if cached is not None:
+            logger.info(f"Product text served from cache: {name} ({brand})")
+            for event in _cached_events(cached):
+                yield event
+            yield {"type": "product", "product": cached.model_dump()}
+            return
+
+    user_prompt = _build_user_prompt(name=name, brand=brand, price=price, stock=stock)
+    last_error: Optional[Exception] = None
+    async_client = get_async_openai_client()
+
+    logger.info(f"Streaming product text for: {name} ({brand})")
+
+    _record(requests=1)
+    for attempt in range(max_retries + 1):
+        _record(attempts=1, retries=1 if attempt else 0)
+        if attempt:
+            yield {"type": "retry", "attempt": attempt + 1}
+
+        parser = PartialJsonObject()
+        parts: List[str] = []
+        try:
+            with span("llm.product_text") as s:
+                stream = await async_client.chat.completions.create(
+                    model=model,
+                    temperature=temperature,
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    response_format=PRODUCT_RESPONSE_FORMAT,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in stream:
+                    # The last chunk carries usage and no choices
+                    s.add(tokens=response_tokens(chunk))
+                    if not chunk.choices:
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if not text:
+                        continue
+                    parts.append(text)
+                    for event in parser.feed(text):
+                        if event["field"] not in _CALLER_FIELDS:
+                            yield event
+        except Exception as e:
+            logger.error(
+                f"OpenAI API error (attempt {attempt + 1}/{max_retries + 1}): {e}",
+                exc_info=True,
+            )
+            _record(failed_attempts_api_error=1)
+            last_error = e
+            if attempt < max_retries:
+                continue
+            _record(failures=1)
+            raise
+
+        try:
+            product = _parse_product_content(
+                "".join(parts).strip(), price, stock, attempt
+            )
+        except _InvalidOutputError as e:
+            _record(**{f"failed_attempts_{e.reason}": 1})
+            last_error = e.error
+            user_prompt += e.correction
+            continue
+
+        _record(**{f"succeeded_on_attempt_{attempt + 1}": 1})
+
+        if cache_key is not None:
+            await run_blocking(_store_cached_product, cache_key, product)
+        logger.info(f"Successfully streamed bilingual product text for: {name}")
+        yield {"type": "product", "product": product.model_dump()}
+        return
+
+    _record(failures=1)
+    error = _failed_result(last_error, max_retries + 1)
+    logger.error(str(error))
+    raise error
@@ -1,10 +1,12 @@
 """Venu Seller API client."""
 
+import io
 import json
 import logging
 import os
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 import requests
 
@@ -16,6 +18,8 @@ from core.constants import (
     DEFAULT_SUB_SUB_CATEGORY_ID,
     DEFAULT_UNIT,
 )
+from core.image_format import EncodedImage
+from core.metrics import span
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +30,16 @@ class VenuAPIError(Exception):
     pass
 
 
+@dataclass
+class ConditionalResponse:
+    """Result of a conditional (ETag / If-Modified-Since) GET."""
+
+    data: Any
+    not_modified: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
 class VenuSellerAPI:
     """Client for Venu Seller API."""
 
@@ -97,7 +111,7 @@ class VenuSellerAPI:
         self, file_path: str, image_type: str = "product"
     ) -> Optional[str]:
         """
-        Upload image to server.
+        Upload image file to server.
 
         Args:
             file_path: Path to image file
@@ -106,15 +120,33 @@ class VenuSellerAPI:
         Returns:
             Optional[str]: Image name returned by server, or None if failed
         """
-        if not self.token:
-            logger.error("Not authenticated. Please login first.")
-            return None
-
         file_path_obj = Path(file_path)
         if not file_path_obj.exists():
             logger.error(f"File not found: {file_path}")
             return None
 
+        return self.upload_image_bytes(
+            file_path_obj.read_bytes(), file_path_obj.name, image_type
+        )
+
+    def upload_image_bytes(
+        self, content: bytes, filename: str, image_type: str = "product"
+    ) -> Optional[str]:
+        """
+        Upload an encoded image from memory (no file needed).
+
+        Args:
+            content: Encoded image bytes
+            filename: File name sent with the upload; its extension picks the MIME type
+            image_type: Type of image ('thumbnail' or 'product')
+
+        Returns:
+            Optional[str]: Image name returned by server, or None if failed
+        """
+        if not self.token:
+            logger.error("Not authenticated. Please login first.")
+            return None
+
         url = f"{self.BASE_URL}/api/v3/seller/products/upload-images"
 
         headers = {
@@ -124,24 +156,25 @@ class VenuSellerAPI:
 
         try:
             # Determine MIME type
-            mime_type = self._get_mime_type(file_path_obj.suffix)
+            mime_type = self._get_mime_type(os.path.splitext(filename)[1])
 
-            with open(file_path, "rb") as img_file:
-                files = [("image", (file_path_obj.name, img_file, mime_type))]
-                data = {"type": image_type, "colors_active": "false", "color": ""}
+            files = [("image", (filename, io.BytesIO(content), mime_type))]
+            data = {"type": image_type, "colors_active": "false", "color": ""}
 
+            with span("upload") as s:
                 response = requests.post(url, headers=headers, files=files, data=data)
                 response.raise_for_status()
-                res_data = response.json()
+                s.add(bytes=len(content))
+            res_data = response.json()
 
-                image_name = res_data.get("image_name")
-                if image_name:
-                    logger.info(f"Image uploaded successfully: {image_name}")
-                else:
-                    logger.warning(
-                        f"Upload successful but no image_name in response: {res_data}"
-                    )
-                return image_name
+            image_name = res_data.get("image_name")
+            if image_name:
+                logger.info(f"Image uploaded successfully: {image_name}")
+            else:
+                logger.warning(
+                    f"Upload successful but no image_name in response: {res_data}"
+                )
+            return image_name
         except requests.exceptions.HTTPError as e:
             logger.error(
                 f"Image upload HTTP error (status {e.response.status_code}): {e}"
@@ -154,6 +187,13 @@ class VenuSellerAPI:
             logger.error(f"Unexpected image upload error: {e}", exc_info=True)
             return None
 
+    def _upload_image_source(
+        self, image: Union[str, EncodedImage], image_type: str
+    ) -> Optional[str]:
+        if isinstance(image, EncodedImage):
+            return self.upload_image_bytes(image.data, image.name, image_type)
+        return self.upload_image(image, image_type)
+
     @staticmethod
     def _get_mime_type(file_extension: str) -> str:
         """
@@ -173,6 +213,64 @@ class VenuSellerAPI:
         else:
             return "image/png"
 
+    def get_conditional(
+        self,
+        path: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Optional[ConditionalResponse]:
+        """
+        GET a resource, revalidating with ETag / Last-Modified when given.
+
+        Servers that do not support validators simply return 200 with the
+        full body, so this is safe to use for any endpoint.
+
+        Args:
+            path: API path (e.g. '/api/v3/seller/categories')
+            etag: ETag from a previous response
+            last_modified: Last-Modified from a previous response
+
+        Returns:
+            Optional[ConditionalResponse]: Response data/validators, or None if failed
+        """
+        if not self.token:
+            logger.error("Not authenticated. Please login first.")
+            return None
+
+        headers = {}
+        if etag:
+            headers["if-none-match"] = etag
+        if last_modified:
+            headers["if-modified-since"] = last_modified
+
+        url = f"{self.BASE_URL}{path}"
+        try:
+            response = self.session.get(url, headers=headers)
+            if response.status_code == 304:
+                logger.info(f"{path} not modified")
+                return ConditionalResponse(
+                    data=None,
+                    not_modified=True,
+                    etag=response.headers.get("etag", etag),
+                    last_modified=response.headers.get("last-modified", last_modified),
+                )
+            response.raise_for_status()
+            return ConditionalResponse(
+                data=response.json(),
+                not_modified=False,
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+            )
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"Error fetching {path} (status {e.response.status_code}): {e}")
+            return None
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching {path}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error fetching {path}: {e}", exc_info=True)
+            return None
+
     def get_categories(self) -> Optional[List[Dict[str, Any]]]:
         """
         Get all categories with subcategories.
@@ -233,6 +331,41 @@ class VenuSellerAPI:
             logger.error(f"Unexpected error fetching brands: {e}", exc_info=True)
             return None
 
+    def upload_product_images(
+        self,
+        main_image_path: Union[str, EncodedImage],
+        additional_images_paths: Optional[List[Union[str, EncodedImage]]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Upload the thumbnail and gallery images of a product.
+
+        Images can be file paths or in-memory ``EncodedImage`` objects.
+
+        Args:
+            main_image_path: Main/thumbnail image (path or ``EncodedImage``)
+            additional_images_paths: Additional images (paths or ``EncodedImage``)
+
+        Returns:
+            Optional[Dict]: ``{"thumbnail": name, "images": [{"image_name", "storage"}]}``
+                for :meth:`create_product`, or None if the thumbnail upload failed
+        """
+        # A. Upload thumbnail
+        thumb_name = self._upload_image_source(main_image_path, "thumbnail")
+        if not thumb_name:
+            return None
+
+        # B. Upload gallery images
+        gallery_images = []
+        # Add thumbnail to gallery first (API requirement)
+        gallery_images.append({"image_name": thumb_name, "storage": "public"})
+
+        for img_path in additional_images_paths or []:
+            img_name = self._upload_image_source(img_path, "product")
+            if img_name:
+                gallery_images.append({"image_name": img_name, "storage": "public"})
+
+        return {"thumbnail": thumb_name, "images": gallery_images}
+
     def add_product(
         self,
         name_uz: str,
@@ -264,6 +397,10 @@ class VenuSellerAPI:
         """
         Add product with uploaded images.
 
+        Uploads the images (:meth:`upload_product_images`), then creates the
+        product (:meth:`create_product`). Callers that persist progress can
+        run the two steps separately.
+
         Args:
             name: Product name
             description: Product description
@@ -294,26 +431,82 @@ class VenuSellerAPI:
             logger.error("Not authenticated. Please login first.")
             return {"status": "error", "message": "Not authenticated"}
 
-        if additional_images_paths is None:
-            additional_images_paths = []
-
-        # A. Upload thumbnail
-        thumb_name = self.upload_image(main_image_path, "thumbnail")
-        if not thumb_name:
+        uploaded = self.upload_product_images(main_image_path, additional_images_paths)
+        if not uploaded:
             return {"status": "error", "message": "Failed to upload thumbnail"}
 
-        # B. Upload gallery images
-        gallery_images = []
-        # Add thumbnail to gallery first (API requirement)
-        gallery_images.append({"image_name": thumb_name, "storage": "public"})
+        return self.create_product(
+            name_uz=name_uz,
+            description_uz=description_uz,
+            name_ru=name_ru,
+            description_ru=description_ru,
+            meta_image=meta_image,
+            meta_title=meta_title,
+            meta_description=meta_description,
+            tags=tags,
+            price=price,
+            category_id=category_id,
+            brand_id=brand_id,
+            thumbnail=uploaded["thumbnail"],
+            images=uploaded["images"],
+            stock=stock,
+            sub_category_id=sub_category_id,
+            sub_sub_category_id=sub_sub_category_id,
+            unit=unit,
+            discount=discount,
+            discount_type=discount_type,
+            weight=weight,
+            height=height,
+            width=width,
+            length=length,
+            mxik=mxik,
+            package_code=package_code,
+        )
 
-        for img_path in additional_images_paths:
-            img_name = self.upload_image(img_path, "product")
-            if img_name:
-                gallery_images.append({"image_name": img_name, "storage": "public"})
+    def create_product(
+        self,
+        name_uz: str,
+        description_uz: str,
+        name_ru: str,
+        description_ru: str,
+        meta_image: str,
+        meta_title: str,
+        meta_description: str,
+        tags: List[str],
+        price: float,
+        category_id: str,
+        brand_id: int,
+        thumbnail: str,
+        images: List[Dict[str, Any]],
+        stock: int = 10,
+        sub_category_id: Optional[str] = None,
+        sub_sub_category_id: Optional[str] = None,
+        unit: str = DEFAULT_UNIT,
+        discount: float = DEFAULT_DISCOUNT,
+        discount_type: str = DEFAULT_DISCOUNT_TYPE,
+        weight: float = 1,
+        height: float = 1,
+        width: float = 1,
+        length: float = 1,
+        mxik: int = None,
+        package_code: int = None,
+    ) -> Dict[str, Any]:
+        """
+        Create a product from already uploaded images.
+
+        Args:
+            thumbnail: Thumbnail image name from :meth:`upload_product_images`
+            images: Gallery entries from :meth:`upload_product_images`
 
+        Other arguments are the same as in :meth:`add_product`.
+
+        Returns:
+            Dict: API response
+        """
+        if not self.token:
+            logger.error("Not authenticated. Please login first.")
+            return {"status": "error", "message": "Not authenticated"}
 
-        
         payload = {
             "name": json.dumps([name_ru, name_uz]),
             "description": json.dumps([description_ru, description_uz]),
@@ -329,8 +522,8 @@ class VenuSellerAPI:
             "meta_description": meta_description,
             "lang": json.dumps(["ru", "uz"]),
             "colors": "[]",
-            "images": json.dumps(gallery_images),
-            "thumbnail": thumb_name,
+            "images": json.dumps(images),
+            "thumbnail": thumbnail,
             "colors_active": False,
             "video_url": "",
             "meta_image": meta_image,
@@ -374,7 +567,9 @@ class VenuSellerAPI:
 
         url = f"{self.BASE_URL}/api/v3/seller/products/add"
         try:
-            response = self.session.post(url, json=payload)
+            with span("add_product") as s:
+                response = self.session.post(url, json=payload)
+                s.add(bytes=len(response.request.body or b"") + len(response.content))
             result = response.json()
 
             if response.status_code == 200:
@@ -1,18 +1,29 @@
+import asyncio
 import json
 import os
 import requests
 import logging
-from PIL import Image
-from typing import Optional, TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING, Union
 
 if TYPE_CHECKING:
     from api.venu_api import VenuSellerAPI
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
 
 
 from core.config import settings
-from core.openai_client import get_openai_client
+from core.executor import run_blocking
+from core.http_client import get_async_http_client, get_http_session, host_limit
+from core.image_cache import image_cache
+from core.image_format import (
+    EncodedImage,
+    aformat_images_batch,
+    format_image_bytes,
+    format_images_batch,
+)
+from core.metrics import response_tokens, span
+from core.openai_client import get_async_openai_client, get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -22,19 +33,8 @@ class ProductImage:
         self.product_name = product_name
         self.client = get_openai_client()
 
-    def get_product_images_with_ai(self) -> list[str]:
-        """
-        Uses AI to filter Yandex image search results and return
-        only the most relevant product image URLs.
-
-        Returns:
-            list[str]: List of image URLs
-        """
-
-        images = self.search_yandex_images()
-        if not images:
-            return []
-
+    def _build_filter_request(self, images: list) -> dict:
+        """Build chat completion kwargs for the AI image filter."""
         system_prompt = (
             "You are an AI image selection agent.\n"
             "You receive a product name and a list of images (url, title).\n\n"
@@ -57,41 +57,89 @@ class ProductImage:
             "Return a JSON array of URLs that best match the product."
         )
 
-        try:
-            response = self.client.chat.completions.create(
-                model=settings.openai_model,
-                temperature=settings.openai_temperature,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "image_response",
-                        "schema": {
-                            "type": "object",
-                            "properties": {
-                                "image_urls": {
-                                    "type": "array",
-                                    "items": {"type": "string", "format": "uri"},
-                                }
-                            },
-                            "required": ["image_urls"],
+        return {
+            "model": settings.openai_model,
+            "temperature": settings.openai_temperature,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "image_response",
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "image_urls": {
+                                "type": "array",
+                                "items": {"type": "string", "format": "uri"},
+                            }
                         },
+                        "required": ["image_urls"],
                     },
                 },
-            )
+            },
+        }
+
+    @staticmethod
+    def _parse_filter_response(response) -> list[str]:
+        # SAFE extraction
+        image_urls_str = response.choices[0].message.content
+
+        if not image_urls_str:
+            return []
+
+        data = json.loads(image_urls_str)
+
+        return data.get("image_urls", [])
+
+    def get_product_images_with_ai(self) -> list[str]:
+        """
+        Uses AI to filter Yandex image search results and return
+        only the most relevant product image URLs.
+
+        Returns:
+            list[str]: List of image URLs
+        """
+
+        images = self.search_yandex_images()
+        if not images:
+            return []
+
+        try:
+            with span("llm.image_filter") as s:
+                response = self.client.chat.completions.create(
+                    **self._build_filter_request(images)
+                )
+                s.add(tokens=response_tokens(response))
+            return self._parse_filter_response(response)
+
+        except Exception as e:
+            logger.error(f"Error filtering images with AI: {e}", exc_info=True)
+            return []
 
-            # SAFE extraction
-            image_urls_str = response.choices[0].message.content
+    async def aget_product_images_with_ai(self) -> list[str]:
+        """
+        Async counterpart of :meth:`get_product_images_with_ai`.
 
-            if not image_urls_str:
-                return []
+        The Yandex search runs in the shared executor; the AI filter uses the
+        pooled async OpenAI client.
 
-            data = json.loads(image_urls_str)
+        Returns:
+            list[str]: List of image URLs
+        """
+        images = await run_blocking(self.search_yandex_images)
+        if not images:
+            return []
 
-            return data.get("image_urls", [])
+        try:
+            with span("llm.image_filter") as s:
+                response = await get_async_openai_client().chat.completions.create(
+                    **self._build_filter_request(images)
+                )
+                s.add(tokens=response_tokens(response))
+            return self._parse_filter_response(response)
 
         except Exception as e:
             logger.error(f"Error filtering images with AI: {e}", exc_info=True)
@@ -171,10 +219,12 @@ class ProductImage:
             "bh": "EkEiR29vZ2xlIENocm9tZSI7dj0iMTQzIiwgIkNocm9taXVtIjt2PSIxNDMiLCAiTm90IEEoQnJhbmQiO3Y9IjI0IhoFIng4NiIiECIxNDMuMC43NDk5LjE2OSIqAj8wMgIiIjoHIkxpbnV4IkICIiJKBCI2NCJSXSJHb29nbGUgQ2hyb21lIjt2PSIxNDMuMC43NDk5LjE2OSIsICJDaHJvbWl1bSI7dj0iMTQzLjAuNzQ5OS4xNjkiLCAiTm90IEEoQnJhbmQiO3Y9IjI0LjAuMC4wIloCPzBgtdGYywZqGdzK6YgO8qy3pQv7+vDnDev//fYP+8zNhwg=",
         }
 
-        response = requests.get(
-            url, headers=headers, params=params, cookies=cookies, timeout=10
-        )
-        response.raise_for_status()
+        with span("yandex_search") as s:
+            response = requests.get(
+                url, headers=headers, params=params, cookies=cookies, timeout=10
+            )
+            response.raise_for_status()
+            s.add(bytes=len(response.content))
         data = response.json()
 
         images = self.extract_images(data=data)
@@ -218,98 +268,335 @@ class ProductImage:
         return image_urls
 
 
-def download_image_from_url(
-    image_url: str, save_dir: str = "media/products"
-) -> Optional[str]:
+def _image_file_path(image_url: str, save_dir: str) -> str:
+    """Local path of a downloaded image (named after a hash of its URL)."""
+    # Get file extension from URL or default to .jpg
+    parsed_url = urlparse(image_url)
+    path = parsed_url.path
+    ext = os.path.splitext(path)[1] or ".jpg"
+
+    # Generate unique filename using URL hash
+    url_hash = hashlib.md5(image_url.encode()).hexdigest()[:8]
+    filename = f"yandex_{url_hash}{ext}"
+    return os.path.join(save_dir, filename)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _cached_download(image_url: str) -> Optional[EncodedImage]:
+    """The image previously downloaded from ``image_url``, if the cache has it."""
+    if not settings.image_cache_enabled:
+        return None
+    cached_path = image_cache.lookup_url(image_url)
+    if not cached_path:
+        return None
+    logger.info(f"Image served from cache: {image_url}")
+    return EncodedImage(
+        name=os.path.basename(cached_path),
+        data=_read_file(cached_path),
+        content_hash=image_cache.content_hash_of(cached_path),
+        path=cached_path,
+    )
+
+
+def _store_download(image_url: str, content: bytes) -> EncodedImage:
+    """Wrap downloaded bytes, keeping a copy in the image cache if it is enabled."""
+    if settings.image_cache_enabled:
+        ext = os.path.splitext(urlparse(image_url).path)[1] or ".jpg"
+        content_hash, cached_path = image_cache.put(image_url, content, ext)
+        return EncodedImage(
+            name=os.path.basename(cached_path),
+            data=content,
+            content_hash=content_hash,
+            path=cached_path,
+        )
+    return EncodedImage(name=os.path.basename(_image_file_path(image_url, "")), data=content)
+
+
+def _save_image(image: EncodedImage, save_dir: str) -> str:
+    """Path of an image on disk, writing it to ``save_dir`` if it is only in memory."""
+    if image.path:
+        return image.path
+    # Create directory if it doesn't exist
+    os.makedirs(save_dir, exist_ok=True)
+    file_path = os.path.join(save_dir, image.name)
+    with open(file_path, "wb") as f:
+        f.write(image.data)
+    return file_path
+
+
+def download_image(image_url: str) -> Optional[EncodedImage]:
     """
-    Download an image from URL and save it to local directory.
+    Download an image into memory.
+
+    Uses the shared keep-alive session (``core.http_client``), so parallel
+    downloads reuse connections and respect the per-host limit. With
+    ``settings.image_cache_enabled`` images already downloaded from the URL
+    are served from ``core.image_cache`` and new ones are stored there.
 
     Args:
         image_url: URL of the image to download
-        save_dir: Directory to save the image (default: media/products)
 
     Returns:
-        Optional[str]: Path to saved image file, or None if download failed
+        Optional[EncodedImage]: Downloaded image, or None if download failed
     """
     try:
-        # Create directory if it doesn't exist
-        os.makedirs(save_dir, exist_ok=True)
+        cached = _cached_download(image_url)
+        if cached is not None:
+            return cached
+
+        with span("download") as s:
+            response = get_http_session().get(
+                image_url,
+                timeout=(5, settings.image_download_timeout),
+                stream=True,
+            )
+            with response:
+                response.raise_for_status()
+                chunks = []
+                for chunk in response.iter_content(chunk_size=65536):
+                    chunks.append(chunk)
+                    s.add(bytes=len(chunk))
 
-        # Get file extension from URL or default to .jpg
-        parsed_url = urlparse(image_url)
-        path = parsed_url.path
-        ext = os.path.splitext(path)[1] or ".jpg"
+        logger.info(f"Downloaded image from {image_url}")
+        return _store_download(image_url, b"".join(chunks))
 
-        # Generate unique filename using URL hash
-        url_hash = hashlib.md5(image_url.encode()).hexdigest()[:8]
-        filename = f"yandex_{url_hash}{ext}"
-        file_path = os.path.join(save_dir, filename)
+    except Exception as e:
+        logger.error(f"Error downloading image from {image_url}: {e}", exc_info=True)
+        return None
 
-        # Download the image
-        response = requests.get(image_url, timeout=10, stream=True)
-        response.raise_for_status()
 
-        # Save to file
-        with open(file_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+async def adownload_image(image_url: str) -> Optional[EncodedImage]:
+    """
+    Async counterpart of :func:`download_image`.
 
-        logger.info(f"Downloaded image from {image_url} to {file_path}")
-        return file_path
+    Downloads on the pooled async HTTP client of the running loop, at most
+    ``settings.image_download_per_host_connections`` at a time per host.
+    """
+    try:
+        cached = await run_blocking(_cached_download, image_url)
+        if cached is not None:
+            return cached
+
+        client = get_async_http_client()
+        async with host_limit(image_url):
+            with span("download") as s:
+                async with client.stream("GET", image_url) as response:
+                    response.raise_for_status()
+                    chunks = []
+                    async for chunk in response.aiter_bytes(chunk_size=65536):
+                        chunks.append(chunk)
+                        s.add(bytes=len(chunk))
+
+        logger.info(f"Downloaded image from {image_url}")
+        return await run_blocking(_store_download, image_url, b"".join(chunks))
 
     except Exception as e:
         logger.error(f"Error downloading image from {image_url}: {e}", exc_info=True)
         return None
 
 
-
-def format_image(image_path: str, output_quality: int = 100):
-    """
-    Berilgan rasmni 853x1280 o'lchamli oq ramkaga soladi,
-    ikki chekkadan 7px padding qoldiradi va .webp formatida saqlaydi.
+def download_image_from_url(
+    image_url: str, save_dir: str = "media/products"
+) -> Optional[str]:
     """
-    # 1. Oq fondagi ramka yaratish (853x1280)
-    canvas_width = 853
-    canvas_height = 1280
-    new_img = Image.new("RGB", (canvas_width, canvas_height), (255, 255, 255))
+    Download an image from URL and save it to local directory.
 
-    # 2. Asl rasmni ochish
-    img = Image.open(image_path).convert("RGB")
+    Args:
+        image_url: URL of the image to download
+        save_dir: Directory to save the image (default: media/products);
+            cached images are returned from the image cache instead
 
-    # 3. O'lchamlarni hisoblash
-    # Ikki chekkadan 7px padding qolsa: 853 - (7 * 2) = 839px
-    max_allowed_width = canvas_width - 14
+    Returns:
+        Optional[str]: Path to saved image file, or None if download failed
+    """
+    image = download_image(image_url)
+    return _save_image(image, save_dir) if image is not None else None
 
-    # Rasmni proporsiyasini saqlab, ruxsat etilgan kenglikka moslash
-    w_percent = max_allowed_width / float(img.size[0])
-    h_size = int((float(img.size[1]) * float(w_percent)))
 
-    # Agar rasm juda uzun bo'lib ketsa, bo'yi bo'yicha ham tekshiramiz
-    if h_size > canvas_height:
-        h_size = canvas_height
-        w_percent = h_size / float(img.size[1])
-        max_allowed_width = int((float(img.size[0]) * float(w_percent)))
+async def adownload_image_from_url(
+    image_url: str, save_dir: str = "media/products"
+) -> Optional[str]:
+    """Async counterpart of :func:`download_image_from_url`."""
+    image = await adownload_image(image_url)
+    return await run_blocking(_save_image, image, save_dir) if image is not None else None
 
-    img = img.resize((max_allowed_width, h_size), Image.Resampling.LANCZOS)
 
-    # 4. Markazga joylashtirish koordinatalarini topish
-    offset_x = (canvas_width - img.size[0]) // 2
-    offset_y = (canvas_height - img.size[1]) // 2
+def format_image(image_path: str, output_quality: int = 100):
+    """
+    Berilgan rasmni 853x1280 o'lchamli oq ramkaga soladi,
+    ikki chekkadan 7px padding qoldiradi va .webp formatida saqlaydi.
 
-    # 5. Rasmni oq fonga qo'yish
-    new_img.paste(img, (offset_x, offset_y))
+    Bitta rasm uchun (joriy jarayonda); ko'p rasmlar uchun
+    ``core.image_format.format_images_batch`` protsesslar pulida ishlaydi.
+    """
+    formatted = format_image_bytes(
+        _read_file(image_path),
+        output_quality,
+        settings.image_format_method,
+        settings.image_format_fast_decode,
+    )
 
-    # 6. .webp formatida saqlash
     # Fayl nomini o'zgartirish (masalan: rasm.jpg -> rasm_formatted.webp)
     base_name = os.path.splitext(image_path)[0]
     output_path = f"{base_name}_formatted.webp"
-
-    new_img.save(output_path, "WEBP", quality=output_quality)
+    with open(output_path, "wb") as f:
+        f.write(formatted)
 
     print(f"Rasm tayyor: {output_path}")
     return output_path
 
 
+def _format_variant(quality: int) -> str:
+    """Image cache variant name of a formatted copy."""
+    # Fast decoding gives (slightly) different pixels, so it is part of the key
+    suffix = "_fast" if settings.image_format_fast_decode else ""
+    return f"webp_q{quality}_m{settings.image_format_method}{suffix}"
+
+
+def _cached_formatted(images: list[EncodedImage], quality: int) -> list[Optional[EncodedImage]]:
+    """Already formatted cached copy of each image (None if missing)."""
+    variant = _format_variant(quality)
+    formatted = []
+    for image in images:
+        cached_path = (
+            image_cache.get(image.content_hash, variant) if image.content_hash else None
+        )
+        formatted.append(
+            EncodedImage(
+                name=os.path.basename(cached_path),
+                data=_read_file(cached_path),
+                content_hash=image.content_hash,
+                path=cached_path,
+            )
+            if cached_path
+            else None
+        )
+    return formatted
+
+
+def _formatted_images(
+    images: list[EncodedImage], outputs: list[Optional[bytes]], quality: int
+) -> list[EncodedImage]:
+    """Wrap formatted bytes, keeping a copy in the cache next to cached originals."""
+    variant = _format_variant(quality)
+    formatted = []
+    for image, data in zip(images, outputs):
+        if data is None:
+            # If formatting fails, use original image
+            formatted.append(image)
+            continue
+
+        if image.content_hash:
+            cached_path = image_cache.put_variant(image.content_hash, variant, data, ".webp")
+            formatted.append(
+                EncodedImage(
+                    name=os.path.basename(cached_path),
+                    data=data,
+                    content_hash=image.content_hash,
+                    path=cached_path,
+                )
+            )
+        else:
+            # rasm.jpg -> rasm_formatted.webp
+            name = f"{os.path.splitext(image.name)[0]}_formatted.webp"
+            formatted.append(EncodedImage(name=name, data=data))
+    return formatted
+
+
+def _format_downloaded(images: list[EncodedImage], output_quality: int) -> list[EncodedImage]:
+    """Format downloaded images on the process pool, reusing cached copies."""
+    formatted = _cached_formatted(images, output_quality)
+    todo = [i for i, image in enumerate(formatted) if image is None]
+    if todo:
+        outputs = format_images_batch(
+            [images[i].data for i in todo], output_quality, settings.image_format_method
+        )
+        done = _formatted_images([images[i] for i in todo], outputs, output_quality)
+        for i, image in zip(todo, done):
+            formatted[i] = image
+    return formatted
+
+
+async def _aformat_downloaded(
+    images: list[EncodedImage], output_quality: int
+) -> list[EncodedImage]:
+    """Async :func:`_format_downloaded`; the pool works while the loop stays free."""
+    formatted = await run_blocking(_cached_formatted, images, output_quality)
+    todo = [i for i, image in enumerate(formatted) if image is None]
+    if todo:
+        outputs = await aformat_images_batch(
+            [images[i].data for i in todo], output_quality, settings.image_format_method
+        )
+        done = await run_blocking(
+            _formatted_images, [images[i] for i in todo], outputs, output_quality
+        )
+        for i, image in zip(todo, done):
+            formatted[i] = image
+    return formatted
+
+
+def _unique_images(images: list[Optional[EncodedImage]]) -> list[EncodedImage]:
+    """Drop failed downloads and repeats (different URLs of the same picture)."""
+    unique = {}
+    for image in images:
+        if image is not None:
+            unique.setdefault(image.content_hash or image.name, image)
+    return list(unique.values())
+
+
+def _download_images(
+    image_urls: list[str],
+    save_dir: str,
+    format_images: bool,
+    output_quality: Optional[int] = None,
+    in_memory: bool = False,
+) -> Union[list[str], list[EncodedImage]]:
+    """
+    Download (and optionally format) images in parallel.
+
+    Returns local file paths, or the images themselves if ``in_memory``
+    (then nothing is written to ``save_dir``).
+    """
+    if len(image_urls) <= 1:
+        results = [download_image(url) for url in image_urls]
+    else:
+        # A private pool: this may itself run inside the shared executor
+        with ThreadPoolExecutor(
+            max_workers=len(image_urls), thread_name_prefix="image-download"
+        ) as pool:
+            results = list(pool.map(download_image, image_urls))
+
+    images = _unique_images(results)
+    if format_images and images:
+        quality = output_quality if output_quality is not None else settings.image_format_quality
+        images = _format_downloaded(images, quality)
+    if in_memory:
+        return images
+    return [_save_image(image, save_dir) for image in images]
+
+
+async def _adownload_images(
+    image_urls: list[str],
+    save_dir: str,
+    format_images: bool,
+    output_quality: Optional[int] = None,
+    in_memory: bool = False,
+) -> Union[list[str], list[EncodedImage]]:
+    """Async :func:`_download_images`: all images at once, in input order."""
+    results = await asyncio.gather(*(adownload_image(url) for url in image_urls))
+    images = _unique_images(results)
+    if format_images and images:
+        quality = output_quality if output_quality is not None else settings.image_format_quality
+        images = await _aformat_downloaded(images, quality)
+    if in_memory:
+        return images
+    return await run_blocking(lambda: [_save_image(image, save_dir) for image in images])
+
+
 def get_product_images_from_yandex(
     product_name: str,
     brand_name: Optional[str] = None,
@@ -319,8 +606,9 @@ def get_product_images_from_yandex(
     download_images: bool = True,
     save_dir: str = "media/products",
     format_images: bool = False,
-    output_quality: int = 100,
-) -> list[str]:
+    output_quality: Optional[int] = None,
+    in_memory: bool = False,
+) -> Union[list[str], list[EncodedImage]]:
     """
     Get product images from Yandex using AI filtering.
 
@@ -333,10 +621,13 @@ def get_product_images_from_yandex(
         download_images: If True, download images to local files. If False, return URLs
         save_dir: Directory to save downloaded images (default: media/products)
         format_images: If True, format images to 853x1280 with white background (default: False)
-        output_quality: Quality for formatted images (default: 100)
+        output_quality: WebP quality of formatted images (default: settings.image_format_quality)
+        in_memory: If True, return the downloaded images as ``EncodedImage``
+            objects instead of writing them to ``save_dir``
 
     Returns:
-        List of image URLs (if download_images=False) or local file paths (if download_images=True)
+        List of image URLs (if download_images=False), local file paths (if
+        download_images=True) or ``EncodedImage`` objects (if in_memory=True)
     """
     # Combine product name and brand for better search results
     search_query = product_name
@@ -354,36 +645,60 @@ def get_product_images_from_yandex(
 
     # If download_images is True, download and return local paths
     if download_images:
-        downloaded_paths = []
-        for url in image_urls:
-            local_path = download_image_from_url(url, save_dir)
-            if local_path:
-                # Format image if requested
-                if format_images:
-                    try:
-                        formatted_path = format_image(local_path, output_quality)
-                        downloaded_paths.append(formatted_path)
-                        # Optionally remove original image after formatting
-                        os.remove(local_path)
-                    except Exception as e:
-                        logger.error(f"Error formatting image {local_path}: {e}", exc_info=True)
-                        # If formatting fails, use original image
-                        downloaded_paths.append(local_path)
-                else:
-                    downloaded_paths.append(local_path)
-        return downloaded_paths
+        return _download_images(
+            image_urls, save_dir, format_images, output_quality, in_memory
+        )
 
     # Otherwise, return URLs
     return image_urls
 
 
+async def aget_product_images_from_yandex(
+    product_name: str,
+    brand_name: Optional[str] = None,
+    max_images: int = 2,
+    site: Optional[str] = None,
+    additional_search: bool = False,
+    download_images: bool = True,
+    save_dir: str = "media/products",
+    format_images: bool = False,
+    output_quality: Optional[int] = None,
+    in_memory: bool = False,
+) -> Union[list[str], list[EncodedImage]]:
+    """
+    Async counterpart of :func:`get_product_images_from_yandex`.
+
+    The AI filter runs on the pooled async OpenAI client; images are
+    downloaded concurrently on the pooled async HTTP client and formatted
+    together on the image format process pool.
+    """
+    search_query = product_name
+    if brand_name:
+        search_query = f"{brand_name} {product_name}"
+
+    image_agent = ProductImage(search_query)
+    image_urls = await image_agent.aget_product_images_with_ai()
+
+    image_urls = image_urls[:max_images] if image_urls else []
+
+    if not image_urls:
+        return []
+
+    if download_images:
+        return await _adownload_images(
+            image_urls, save_dir, format_images, output_quality, in_memory
+        )
+
+    return image_urls
+
+
 def upload_formatted_images_to_backend(
     product_name: str,
     brand_name: Optional[str] = None,
     max_images: int = 2,
     venu_api_client: Optional["VenuSellerAPI"] = None,
     save_dir: str = "media/products",
-    output_quality: int = 100,
+    output_quality: Optional[int] = None,
 ) -> list[str]:
     """
     Maxuslot uchun rasmlarni formatlab backendga yuborish.
@@ -399,7 +714,7 @@ def upload_formatted_images_to_backend(
         max_images: Maksimal rasm soni
         venu_api_client: VenuSellerAPI client instance (login qilingan bo'lishi kerak)
         save_dir: Rasmlarni saqlash papkasi
-        output_quality: Formatlangan rasmlar uchun sifat (default: 100)
+        output_quality: Formatlangan rasmlar uchun sifat (default: settings.image_format_quality)
     
     Returns:
         List[str]: Backenddan qaytgan rasm nomlari ro'yxati
@@ -412,8 +727,8 @@ def upload_formatted_images_to_backend(
         logger.error("VenuSellerAPI client login qilinmagan!")
         return []
     
-    # Rasmlarni yuklab olish va formatlash
-    formatted_image_paths = get_product_images_from_yandex(
+    # Rasmlarni yuklab olish va formatlash (IMAGE_WRITE_FILES=false bo'lsa xotirada)
+    formatted_images = get_product_images_from_yandex(
         product_name=product_name,
         brand_name=brand_name,
         max_images=max_images,
@@ -421,33 +736,40 @@ def upload_formatted_images_to_backend(
         save_dir=save_dir,
         format_images=True,
         output_quality=output_quality,
+        in_memory=not settings.image_write_files,
     )
     
-    if not formatted_image_paths:
+    if not formatted_images:
         logger.warning(f"'{product_name}' uchun rasmlar topilmadi")
         return []
     
     # Formatlangan rasmlarni backendga yuklash
     uploaded_image_names = []
     
-    for index, image_path in enumerate(formatted_image_paths):
+    for index, image in enumerate(formatted_images):
+        image_label = image if isinstance(image, str) else image.name
         try:
             # Birinchi rasm thumbnail, qolganlari product
             image_type = "thumbnail" if index == 0 else "product"
             
-            image_name = venu_api_client.upload_image(image_path, image_type)
+            if isinstance(image, EncodedImage):
+                image_name = venu_api_client.upload_image_bytes(
+                    image.data, image.name, image_type
+                )
+            else:
+                image_name = venu_api_client.upload_image(image, image_type)
             
             if image_name:
                 uploaded_image_names.append(image_name)
                 logger.info(f"Rasm muvaffaqiyatli yuklandi: {image_name} ({image_type})")
             else:
-                logger.warning(f"Rasm yuklashda xatolik: {image_path}")
+                logger.warning(f"Rasm yuklashda xatolik: {image_label}")
                 
         except Exception as e:
-            logger.error(f"Rasm yuklashda xatolik ({image_path}): {e}", exc_info=True)
+            logger.error(f"Rasm yuklashda xatolik ({image_label}): {e}", exc_info=True)
     
     logger.info(
-        f"'{product_name}' uchun {len(uploaded_image_names)}/{len(formatted_image_paths)} ta rasm yuklandi"
+        f"'{product_name}' uchun {len(uploaded_image_names)}/{len(formatted_images)} ta rasm yuklandi"
     )
     
     return uploaded_image_names
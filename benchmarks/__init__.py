@@ -0,0 +1 @@
+"""Performance benchmarks (run as modules from the project root)."""
@@ -0,0 +1,116 @@
+"""
+Memory and time of product image formatting, fast decoding vs. full decoding.
+
+Usage (from the project root)::
+
+    python -m benchmarks.format_decode --count 8 --width 4000 --height 5000
+    python -m benchmarks.format_decode --source-format PNG --width 3000 --height 4000
+
+Each mode runs in a fresh process, so the peak RSS of one does not hide
+the other (Linux only: the peak is read from ``/proc/self/status``). The
+peak RSS growth covers Pillow's pixel buffers, which are allocated outside
+the Python allocator; the tracemalloc peak only covers Python objects
+(source and output bytes). Formats other than JPEG are always decoded in
+full, so for them only the downscale itself gets faster.
+"""
+
+import argparse
+import io
+import multiprocessing
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+from PIL import Image, ImageChops, ImageStat
+
+from benchmarks.format_images import make_images
+from core.config import settings
+from core.image_format import format_image_bytes
+
+
+def _rss_kib(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _measure(
+    images: List[bytes], quality: int, method: int, fast_decode: bool
+) -> Tuple[float, int, int, bytes]:
+    # Reset the peak RSS (Linux), so receiving the images does not count
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    rss_before = _rss_kib("VmRSS")
+    tracemalloc.start()
+    started = time.perf_counter()
+    outputs = [format_image_bytes(data, quality, method, fast_decode) for data in images]
+    elapsed = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_growth = _rss_kib("VmHWM") - rss_before
+    return elapsed, rss_growth * 1024, traced_peak, outputs[0]
+
+
+def _convert(images: List[bytes], source_format: str) -> List[bytes]:
+    if source_format == "JPEG":
+        return images
+    converted = []
+    for data in images:
+        out = io.BytesIO()
+        Image.open(io.BytesIO(data)).save(out, source_format)
+        converted.append(out.getvalue())
+    return converted
+
+
+def _difference(a: bytes, b: bytes) -> Tuple[float, int]:
+    """Mean and max per-channel difference between two formatted images."""
+    diff = ImageChops.difference(
+        Image.open(io.BytesIO(a)).convert("RGB"), Image.open(io.BytesIO(b)).convert("RGB")
+    )
+    stat = ImageStat.Stat(diff)
+    return sum(stat.mean) / len(stat.mean), max(high for _, high in stat.extrema)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=8, help="Images per run (default: 8)")
+    parser.add_argument("--width", type=int, default=4000, help="Source width (default: 4000)")
+    parser.add_argument("--height", type=int, default=5000, help="Source height (default: 5000)")
+    parser.add_argument(
+        "--source-format",
+        default="JPEG",
+        choices=("JPEG", "PNG", "WEBP"),
+        help="Encoding of the source images (default: JPEG)",
+    )
+    parser.add_argument("--quality", type=int, default=settings.image_format_quality)
+    parser.add_argument("--method", type=int, default=settings.image_format_method)
+    args = parser.parse_args()
+
+    images = _convert(make_images(args.count, args.width, args.height), args.source_format)
+    print(
+        f"{args.count} {args.source_format} images {args.width}x{args.height}, "
+        f"quality={args.quality} method={args.method}"
+    )
+    print(f"{'mode':<8} {'time':>9} {'img/s':>8} {'peak RSS +':>12} {'tracemalloc':>12}")
+
+    ctx = multiprocessing.get_context("spawn")
+    first = {}
+    for label, fast_decode in (("full", False), ("fast", True)):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            elapsed, rss, traced, first[label] = pool.submit(
+                _measure, images, args.quality, args.method, fast_decode
+            ).result()
+        print(
+            f"{label:<8} {elapsed:8.2f}s {args.count / elapsed:8.1f} "
+            f"{rss / 1024**2:10.1f}MB {traced / 1024**2:10.1f}MB"
+        )
+
+    mean, high = _difference(first["full"], first["fast"])
+    print(f"pixel difference fast vs. full: mean {mean:.2f}, max {high} (of 255)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Throughput of product image formatting, in-process vs. the process pool.
+
+Usage (from the project root)::
+
+    python -m benchmarks.format_images --count 48 --width 2400 --height 3200
+    python -m benchmarks.format_images --processes 1,2,4 --quality 90 --method 2
+"""
+
+import argparse
+import io
+import os
+import time
+from typing import List
+
+from PIL import Image
+
+from core.config import settings
+from core.image_format import format_image_bytes, format_images_batch, shutdown_format_pool
+
+
+def make_images(count: int, width: int, height: int) -> List[bytes]:
+    """JPEG test images with noise, so encoders do real work."""
+    images = []
+    for i in range(count):
+        img = Image.effect_noise((width, height), 40 + i % 30).convert("RGB")
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=90)
+        images.append(out.getvalue())
+    return images
+
+
+def report(label: str, count: int, seconds: float) -> None:
+    print(f"{label:<24} {seconds:8.2f}s {count / seconds:8.1f} img/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=32, help="Images per run (default: 32)")
+    parser.add_argument("--width", type=int, default=1600, help="Source width (default: 1600)")
+    parser.add_argument("--height", type=int, default=2000, help="Source height (default: 2000)")
+    parser.add_argument("--quality", type=int, default=settings.image_format_quality)
+    parser.add_argument("--method", type=int, default=settings.image_format_method)
+    parser.add_argument(
+        "--processes",
+        default="",
+        help="Comma-separated pool sizes (default: 1,2,4,... up to the CPU count)",
+    )
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.processes:
+        sizes = [int(n) for n in args.processes.split(",")]
+    else:
+        sizes = sorted({min(2**i, cpus) for i in range(cpus.bit_length() + 1)})
+
+    images = make_images(args.count, args.width, args.height)
+    print(
+        f"{args.count} images {args.width}x{args.height}, "
+        f"quality={args.quality} method={args.method}, {cpus} CPUs"
+    )
+
+    started = time.perf_counter()
+    for data in images:
+        format_image_bytes(data, args.quality, args.method)
+    report("in-process (serial)", args.count, time.perf_counter() - started)
+
+    for processes in sizes:
+        settings.image_format_processes = processes
+        shutdown_format_pool()
+        # Start the workers before timing
+        format_images_batch(images[:processes], args.quality, args.method)
+
+        started = time.perf_counter()
+        outputs = format_images_batch(images, args.quality, args.method)
+        elapsed = time.perf_counter() - started
+        failed = sum(output is None for output in outputs)
+        report(f"pool, {processes} processes", args.count, elapsed)
+        if failed:
+            print(f"  {failed} images failed")
+    shutdown_format_pool()
+
+
+if __name__ == "__main__":
+    main()
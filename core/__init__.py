@@ -1,6 +1,6 @@
 """Core utilities and configuration."""
 from core.config import settings
-from core.openai_client import get_openai_client
+from core.openai_client import get_async_openai_client, get_openai_client
 
-__all__ = ["settings", "get_openai_client"]
+__all__ = ["settings", "get_openai_client", "get_async_openai_client"]
 
@@ -23,17 +23,117 @@ class Settings(BaseSettings):
     openai_temperature: float = 0.3
     openai_max_retries: int = 2
 
+    # Async OpenAI connection pool
+    openai_max_connections: int = 20
+    openai_max_keepalive_connections: int = 10
+    openai_keepalive_expiry: float = 30.0
+    openai_http2: bool = True
+    openai_timeout: float = 120.0
+
     # Models
     gpt3_5_turbo: str = "gpt-3.5-turbo"
     gpt4: str = "gpt-4"
     gpt4o_mini: str = "gpt-4o-mini"
 
+    # Persistent cache for generated product text (SQLite)
+    cache_db_path: str = "media/cache.db"
+    generation_cache_enabled: bool = True
+    generation_cache_ttl_seconds: int = 30 * 24 * 3600
+    generation_cache_max_entries: int = 50000
+
+    # Category selection: "single" picks the full path in one call from a
+    # local shortlist of leaf paths and falls back to "steps" (category ->
+    # sub_category -> sub_sub_category, one call each) on low confidence
+    category_selection_mode: str = "single"
+    category_single_call_min_confidence: float = 0.6
+    category_shortlist_size: int = 30
+
+    # Embedding index over category paths (persisted per catalog version).
+    # Adds semantic candidates to the shortlist and limits each step of the
+    # step-by-step flow to the top-K most similar options.
+    category_embeddings_enabled: bool = True
+    category_embedding_model: str = "text-embedding-3-small"
+    category_embedding_dir: str = "media/embeddings"
+    category_step_top_k: int = 20
+
+    # Memo of category decisions for near-identical titles (stored in
+    # cache_db_path). A title reuses a memoized path of the same brand and
+    # catalog version when its token-set similarity reaches the minimum.
+    category_memo_enabled: bool = True
+    category_memo_min_similarity: float = 0.8
+    category_memo_ttl_seconds: int = 30 * 24 * 3600
+    category_memo_max_entries: int = 100000
+
+    # Minimum fuzzy score (0-1) for a brand name to match a catalog brand
+    brand_match_threshold: float = 0.6
+
+    # MXIK codes database (seeded once from api/mxik-codes.xlsx)
+    mxik_db_path: str = "media/mxik-codes.db"
+
+    # Bulk upload jobs with per-row stage outputs (used to resume jobs)
+    jobs_db_path: str = "media/jobs.db"
+
     # Venu API Configuration
     venu_base_url: str = "https://api.venu.uz"
     venu_temp_token: Optional[str] = None
     venu_email: Optional[str] = None
     venu_password: Optional[str] = None
 
+    # Category/brand catalog cache (per seller account)
+    # Entries younger than the TTL are served as-is; older entries are
+    # served while a background refresh runs, up to the max-stale age.
+    catalog_cache_ttl_seconds: int = 600
+    catalog_cache_max_stale_seconds: int = 3600
+
+    # Bulk upload pipeline
+    # Number of Excel rows processed concurrently
+    bulk_max_workers: int = 4
+    # Per-stage concurrency limits (shared by all rows of a job)
+    bulk_openai_concurrency: int = 4
+    bulk_image_concurrency: int = 4
+    bulk_venu_concurrency: int = 2
+    # Product texts generated per OpenAI request (1 = one request per product).
+    # Rows wait at most product_text_batch_max_wait seconds for a batch to fill.
+    product_text_batch_size: int = 1
+    product_text_batch_max_wait: float = 0.5
+
+    # Where bulk uploads run: "inline" (background task of the web process)
+    # or "sqlite" (queued in jobs_db_path and run by `python worker.py`
+    # processes, so bulk throughput never competes with web requests)
+    bulk_queue_backend: str = "inline"
+    worker_poll_interval: float = 1.0
+    worker_heartbeat_seconds: float = 30.0
+    # A claimed task without a heartbeat for this long is given to another worker
+    worker_stale_seconds: float = 300.0
+
+    # Image downloads: shared keep-alive HTTP pool, at most
+    # image_download_per_host_connections concurrent requests per host
+    image_download_max_connections: int = 20
+    image_download_per_host_connections: int = 4
+    image_download_keepalive_expiry: float = 30.0
+    image_download_timeout: float = 10.0
+
+    # Disk cache of downloaded images and their formatted WebP copies
+    # (index in cache_db_path), trimmed to image_cache_max_bytes by LRU
+    image_cache_enabled: bool = True
+    image_cache_dir: str = "media/image_cache"
+    image_cache_max_bytes: int = 2 * 1024**3
+    # Write downloaded/formatted images to media/products; when False they
+    # stay in memory from download to upload (cached copies are still kept)
+    image_write_files: bool = True
+
+    # Image formatting (853x1280 WebP) on a process pool; 0 processes = one
+    # per CPU core. WebP method: 0 (fast) - 6 (slow, smaller files)
+    image_format_processes: int = 0
+    image_format_quality: int = 100
+    image_format_method: int = 4
+    # Decode large images near the target size (JPEG draft mode, Image.reduce)
+    # instead of at full resolution
+    image_format_fast_decode: bool = True
+
+    # Threads used to run blocking (requests/OpenAI/pandas) calls off the event loop
+    blocking_executor_workers: int = 16
+
     # Marketplace URLs for image search
     # Can be set via MARKETPLACE_URLS environment variable (comma-separated)
     # Example: MARKETPLACE_URLS=https://venu.uz,https://uzum.uz,https://www.amazon.com
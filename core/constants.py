@@ -11,6 +11,44 @@ DEFAULT_DISCOUNT_TYPE = "flat"
 DEFAULT_SUB_CATEGORY_ID = "600"
 DEFAULT_SUB_SUB_CATEGORY_ID = "601"
 
+# MXIK codes sheet: category_id | name | mxik | package_code (no header)
+MXIK_EXCEL_PATH = "api/mxik-codes.xlsx"
+
+# Brand aliases: spelling seen in sheets -> brand name as listed on Venu.
+# Matching is case/spacing-insensitive and Cyrillic is transliterated, so
+# only genuinely different spellings need an entry here.
+BRAND_ALIASES = {
+    "lg electronics": "LG",
+    "samsung electronics": "Samsung",
+    "xiaomi mi": "Xiaomi",
+    "redmi": "Xiaomi",
+}
+
+# Words that only distinguish variants of the same product (colors, sizes,
+# filler words). Ignored when matching titles in the category decision memo.
+TITLE_VARIANT_WORDS = frozenset(
+    {
+        # ru colors
+        "белый", "белая", "белое", "черный", "черная", "черное", "чёрный",
+        "чёрная", "серый", "серая", "серебристый", "серебристая", "красный",
+        "красная", "синий", "синяя", "голубой", "зеленый", "зелёный",
+        "желтый", "розовый", "фиолетовый", "золотой", "золотистый",
+        "бежевый", "коричневый", "бордовый", "графит", "цвет",
+        # uz colors
+        "oq", "qora", "kulrang", "qizil", "ko'k", "kok", "yashil", "sariq",
+        "pushti", "jigarrang", "kumush", "oltin", "rang",
+        # en colors
+        "white", "black", "gray", "grey", "silver", "red", "blue", "green",
+        "yellow", "pink", "purple", "gold", "beige", "brown", "graphite",
+        "color", "colour",
+        # sizes
+        "xxs", "xs", "s", "m", "l", "xl", "xxl", "xxxl", "размер", "o'lcham",
+        # filler words
+        "с", "и", "в", "на", "для", "без", "va", "uchun", "bilan", "with",
+        "for", "and",
+    }
+)
+
 # API constants
 CORS_ALLOW_ORIGINS = ["*"]  # Configure appropriately for production
 
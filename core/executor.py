@@ -0,0 +1,57 @@
+"""Managed thread pool for running blocking code from async handlers."""
+
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get or create the shared blocking-call executor."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.blocking_executor_workers),
+            thread_name_prefix="blocking",
+        )
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking callable in the shared executor without blocking the event loop.
+
+    Context variables are copied into the worker thread (same as
+    ``asyncio.to_thread``) so logging/metrics context follows the call.
+
+    Args:
+        func: Blocking callable (requests, OpenAI sync client, pandas, PIL, ...)
+        *args: Positional arguments for ``func``
+        **kwargs: Keyword arguments for ``func``
+
+    Returns:
+        Whatever ``func`` returns
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(), call)
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Shut down the shared executor (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        logger.info("Shutting down blocking executor")
+        _executor.shutdown(wait=wait, cancel_futures=not wait)
+        _executor = None
@@ -0,0 +1,112 @@
+"""Pooled HTTP clients for image downloads (sync session and per-loop async client)."""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Same reasoning as core.openai_client: httpx pools (and asyncio semaphores)
+# belong to the event loop that created them.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_host_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the shared ``requests`` session for blocking downloads.
+
+    The adapter keeps up to ``settings.image_download_per_host_connections``
+    connections alive per host and blocks further requests to that host
+    until one is free, so parallel downloads reuse sockets instead of
+    opening a new connection per image.
+
+    Returns:
+        requests.Session: Process-wide session (safe for concurrent GETs)
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                adapter = HTTPAdapter(
+                    pool_connections=settings.image_download_max_connections,
+                    pool_maxsize=settings.image_download_per_host_connections,
+                    pool_block=True,
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Get or create the pooled async HTTP client for the running event loop.
+
+    Connections are kept alive for ``settings.image_download_keepalive_expiry``
+    seconds and bounded by ``settings.image_download_max_connections``;
+    use :func:`host_limit` to cap concurrent requests per host.
+
+    Returns:
+        httpx.AsyncClient: Client bound to the current event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=settings.image_download_max_connections,
+                max_keepalive_connections=settings.image_download_max_connections,
+                keepalive_expiry=settings.image_download_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(settings.image_download_timeout, connect=5.0),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def host_limit(url: str) -> asyncio.Semaphore:
+    """
+    Semaphore limiting concurrent requests to the host of ``url``.
+
+    Args:
+        url: Request URL
+
+    Returns:
+        asyncio.Semaphore: Shared by all requests to the same host on this loop
+    """
+    limits = _host_limits.setdefault(asyncio.get_running_loop(), {})
+    host = urlparse(url).netloc.lower()
+    limit = limits.get(host)
+    if limit is None:
+        limit = limits[host] = asyncio.Semaphore(
+            max(1, settings.image_download_per_host_connections)
+        )
+    return limit
+
+
+async def close_async_http_client() -> None:
+    """Close the async client of the running event loop (application shutdown)."""
+    loop = asyncio.get_running_loop()
+    _host_limits.pop(loop, None)
+    client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,342 @@
+"""Disk cache of downloaded product images, keyed by URL and content hash."""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Variant name of the image as downloaded
+ORIGINAL = "original"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS image_cache_urls (
+    url_hash TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_image_cache_urls_content
+    ON image_cache_urls(content_hash);
+CREATE TABLE IF NOT EXISTS image_cache_files (
+    content_hash TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (content_hash, variant)
+);
+CREATE INDEX IF NOT EXISTS idx_image_cache_files_accessed
+    ON image_cache_files(accessed_at);
+"""
+
+# Check the size limit once per this many writes instead of on every write
+_EVICT_EVERY = 20
+
+# Files read this recently are kept even above the size limit: a running
+# job may still be about to upload them
+_EVICT_MIN_IDLE_SECONDS = 600
+
+
+def _url_hash(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+class ImageCache:
+    """
+    Downloaded images and their formatted variants, shared by all processes.
+
+    A URL maps to the SHA-256 of the downloaded bytes, so the same picture
+    served from different URLs is stored once. Every content hash can have
+    several variants (the original plus e.g. ``webp_q100_m4`` formatted
+    copies), each one a file in ``cache_dir``. When the files grow past
+    ``max_bytes`` the least recently used ones are deleted.
+
+    Paths returned by the cache belong to it: callers must not delete them
+    (see :meth:`owns`).
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        db_path: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.cache_dir = cache_dir or settings.image_cache_dir
+        self.db_path = db_path or settings.cache_db_path
+        self.max_bytes = max_bytes if max_bytes is not None else settings.image_cache_max_bytes
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self._writes_since_evict = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter: str) -> None:
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def owns(self, path: str) -> bool:
+        """True if ``path`` is a file of this cache (must not be deleted by callers)."""
+        cache_dir = os.path.realpath(self.cache_dir)
+        return os.path.realpath(path).startswith(cache_dir + os.sep)
+
+    def content_hash_of(self, path: str) -> Optional[str]:
+        """Content hash of a cached file path, or None if the cache does not own it."""
+        if not self.owns(path):
+            return None
+        return os.path.basename(path).split(".", 1)[0].split("_", 1)[0]
+
+    # ---------------------------
+    # Reads
+    # ---------------------------
+
+    def lookup_url(self, url: str) -> Optional[str]:
+        """
+        Path of the original image previously downloaded from ``url``.
+
+        Args:
+            url: Image URL
+
+        Returns:
+            Optional[str]: Cached file path, or None on a miss
+        """
+        row = self._connection().execute(
+            "SELECT content_hash FROM image_cache_urls WHERE url_hash = ?",
+            (_url_hash(url),),
+        ).fetchone()
+        path = self.get(row[0], ORIGINAL) if row is not None else None
+        self._count("hits" if path else "misses")
+        return path
+
+    def get(self, content_hash: str, variant: str = ORIGINAL) -> Optional[str]:
+        """
+        Path of a cached variant, or None if it is missing.
+
+        Args:
+            content_hash: SHA-256 of the original image bytes
+            variant: Variant name (``ORIGINAL`` or a format key)
+
+        Returns:
+            Optional[str]: Cached file path
+        """
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT filename FROM image_cache_files WHERE content_hash = ? AND variant = ?",
+            (content_hash, variant),
+        ).fetchone()
+        if row is None:
+            return None
+
+        path = os.path.join(self.cache_dir, row[0])
+        if not os.path.exists(path):
+            # Deleted behind our back: forget it
+            conn.execute(
+                "DELETE FROM image_cache_files WHERE content_hash = ? AND variant = ?",
+                (content_hash, variant),
+            )
+            return None
+
+        conn.execute(
+            "UPDATE image_cache_files SET accessed_at = ? WHERE content_hash = ? AND variant = ?",
+            (time.time(), content_hash, variant),
+        )
+        return path
+
+    def hold(self, path: str) -> bool:
+        """
+        Keep a file that is about to be read safe from eviction.
+
+        Marks a cached file as just used, so :meth:`evict` leaves it alone
+        for the next ``_EVICT_MIN_IDLE_SECONDS`` (a row may have waited
+        longer than that since the file was downloaded). Paths the cache
+        does not own only have to exist.
+
+        Args:
+            path: Image file path
+
+        Returns:
+            bool: False if the file is gone (evicted or deleted)
+        """
+        if not self.owns(path):
+            return os.path.exists(path)
+        cursor = self._connection().execute(
+            "UPDATE image_cache_files SET accessed_at = ? "
+            "WHERE content_hash = ? AND filename = ?",
+            (time.time(), self.content_hash_of(path), os.path.basename(path)),
+        )
+        return cursor.rowcount > 0 and os.path.exists(path)
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+
+    def put(self, url: str, content: bytes, ext: str = ".jpg") -> Tuple[str, str]:
+        """
+        Store a downloaded image and remember which URL it came from.
+
+        Args:
+            url: Image URL
+            content: Downloaded bytes
+            ext: File extension (with dot) of the original
+
+        Returns:
+            Tuple[str, str]: (content hash, cached file path)
+        """
+        content_hash = hashlib.sha256(content).hexdigest()
+        path = self.get(content_hash, ORIGINAL)
+        if path is None:
+            filename = f"{content_hash}{ext}"
+            path = os.path.join(self.cache_dir, filename)
+            self._write_atomic(path, content)
+            self._index_file(content_hash, ORIGINAL, filename, len(content))
+
+        self._connection().execute(
+            "INSERT OR REPLACE INTO image_cache_urls(url_hash, url, content_hash, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (_url_hash(url), url, content_hash, time.time()),
+        )
+        return content_hash, path
+
+    def put_variant(self, content_hash: str, variant: str, content: bytes, ext: str) -> str:
+        """
+        Store a derived copy of a cached image (e.g. the formatted WebP).
+
+        Args:
+            content_hash: Content hash of the original image
+            variant: Variant name, unique per output format and settings
+            content: Encoded bytes of the copy
+            ext: File extension (with dot)
+
+        Returns:
+            str: Cached file path
+        """
+        filename = f"{content_hash}_{variant}{ext}"
+        path = os.path.join(self.cache_dir, filename)
+        self._write_atomic(path, content)
+        self._index_file(content_hash, variant, filename, len(content))
+        return path
+
+    def _write_atomic(self, path: str, content: bytes) -> None:
+        # Readers in other processes never see a partly written file
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _index_file(self, content_hash: str, variant: str, filename: str, size: int) -> None:
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO image_cache_files"
+            "(content_hash, variant, filename, size, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (content_hash, variant, filename, size, now, now),
+        )
+        self._count("writes")
+
+        with self._counter_lock:
+            self._writes_since_evict += 1
+            due = self._writes_since_evict >= _EVICT_EVERY
+            if due:
+                self._writes_since_evict = 0
+        if due:
+            self.evict()
+
+    # ---------------------------
+    # Maintenance
+    # ---------------------------
+
+    def evict(self) -> int:
+        """
+        Delete least recently used files until the cache fits ``max_bytes``.
+
+        Files used in the last few minutes are kept, so the limit is
+        approximate while many jobs run.
+
+        Returns:
+            int: Number of files removed
+        """
+        conn = self._connection()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM image_cache_files").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        idle_before = time.time() - _EVICT_MIN_IDLE_SECONDS
+        rows = conn.execute(
+            "SELECT content_hash, variant, filename, size FROM image_cache_files "
+            "WHERE accessed_at < ? ORDER BY accessed_at",
+            (idle_before,),
+        ).fetchall()
+        for content_hash, variant, filename, size in rows:
+            if total <= self.max_bytes:
+                break
+            # Skip files held (see :meth:`hold`) since the rows were read
+            cursor = conn.execute(
+                "DELETE FROM image_cache_files "
+                "WHERE content_hash = ? AND variant = ? AND accessed_at < ?",
+                (content_hash, variant, idle_before),
+            )
+            if not cursor.rowcount:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, filename))
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        # URLs whose original is gone would only produce misses
+        conn.execute(
+            "DELETE FROM image_cache_urls WHERE content_hash NOT IN ("
+            "SELECT content_hash FROM image_cache_files WHERE variant = ?)",
+            (ORIGINAL,),
+        )
+        if removed:
+            logger.info(f"Evicted {removed} cached images ({total} bytes left)")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Per-process hit/miss/write counters plus the current file count and size."""
+        files, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM image_cache_files"
+        ).fetchone()
+        with self._counter_lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "files": files,
+                "bytes": size,
+            }
+
+
+# Global image cache instance
+image_cache = ImageCache()
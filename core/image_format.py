@@ -0,0 +1,247 @@
+"""Product image formatting (853x1280 white canvas, WebP) on a process pool."""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+from core.config import settings
+from core.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Canvas of a formatted product image; the picture keeps PADDING px on the sides
+CANVAS_WIDTH = 853
+CANVAS_HEIGHT = 1280
+PADDING = 7
+
+# Fast path: downscale by an integer factor (JPEG DCT scaling on load, then
+# Image.reduce) to no less than this many times the target size, and only
+# the rest with LANCZOS. Same default as Image.thumbnail.
+REDUCING_GAP = 2.0
+
+# A batch item: path of an image file or the encoded image itself
+ImageSource = Union[str, bytes]
+
+
+@dataclass
+class EncodedImage:
+    """
+    An encoded image kept in memory between download, formatting and upload.
+
+    Attributes:
+        name: File name to upload it under (e.g. ``yandex_1a2b3c4d.jpg``)
+        data: Encoded bytes
+        content_hash: SHA-256 of the downloaded original, if it is in the image cache
+        path: File holding the same bytes, if one exists (never required)
+    """
+
+    name: str
+    data: bytes
+    content_hash: Optional[str] = None
+    path: Optional[str] = None
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def fit_size(width: int, height: int) -> Tuple[int, int]:
+    """
+    Size of a ``width`` x ``height`` picture scaled onto the canvas.
+
+    The picture fills the canvas width minus the padding; pictures that
+    would become taller than the canvas are scaled to its height instead.
+    """
+    max_allowed_width = CANVAS_WIDTH - PADDING * 2
+    w_percent = max_allowed_width / float(width)
+    h_size = int(float(height) * w_percent)
+
+    if h_size > CANVAS_HEIGHT:
+        h_size = CANVAS_HEIGHT
+        w_percent = h_size / float(height)
+        max_allowed_width = int(float(width) * w_percent)
+
+    return max_allowed_width, h_size
+
+
+def format_image_bytes(
+    data: bytes, quality: int = 100, method: int = 4, fast_decode: bool = True
+) -> bytes:
+    """
+    Format an encoded image: scale it onto a white 853x1280 canvas and encode WebP.
+
+    Pure bytes-to-bytes function, safe to run in worker processes.
+
+    With ``fast_decode`` large pictures are not decoded at full resolution:
+    JPEGs are decoded in draft mode (DCT scaling to 1/2 - 1/8 of the size)
+    and other formats are first shrunk with ``Image.reduce``; either way the
+    picture stays at least ``REDUCING_GAP`` times the target size for the
+    final LANCZOS step, so a 4000 px JPEG is decoded at 2000 px.
+
+    Args:
+        data: Encoded source image (JPEG, PNG, WebP, ...)
+        quality: WebP quality (0-100)
+        method: WebP encoder effort (0 fast - 6 slow/smaller)
+        fast_decode: Decode and downscale near the target size first
+
+    Returns:
+        bytes: Encoded WebP image
+    """
+    img = Image.open(io.BytesIO(data))
+    # Target from the original size: draft() may round the decoded size
+    size = fit_size(*img.size)
+    if fast_decode:
+        # No-op for formats other than JPEG
+        img.draft("RGB", (int(size[0] * REDUCING_GAP), int(size[1] * REDUCING_GAP)))
+    img = img.convert("RGB")
+    img = img.resize(
+        size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP if fast_decode else None
+    )
+
+    canvas = Image.new("RGB", (CANVAS_WIDTH, CANVAS_HEIGHT), (255, 255, 255))
+    canvas.paste(img, ((CANVAS_WIDTH - size[0]) // 2, (CANVAS_HEIGHT - size[1]) // 2))
+
+    out = io.BytesIO()
+    canvas.save(out, "WEBP", quality=quality, method=method)
+    return out.getvalue()
+
+
+def _format_source(source: ImageSource, quality: int, method: int, fast_decode: bool) -> bytes:
+    # Paths are read in the worker, so only the result crosses the process boundary
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            source = f.read()
+    return format_image_bytes(source, quality, method, fast_decode)
+
+
+def get_format_pool() -> ProcessPoolExecutor:
+    """
+    Get or create the shared formatting process pool.
+
+    Uses ``settings.image_format_processes`` workers (0 = one per CPU core).
+    Workers are spawned, not forked, so they never inherit the parent's
+    threads or open connections.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = settings.image_format_processes or os.cpu_count() or 1
+                _pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def shutdown_format_pool(wait: bool = True) -> None:
+    """Shut down the formatting pool (called on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        logger.info("Shutting down image format pool")
+        pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def _options(quality: Optional[int], method: Optional[int]) -> Tuple[int, int]:
+    return (
+        quality if quality is not None else settings.image_format_quality,
+        method if method is not None else settings.image_format_method,
+    )
+
+
+def _submit(
+    sources: Sequence[ImageSource], quality: int, method: int
+) -> List[Future]:
+    # Read here, not in the workers, so the whole batch uses the same path
+    fast_decode = settings.image_format_fast_decode
+    pool = get_format_pool()
+    try:
+        return [
+            pool.submit(_format_source, source, quality, method, fast_decode)
+            for source in sources
+        ]
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool once
+        logger.warning("Image format pool is broken, restarting it")
+        shutdown_format_pool(wait=False)
+        pool = get_format_pool()
+        return [
+            pool.submit(_format_source, source, quality, method, fast_decode)
+            for source in sources
+        ]
+
+
+def _collect(results: List[object], sources: Sequence[ImageSource]) -> List[Optional[bytes]]:
+    outputs: List[Optional[bytes]] = []
+    for source, result in zip(sources, results):
+        if isinstance(result, BaseException):
+            name = source if isinstance(source, str) else f"<{len(source)} bytes>"
+            logger.error(f"Error formatting image {name}: {result}")
+            if isinstance(result, BrokenProcessPool):
+                shutdown_format_pool(wait=False)
+            outputs.append(None)
+        else:
+            outputs.append(result)
+    return outputs
+
+
+def format_images_batch(
+    sources: Sequence[ImageSource],
+    quality: Optional[int] = None,
+    method: Optional[int] = None,
+) -> List[Optional[bytes]]:
+    """
+    Format several images in parallel on the process pool.
+
+    Args:
+        sources: Image file paths and/or encoded images
+        quality: WebP quality (default: ``settings.image_format_quality``)
+        method: WebP method (default: ``settings.image_format_method``)
+
+    Returns:
+        List[Optional[bytes]]: WebP bytes per source, in order (None if it failed)
+    """
+    if not sources:
+        return []
+    quality, method = _options(quality, method)
+    with span("format") as s:
+        results: List[object] = []
+        for future in _submit(sources, quality, method):
+            try:
+                results.append(future.result())
+            except BaseException as e:
+                results.append(e)
+        outputs = _collect(results, sources)
+        s.add(bytes=sum(len(output) for output in outputs if output))
+    return outputs
+
+
+async def aformat_images_batch(
+    sources: Sequence[ImageSource],
+    quality: Optional[int] = None,
+    method: Optional[int] = None,
+) -> List[Optional[bytes]]:
+    """Async :func:`format_images_batch`; the event loop stays free while workers run."""
+    if not sources:
+        return []
+    quality, method = _options(quality, method)
+    with span("format") as s:
+        futures = _submit(sources, quality, method)
+        results = await asyncio.gather(
+            *(asyncio.wrap_future(future) for future in futures),
+            return_exceptions=True,
+        )
+        outputs = _collect(list(results), sources)
+        s.add(bytes=sum(len(output) for output in outputs if output))
+    return outputs
@@ -0,0 +1,78 @@
+"""
+Sync and async drivers for I/O-free OpenAI request loops.
+
+Retry, validation and selection logic is written once as a generator that
+yields what it needs sent (a :class:`ChatRequest`, or a list of them) and
+receives the response, or the exception the call raised. :func:`run_steps`
+and :func:`arun_steps` only perform those calls, so the sync and async
+entry points of an agent differ in nothing but the I/O.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Generator, TypeVar
+
+from openai import AsyncOpenAI, OpenAI
+
+from core.metrics import response_tokens, span
+
+T = TypeVar("T")
+
+# Steps generator: yields requests, receives responses, returns the result
+Steps = Generator[Any, Any, T]
+
+
+@dataclass(frozen=True)
+class ChatRequest:
+    """One chat completion requested by a steps generator."""
+
+    # Metrics span of the call (e.g. "llm.product_text")
+    stage: str
+    # Keyword arguments of ``chat.completions.create``
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+def complete(client: OpenAI, request: ChatRequest) -> Any:
+    """Send a request; returns the response, or the exception it raised."""
+    try:
+        with span(request.stage) as s:
+            resp = client.chat.completions.create(**request.kwargs)
+            s.add(tokens=response_tokens(resp))
+        return resp
+    except Exception as e:
+        return e
+
+
+async def acomplete(client: AsyncOpenAI, request: ChatRequest) -> Any:
+    """Async counterpart of :func:`complete`."""
+    try:
+        with span(request.stage) as s:
+            resp = await client.chat.completions.create(**request.kwargs)
+            s.add(tokens=response_tokens(resp))
+        return resp
+    except Exception as e:
+        return e
+
+
+def run_steps(steps: Steps[T], perform: Callable[[Any], Any]) -> T:
+    """
+    Run a steps generator, answering each yielded value with ``perform``.
+
+    Returns:
+        The generator's return value (its exceptions propagate)
+    """
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(perform(request))
+    except StopIteration as done:
+        return done.value
+
+
+async def arun_steps(steps: Steps[T], perform: Callable[[Any], Awaitable[Any]]) -> T:
+    """Async counterpart of :func:`run_steps` (``perform`` is awaited)."""
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(await perform(request))
+    except StopIteration as done:
+        return done.value
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, List
 from fastapi import WebSocket
 
 class ConnectionManager:
@@ -12,11 +12,22 @@ class ConnectionManager:
         self.active_connections.append(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
+    async def send_json(self, data: Dict[str, Any], websocket: WebSocket):
+        """Send one structured event (e.g. a streamed product field) to a client."""
+        await websocket.send_json(data)
+
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+        # Iterate over a copy: sockets may disconnect while we are awaiting
+        for connection in list(self.active_connections):
+            try:
+                await connection.send_text(message)
+            except Exception:
+                # A dead socket must not break the background job that is logging
+                if connection in self.active_connections:
+                    self.active_connections.remove(connection)
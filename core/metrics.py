@@ -0,0 +1,253 @@
+"""Stage timing spans, per-job summaries and Prometheus text export."""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Job summaries kept for /api/job-metrics
+_RECENT_JOBS = 20
+
+
+@dataclass
+class StageStats:
+    """Aggregated spans of one stage."""
+
+    count: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    tokens: int = 0
+    bytes: int = 0
+
+
+class Span:
+    """One timed stage call; add the tokens/bytes it used before it ends."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.tokens = 0
+        self.bytes = 0
+
+    def add(self, tokens: int = 0, bytes: int = 0) -> None:
+        self.tokens += tokens or 0
+        self.bytes += bytes or 0
+
+
+class StageMetrics:
+    """Thread-safe per-stage aggregation of spans."""
+
+    def __init__(self, buckets: Tuple[float, ...] = ()):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageStats] = {}
+        self._buckets = buckets
+        self._bucket_counts: Dict[str, List[int]] = {}
+
+    def record(self, span: Span, seconds: float, error: bool) -> None:
+        with self._lock:
+            stats = self._stages.setdefault(span.stage, StageStats())
+            stats.count += 1
+            stats.errors += int(error)
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.tokens += span.tokens
+            stats.bytes += span.bytes
+            if self._buckets:
+                counts = self._bucket_counts.setdefault(
+                    span.stage, [0] * len(self._buckets)
+                )
+                for i, bound in enumerate(self._buckets):
+                    if seconds <= bound:
+                        counts[i] += 1
+
+    def snapshot(self) -> Dict[str, StageStats]:
+        with self._lock:
+            return {stage: StageStats(**asdict(stats)) for stage, stats in self._stages.items()}
+
+    def bucket_counts(self) -> Dict[str, List[int]]:
+        with self._lock:
+            return {stage: list(counts) for stage, counts in self._bucket_counts.items()}
+
+
+class JobMetrics(StageMetrics):
+    """Spans of one bulk job (bound with :func:`bind_job`)."""
+
+    def __init__(self, job_id: str):
+        super().__init__()
+        self.job_id = job_id
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self._wall_seconds: Optional[float] = None
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+        self._wall_seconds = time.perf_counter() - self._started
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Per-stage totals, slowest stage (by summed time) first.
+
+        Stage seconds are summed over concurrent rows, so they can exceed
+        the job's wall time.
+        """
+        wall = self._wall_seconds
+        if wall is None:
+            wall = time.perf_counter() - self._started
+        stages = sorted(self.snapshot().items(), key=lambda item: -item[1].seconds)
+        return {
+            "job_id": self.job_id,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wall_seconds": round(wall, 3),
+            "stages": {
+                stage: {
+                    **asdict(stats),
+                    "seconds": round(stats.seconds, 3),
+                    "max_seconds": round(stats.max_seconds, 3),
+                    "avg_seconds": round(stats.seconds / stats.count, 3) if stats.count else 0.0,
+                }
+                for stage, stats in stages
+            },
+        }
+
+
+# Process-wide totals (exported on /metrics)
+registry = StageMetrics(buckets=DURATION_BUCKETS)
+
+_current_job: contextvars.ContextVar[Optional[JobMetrics]] = contextvars.ContextVar(
+    "metrics_job", default=None
+)
+_recent_jobs: Deque[JobMetrics] = deque(maxlen=_RECENT_JOBS)
+_recent_lock = threading.Lock()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[Span]:
+    """
+    Time a stage call.
+
+    The span is added to the process totals and to the job bound in the
+    current context (context variables follow ``asyncio`` tasks and
+    ``run_blocking`` calls). Exceptions are counted and re-raised.
+
+    Example::
+
+        with span("llm.product_text") as s:
+            resp = client.chat.completions.create(...)
+            s.add(tokens=response_tokens(resp))
+    """
+    current = Span(stage)
+    started = time.perf_counter()
+    error = False
+    try:
+        yield current
+    except BaseException:
+        error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        registry.record(current, seconds, error)
+        job = _current_job.get()
+        if job is not None:
+            job.record(current, seconds, error)
+
+
+def response_tokens(response: Any) -> int:
+    """Total tokens reported by an OpenAI response (0 if it has no usage)."""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", 0) or 0
+
+
+def bind_job(job: JobMetrics) -> contextvars.Token:
+    """Collect spans of the current context (and tasks started from it) into ``job``."""
+    with _recent_lock:
+        _recent_jobs.append(job)
+    return _current_job.set(job)
+
+
+def finish_job(job: JobMetrics, token: contextvars.Token) -> Dict[str, Any]:
+    """
+    Unbind a job, mark it finished and return its summary.
+
+    Args:
+        job: Job bound with :func:`bind_job`
+        token: Token returned by :func:`bind_job`
+
+    Returns:
+        Dict[str, Any]: :meth:`JobMetrics.summary`
+    """
+    _current_job.reset(token)
+    job.finish()
+    return job.summary()
+
+
+def recent_job_summaries() -> List[Dict[str, Any]]:
+    """Summaries of the most recent jobs (running ones included), newest first."""
+    with _recent_lock:
+        jobs = list(_recent_jobs)
+    return [job.summary() for job in reversed(jobs)]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(
+    counters: Optional[Dict[str, Tuple[str, Dict[Tuple[Tuple[str, str], ...], float]]]] = None,
+) -> str:
+    """
+    Render stage metrics in the Prometheus text exposition format.
+
+    Args:
+        counters: Extra counters as ``{name: (help, {labels: value})}``,
+            where ``labels`` is a tuple of (label, value) pairs
+
+    Returns:
+        str: Metrics text (``text/plain; version=0.0.4``)
+    """
+    stages = registry.snapshot()
+    buckets = registry.bucket_counts()
+    lines: List[str] = [
+        "# HELP product_agent_stage_duration_seconds Duration of pipeline stage calls.",
+        "# TYPE product_agent_stage_duration_seconds histogram",
+    ]
+    for stage, stats in sorted(stages.items()):
+        label = f'stage="{_escape_label(stage)}"'
+        for bound, count in zip(DURATION_BUCKETS, buckets.get(stage, [])):
+            lines.append(
+                f'product_agent_stage_duration_seconds_bucket{{{label},le="{bound}"}} {count}'
+            )
+        lines.append(
+            f'product_agent_stage_duration_seconds_bucket{{{label},le="+Inf"}} {stats.count}'
+        )
+        lines.append(f"product_agent_stage_duration_seconds_sum{{{label}}} {stats.seconds:.6f}")
+        lines.append(f"product_agent_stage_duration_seconds_count{{{label}}} {stats.count}")
+
+    for name, field, help_text in (
+        ("product_agent_stage_errors_total", "errors", "Stage calls that raised."),
+        ("product_agent_stage_tokens_total", "tokens", "OpenAI tokens used by stage."),
+        ("product_agent_stage_bytes_total", "bytes", "Bytes transferred by stage."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for stage, stats in sorted(stages.items()):
+            lines.append(f'{name}{{stage="{_escape_label(stage)}"}} {getattr(stats, field)}')
+
+    for name, (help_text, samples) in (counters or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(samples.items()):
+            rendered = ",".join(f'{key}="{_escape_label(str(val))}"' for key, val in labels)
+            lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
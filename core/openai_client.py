@@ -1,13 +1,27 @@
-"""OpenAI client singleton."""
+"""OpenAI client singletons (sync and pooled async)."""
 
+import asyncio
+import importlib.util
+import logging
+import weakref
 from typing import Optional
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI
 
 from core.config import settings
 
+logger = logging.getLogger(__name__)
+
 _client: Optional[OpenAI] = None
 
+# One async client per event loop: httpx connection pools are bound to the
+# loop that first uses them (uvicorn, worker processes and tests each run
+# their own loop).
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+
 
 def get_openai_client() -> OpenAI:
     """Get or create OpenAI client instance."""
@@ -15,3 +29,48 @@ def get_openai_client() -> OpenAI:
     if _client is None:
         _client = OpenAI(api_key=settings.openai_api_key)
     return _client
+
+
+def _http2_available() -> bool:
+    """HTTP/2 in httpx needs the optional ``h2`` package."""
+    if not settings.openai_http2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("OPENAI_HTTP2 is enabled but 'h2' is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """
+    Get or create the pooled async OpenAI client for the running event loop.
+
+    The underlying httpx pool keeps connections alive (HTTP/2 when available)
+    and is bounded by ``settings.openai_max_connections`` so concurrent
+    requests share sockets instead of opening one per call.
+
+    Returns:
+        AsyncOpenAI: Client bound to the current event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        http_client = DefaultAsyncHttpxClient(
+            http2=_http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.openai_max_connections,
+                max_keepalive_connections=settings.openai_max_keepalive_connections,
+                keepalive_expiry=settings.openai_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(settings.openai_timeout, connect=10.0),
+        )
+        client = AsyncOpenAI(api_key=settings.openai_api_key, http_client=http_client)
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_openai_client() -> None:
+    """Close the async client of the running event loop (application shutdown)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
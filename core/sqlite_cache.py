@@ -0,0 +1,171 @@
+"""Persistent key/value cache on SQLite with TTL and LRU eviction."""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed
+    ON cache_entries(namespace, accessed_at);
+"""
+
+# Run LRU trimming once per this many writes instead of on every write
+_EVICT_EVERY = 50
+
+
+class SqliteCache:
+    """
+    String cache shared by all processes using the same database file.
+
+    Entries expire ``ttl_seconds`` after they were written; when a namespace
+    grows past ``max_entries`` the least recently read entries are dropped
+    (trimming runs every few dozen writes, so the limit is approximate).
+    Hit/miss counters are per process.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        namespace: str,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self._writes_since_evict = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter: str) -> None:
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Read a value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[str]: Cached value, or None if missing/expired
+        """
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+
+        if row is None or (
+            self.ttl_seconds is not None and now - row[1] > self.ttl_seconds
+        ):
+            self._count("misses")
+            return None
+
+        conn.execute(
+            "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, key),
+        )
+        self._count("hits")
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Write a value, replacing any previous one."""
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries"
+            "(namespace, key, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, key, value, now, now),
+        )
+        self._count("writes")
+
+        with self._counter_lock:
+            self._writes_since_evict += 1
+            due = self._writes_since_evict >= _EVICT_EVERY
+            if due:
+                self._writes_since_evict = 0
+        if due:
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        self._connection().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        )
+
+    def evict(self) -> int:
+        """
+        Drop expired entries and trim the namespace to ``max_entries``.
+
+        Returns:
+            int: Number of entries removed
+        """
+        conn = self._connection()
+        removed = 0
+        if self.ttl_seconds is not None:
+            removed += conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                (self.namespace, time.time() - self.ttl_seconds),
+            ).rowcount
+        if self.max_entries is not None:
+            removed += conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM cache_entries WHERE namespace = ? "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.max_entries),
+            ).rowcount
+        if removed:
+            logger.debug(f"Evicted {removed} '{self.namespace}' cache entries")
+        return removed
+
+    def clear(self) -> None:
+        """Remove every entry of this namespace."""
+        self._connection().execute(
+            "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Per-process hit/miss/write counters plus the current entry count."""
+        size = self._connection().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        with self._counter_lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "entries": size,
+            }
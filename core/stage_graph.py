@@ -0,0 +1,91 @@
+"""Dependency graph of async stages, run with maximum concurrency."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A stage receives the results of its dependencies, keyed by stage name
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class StageGraph:
+    """
+    Small DAG executor for the stages of one unit of work.
+
+    Each stage starts as soon as all of its dependencies have finished, so
+    independent stages run concurrently and the total time is the longest
+    dependency chain rather than the sum of all stages. If any stage
+    raises, the stages still running are cancelled and the error is
+    re-raised from :meth:`run`.
+
+    Example::
+
+        graph = StageGraph()
+        graph.add("text", generate_text)
+        graph.add("category", select_category)
+        graph.add("params", get_params, deps=("category",))
+        results = await graph.run()
+    """
+
+    def __init__(self) -> None:
+        self._stages: Dict[str, Tuple[StageFunc, Tuple[str, ...]]] = {}
+
+    def add(self, name: str, func: StageFunc, deps: Iterable[str] = ()) -> "StageGraph":
+        """
+        Register a stage.
+
+        Args:
+            name: Unique stage name (key of its result)
+            func: Coroutine function called with ``{dep_name: dep_result}``
+            deps: Names of stages that must finish first (registered earlier)
+
+        Returns:
+            StageGraph: self, for chaining
+
+        Raises:
+            ValueError: If the name is taken or a dependency is unknown
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage already registered: {name}")
+        deps = tuple(deps)
+        unknown = [dep for dep in deps if dep not in self._stages]
+        if unknown:
+            # Dependencies must exist already, which also rules out cycles
+            raise ValueError(f"Unknown dependencies of stage {name}: {unknown}")
+        self._stages[name] = (func, deps)
+        return self
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run every stage.
+
+        Returns:
+            Dict[str, Any]: Result of each stage, keyed by name
+
+        Raises:
+            Exception: The first error raised by a stage
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str) -> Any:
+            func, deps = self._stages[name]
+            inputs = {dep: await tasks[dep] for dep in deps}
+            return await func(inputs)
+
+        # Stages are registered after their dependencies, so every task a
+        # stage awaits already exists when it starts
+        for name in self._stages:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            # Let cancelled stages unwind (release semaphores, close files)
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return {name: task.result() for name, task in tasks.items()}
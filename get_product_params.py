@@ -1,6 +1,8 @@
 import base64
+import json
 import os
-from core.openai_client import get_openai_client
+from core.metrics import response_tokens, span
+from core.openai_client import get_async_openai_client, get_openai_client
 from dataclasses import dataclass
 from typing import List, Optional, Literal, Dict, Any
 
@@ -37,17 +39,8 @@ def get_image_mime_type(image_path: str) -> str:
     return mime_types.get(ext, "image/jpeg")
 
 
-def get_product_params(product_input: ProductInput) -> Dict[str, Any]:
-    """
-    Get product physical parameters (width, height, length, weight) using AI.
-
-    Args:
-        product_input: ProductInput with product name, category info, brand, and images
-
-    Returns:
-        Dict with keys: weight (g), height (mm), width (mm), length (mm),
-                       confidence (float), method (str), notes (str)
-    """
+def _build_params_messages(product_input: ProductInput) -> List[Dict[str, Any]]:
+    """Build chat messages for the product parameters request."""
     system = (
         "Sen product data extractor agentisan. Vazifa: Width/Height/Length (mm) va Weight (g) qaytar.\n"
         "Qoidalar:\n"
@@ -98,22 +91,17 @@ def get_product_params(product_input: ProductInput) -> Dict[str, Any]:
     #                 }
     #             )
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system},
-            {
-                "role": "user",
-                "content": content,
-            },
-        ],
-    )
+    return [
+        {"role": "system", "content": system},
+        {
+            "role": "user",
+            "content": content,
+        },
+    ]
 
-    result_text = response.choices[0].message.content or ""
-
-    # Parse JSON response
-    import json
 
+def _parse_params_response(result_text: str) -> Dict[str, Any]:
+    """Parse model output into the params dict, falling back to defaults."""
     try:
         result = json.loads(result_text.strip())
         return {
@@ -138,3 +126,41 @@ def get_product_params(product_input: ProductInput) -> Dict[str, Any]:
             "method": "default_fallback",
             "notes": "Failed to parse AI response",
         }
+
+
+def get_product_params(product_input: ProductInput) -> Dict[str, Any]:
+    """
+    Get product physical parameters (width, height, length, weight) using AI.
+
+    Args:
+        product_input: ProductInput with product name, category info, brand, and images
+
+    Returns:
+        Dict with keys: weight (g), height (mm), width (mm), length (mm),
+                       confidence (float), method (str), notes (str)
+    """
+    with span("llm.params") as s:
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=_build_params_messages(product_input),
+        )
+        s.add(tokens=response_tokens(response))
+
+    result_text = response.choices[0].message.content or ""
+
+    # Parse JSON response
+    return _parse_params_response(result_text)
+
+
+async def aget_product_params(product_input: ProductInput) -> Dict[str, Any]:
+    """Async counterpart of :func:`get_product_params` using the pooled async client."""
+    with span("llm.params") as s:
+        response = await get_async_openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=_build_params_messages(product_input),
+        )
+        s.add(tokens=response_tokens(response))
+
+    result_text = response.choices[0].message.content or ""
+
+    return _parse_params_response(result_text)
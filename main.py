@@ -1,16 +1,30 @@
 """FastAPI application for AI Product Generator."""
 
+import asyncio
 import logging
 import os
 import random
+from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import ValidationError
 
 from agent.image import generate_poster
+from agent.category_brand import category_memo
+from agent.product import get_generation_metrics
+from agent.product.agent import generation_cache
+from agent.product.schemas import ProductTextRequest
 from api_models import ErrorResponse, ProductGenerateRequest, ProductGenerateResponse
 from core.config import settings
 from core.constants import CORS_ALLOW_ORIGINS
+from core.executor import run_blocking, shutdown_executor
+from core.metrics import recent_job_summaries, render_prometheus
+from core.http_client import close_async_http_client
+from core.image_cache import image_cache
+from core.image_format import shutdown_format_pool
+from core.openai_client import close_async_openai_client
 from services.product_service import ProductService
 from utils.logging_config import setup_logging
 
@@ -26,6 +40,10 @@ product_service = ProductService()
 
 from core.manager import ConnectionManager
 from services.bulk_upload_service import BulkUploadService
+from services.job_queue import TASK_EXCEL, TASK_RESUME, JobQueue, get_job_queue
+from services.job_store import JOB_COMPLETED, JOB_RUNNING, job_store
+from services.mxik_service import mxik_codes
+from services.mxik_store import mxik_store
 from fastapi import (
     WebSocket,
     WebSocketDisconnect,
@@ -34,7 +52,7 @@ from fastapi import (
     Form,
     BackgroundTasks,
 )
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 import pandas as pd
 import json
 from io import BytesIO
@@ -43,11 +61,54 @@ manager = ConnectionManager()
 bulk_service = BulkUploadService(manager)
 
 
+def _queue_enabled() -> bool:
+    """Bulk uploads are queued for worker.py instead of running in this process."""
+    return settings.bulk_queue_backend != "inline"
+
+
+async def _relay_queue_events(queue: JobQueue) -> None:
+    """Broadcast progress messages published by workers to WebSocket clients."""
+    last_id = await run_blocking(queue.last_event_id)
+    while True:
+        try:
+            events = await run_blocking(queue.events_after, last_id)
+        except Exception as e:
+            logger.error(f"Reading worker events failed: {e}")
+            events = []
+        for event_id, _, message in events:
+            last_id = event_id
+            await manager.broadcast(message)
+        if not events:
+            await asyncio.sleep(settings.worker_poll_interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks."""
+    relay = None
+    if _queue_enabled():
+        relay = asyncio.ensure_future(_relay_queue_events(get_job_queue()))
+    else:
+        # Jobs still "running" belong to a previous process; they can be resumed.
+        # (With a queue, workers own running jobs and recover them themselves.)
+        interrupted = await run_blocking(job_store.mark_interrupted)
+        if interrupted:
+            logger.info(f"{interrupted} ta to'xtab qolgan job topildi (resume qilish mumkin)")
+    yield
+    if relay is not None:
+        relay.cancel()
+    await close_async_openai_client()
+    await close_async_http_client()
+    shutdown_executor(wait=False)
+    shutdown_format_pool(wait=False)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
     description="AI-powered product content generation API",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -83,6 +144,52 @@ async def health_check():
     return {"status": "healthy"}
 
 
+def _collect_metric_counters():
+    """Generation and cache counters for /metrics (blocking: reads the cache DB)."""
+    generation = get_generation_metrics()
+    cache = generation_cache.stats()
+    images = image_cache.stats()
+    return {
+        "product_agent_generation_events_total": (
+            "Product text generation events (requests, attempts, retries, failures).",
+            {(("event", event),): value for event, value in generation.items()},
+        ),
+        "product_agent_cache_events_total": (
+            "Cache lookups and writes.",
+            {
+                (("cache", "product_text"), ("event", "hit")): cache["hits"],
+                (("cache", "product_text"), ("event", "miss")): cache["misses"],
+                (("cache", "product_text"), ("event", "write")): cache["writes"],
+                (("cache", "category_memo"), ("event", "hit")): category_memo.hits,
+                (("cache", "category_memo"), ("event", "miss")): category_memo.misses,
+                (("cache", "image"), ("event", "hit")): images["hits"],
+                (("cache", "image"), ("event", "miss")): images["misses"],
+                (("cache", "image"), ("event", "write")): images["writes"],
+            },
+        ),
+    }
+
+
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """Stage timings and counters in the Prometheus text format."""
+    counters = await run_blocking(_collect_metric_counters)
+    return Response(
+        content=render_prometheus(counters),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@app.get("/api/job-metrics", tags=["Bulk Upload"])
+async def job_metrics():
+    """Per-stage timing summaries of the most recent bulk jobs."""
+    # Jobs of this process are live; jobs run by workers come from the job store
+    live = {summary["job_id"]: summary for summary in recent_job_summaries()}
+    stored = await run_blocking(job_store.recent_metrics)
+    jobs = [live.pop(summary["job_id"], summary) for summary in stored]
+    return {"jobs": list(live.values()) + jobs}
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
@@ -93,6 +200,49 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
+@app.websocket("/ws/generate")
+async def generate_stream_endpoint(websocket: WebSocket):
+    """
+    Stream product text generation to the browser.
+
+    The client sends ``{"name", "brand", "price", "stock"}`` messages; for
+    each one the server pushes ``delta``/``field`` events as the model
+    writes them, then ``{"type": "product", ...}`` with the validated
+    product (or ``{"type": "error", "message": ...}``).
+    """
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                request = ProductTextRequest.model_validate_json(message)
+            except ValidationError as e:
+                await manager.send_json(
+                    {"type": "error", "message": f"Noto'g'ri so'rov: {e}"},
+                    websocket,
+                )
+                continue
+
+            try:
+                async for event in product_service.astream_product_content(
+                    name=request.name,
+                    brand=request.brand,
+                    price=request.price,
+                    stock=request.stock,
+                ):
+                    await manager.send_json(event, websocket)
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                logger.error(f"Streaming generation failed: {e}", exc_info=True)
+                await manager.send_json(
+                    {"type": "error", "message": f"Generatsiya xatosi: {e}"},
+                    websocket,
+                )
+    except WebSocketDisconnect:
+        pass
+
+
 @app.post("/upload-excel", tags=["Bulk Upload"])
 async def upload_excel(
     background_tasks: BackgroundTasks,
@@ -113,6 +263,27 @@ async def upload_excel(
     # Convert additional_search string to boolean
     additional_search_bool = additional_search.lower() == "true"
 
+    if _queue_enabled():
+        # A worker process runs the job; progress is relayed to the WebSocket
+        contents = await file.read()
+        task_id = await run_blocking(
+            get_job_queue().enqueue,
+            TASK_EXCEL,
+            {
+                "filename": file.filename,
+                "email": email,
+                "image_search_site": image_search_site or None,
+                "additional_search": additional_search_bool,
+            },
+            credentials={"email": email, "password": password},
+            data=contents,
+        )
+        return {
+            "message": "Fayl qabul qilindi. Jarayon navbatga qo'yildi.",
+            "filename": file.filename,
+            "task_id": task_id,
+        }
+
     # Start processing in background
     background_tasks.add_task(
         bulk_service.process_excel,
@@ -129,8 +300,72 @@ async def upload_excel(
     }
 
 
+@app.get("/api/jobs", tags=["Bulk Upload"])
+async def list_jobs(limit: int = Query(20, ge=1, le=200)):
+    """Most recent bulk upload jobs with row counts per status."""
+    return {"jobs": await run_blocking(job_store.list_jobs, limit)}
+
+
+@app.get("/api/jobs/{job_id}", tags=["Bulk Upload"])
+async def get_job(job_id: str):
+    """A bulk upload job with the status of every row."""
+    job = await run_blocking(job_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job topilmadi")
+    job["row_details"] = await run_blocking(job_store.job_rows, job_id)
+    return job
+
+
+@app.post("/api/jobs/{job_id}/resume", tags=["Bulk Upload"])
+async def resume_job(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    email: str = Form(...),
+    password: str = Form(...),
+):
+    """
+    Resume an interrupted or failed job from the last completed stage of each row.
+
+    Credentials are required again because passwords are never stored.
+    """
+    job = await run_blocking(job_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job topilmadi")
+    if job["status"] in (JOB_RUNNING, JOB_COMPLETED):
+        raise HTTPException(
+            status_code=409, detail=f"Job holati: {job['status']}, davom ettirib bo'lmaydi"
+        )
+
+    if _queue_enabled():
+        task_id = await run_blocking(
+            get_job_queue().enqueue,
+            TASK_RESUME,
+            {"job_id": job_id, "email": email},
+            credentials={"email": email, "password": password},
+        )
+        return {"message": "Job navbatga qo'yildi", "job_id": job_id, "task_id": task_id}
+
+    background_tasks.add_task(
+        bulk_service.resume_job, job_id=job_id, email=email, password=password
+    )
+    return {"message": "Job davom ettirilmoqda", "job_id": job_id}
+
+
+@app.get("/api/tasks/{task_id}", tags=["Bulk Upload"])
+async def get_task(task_id: str):
+    """Status of a queued bulk upload task (its job ID once a worker created the job)."""
+    if not _queue_enabled():
+        raise HTTPException(status_code=404, detail="Navbat yoqilmagan (BULK_QUEUE_BACKEND)")
+    task = await run_blocking(get_job_queue().get_task, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Vazifa topilmadi")
+    return task
+
+
 # MXIK Codes CRUD Endpoints
-EXCEL_FILE_PATH = "api/mxik-codes.xlsx"
+# Rows live in SQLite (services.mxik_store); Excel is only used for
+# /api/mxik-upload (import) and /api/mxik-download (export).
+MXIK_PAGE_MAX_LIMIT = 500
 
 
 @app.get("/mxik-codes-page", tags=["MXIK Management"])
@@ -140,146 +375,90 @@ async def mxik_codes_page(request: Request):
 
 
 @app.get("/api/mxik-data", tags=["MXIK Management"])
-async def get_mxik_data():
-    """Fetch MXIK data from Excel file as JSON without headers."""
+async def get_mxik_data(
+    search: Optional[str] = Query(None, description="Name / MXIK / package code substring"),
+    category_id: Optional[str] = Query(None, description="Exact category ID"),
+    limit: int = Query(100, ge=1, le=MXIK_PAGE_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[int] = Query(None, ge=0, description="next_cursor of the previous page"),
+):
+    """Fetch one page of MXIK rows, filtered and paginated in SQL."""
     try:
-        if not os.path.exists(EXCEL_FILE_PATH):
-            raise HTTPException(status_code=404, detail="Excel file not found")
-
-        # Read without header
-        df = pd.read_excel(EXCEL_FILE_PATH, header=None, dtype=str)
-
-        # Ensure we have at least 4 columns
-        while len(df.columns) < 4:
-            df[len(df.columns)] = ""
-
-        # Map indices to names for the UI
-        # Excel structure: Column 0 = ID, Column 1 = Name, Column 2 = mixk, Column 3 = package
-        data = []
-        for idx, row in df.iterrows():
-            data.append(
-                {
-                    "row_id": idx,
-                    "category_id": row[0] if 0 in row else "",
-                    "name": row[1] if 1 in row else "",
-                    "mxik_code": row[2] if 2 in row else "",
-                    "package_code": row[3] if 3 in row else "",
-                }
-            )
-        return data
+        page = await run_blocking(
+            mxik_store.query_rows,
+            search=search,
+            category_id=category_id,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        )
+        return {**page, "limit": limit, "offset": 0 if cursor is not None else offset}
     except Exception as e:
-        logger.error(f"Error reading Excel: {e}")
+        logger.error(f"Error reading MXIK data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/mxik-update", tags=["MXIK Management"])
 async def update_mxik_data(request: Request):
-    """Update rows in the MXIK Excel file without headers."""
+    """Update MXIK rows by row_id."""
     try:
         body = await request.json()
         updates = body.get("updates", [])
 
-        if not os.path.exists(EXCEL_FILE_PATH):
-            raise HTTPException(status_code=404, detail="Excel file not found")
-
-        df = pd.read_excel(EXCEL_FILE_PATH, header=None, dtype=str)
-
-        for update in updates:
-            row_id_value = update.get("row_id")
-            if row_id_value is None:
-                continue
-            try:
-                row_id = int(row_id_value)
-            except (ValueError, TypeError):
-                continue
-            if 0 <= row_id < len(df):
-                if "category_id" in update:
-                    df.iloc[row_id, 0] = str(update["category_id"])
-                if "name" in update:
-                    df.iloc[row_id, 1] = str(update["name"])
-                if "mxik_code" in update:
-                    df.iloc[row_id, 2] = str(update["mxik_code"])
-                if "package_code" in update:
-                    df.iloc[row_id, 3] = str(update["package_code"])
-
-        df.to_excel(EXCEL_FILE_PATH, index=False, header=False)
+        await run_blocking(mxik_store.update_rows, updates)
+        mxik_codes.invalidate()
         return {"message": "Dinamik ravishda saqlandi"}
     except Exception as e:
-        logger.error(f"Error updating Excel: {e}")
+        logger.error(f"Error updating MXIK data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/mxik-add", tags=["MXIK Management"])
 async def add_mxik_item(request: Request):
-    """Add a new row to the MXIK Excel file without headers."""
+    """Add a new MXIK row."""
     try:
         body = await request.json()
         item = body.get("item", {})
 
-        if not os.path.exists(EXCEL_FILE_PATH):
-            raise HTTPException(status_code=404, detail="Excel file not found")
-
-        df = pd.read_excel(EXCEL_FILE_PATH, header=None, dtype=str)
-
-        # Construct new row list, handling None values properly
-        def safe_str(value):
-            """Convert value to string, handling None values."""
-            return str(value) if value is not None else ""
-        
-        new_row = [
-            safe_str(item.get("category_id")),
-            safe_str(item.get("name")),
-            safe_str(item.get("mxik_code")),
-            safe_str(item.get("package_code")),
-        ]
-
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        df.to_excel(EXCEL_FILE_PATH, index=False, header=False)
-        return {"message": "Yangi item muvaffaqiyatli qo'shildi"}
+        row_id = await run_blocking(mxik_store.add_row, item)
+        mxik_codes.invalidate()
+        return {"message": "Yangi item muvaffaqiyatli qo'shildi", "row_id": row_id}
     except Exception as e:
-        import traceback
-
-        traceback.print_exc()
-        logger.error(f"Error adding to Excel: {e}")
+        logger.error(f"Error adding MXIK item: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.delete("/api/mxik-delete/{row_id}", tags=["MXIK Management"])
 async def delete_mxik_item(row_id: int):
-    """Delete a row from the MXIK Excel file without headers."""
+    """Delete an MXIK row by row_id."""
     try:
-        if not os.path.exists(EXCEL_FILE_PATH):
-            raise HTTPException(status_code=404, detail="Excel file not found")
-
-        df = pd.read_excel(EXCEL_FILE_PATH, header=None, dtype=str)
-
-        if 0 <= row_id < len(df):
-            df = df.drop(df.index[row_id])
-            df.to_excel(EXCEL_FILE_PATH, index=False, header=False)
-            return {"message": "Item muvaffaqiyatli o'chirildi"}
-        else:
-            raise HTTPException(status_code=404, detail="Row not found")
+        deleted = await run_blocking(mxik_store.delete_row, row_id)
     except Exception as e:
-        logger.error(f"Error deleting from Excel: {e}")
+        logger.error(f"Error deleting MXIK item: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Row not found")
+    mxik_codes.invalidate()
+    return {"message": "Item muvaffaqiyatli o'chirildi"}
+
 
 @app.get("/api/mxik-download", tags=["MXIK Management"])
 async def download_mxik_excel():
-    """Download the modified MXIK Excel file."""
-    if not os.path.exists(EXCEL_FILE_PATH):
-        raise HTTPException(status_code=404, detail="Excel file not found")
-
-    return FileResponse(
-        path=EXCEL_FILE_PATH,
-        filename="mxik-codes-updated.xlsx",
+    """Export the MXIK table as an Excel file (4 columns, no header)."""
+    content = await run_blocking(mxik_store.export_excel)
+    return Response(
+        content=content,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={
+            "Content-Disposition": 'attachment; filename="mxik-codes-updated.xlsx"'
+        },
     )
 
 
 @app.post("/api/mxik-upload", tags=["MXIK Management"])
 async def upload_mxik_excel(file: UploadFile = File(...)):
-    """Upload and replace the MXIK Excel file with validation."""
+    """Import an Excel file, replacing the MXIK table, with validation."""
     try:
         # Validate file extension
         if not file.filename.endswith((".xlsx", ".xls")):
@@ -292,7 +471,9 @@ async def upload_mxik_excel(file: UploadFile = File(...)):
         contents = await file.read()
         
         try:
-            df = pd.read_excel(BytesIO(contents), header=None, dtype=str)
+            df = await run_blocking(
+                pd.read_excel, BytesIO(contents), header=None, dtype=str
+            )
         except Exception as e:
             logger.error(f"Error reading Excel file: {e}")
             raise HTTPException(
@@ -314,16 +495,12 @@ async def upload_mxik_excel(file: UploadFile = File(...)):
                 detail="Excel fayl bo'sh bo'lishi mumkin emas"
             )
 
-        # Ensure directory exists
-        directory = os.path.dirname(EXCEL_FILE_PATH)
-        if directory:
-            os.makedirs(directory, exist_ok=True)
-
-        # Save to file
+        # Replace table contents in one transaction
         try:
-            df.to_excel(EXCEL_FILE_PATH, index=False, header=False)
+            await run_blocking(mxik_store.replace_from_dataframe, df)
+            mxik_codes.invalidate()
         except Exception as e:
-            logger.error(f"Error saving Excel file: {e}")
+            logger.error(f"Error importing Excel file: {e}")
             raise HTTPException(
                 status_code=500,
                 detail="Faylni saqlashda xatolik yuz berdi"
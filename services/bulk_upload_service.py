@@ -1,18 +1,65 @@
-from get_product_params import get_product_params, ProductInput
+from get_product_params import aget_product_params, ProductInput
 import pandas as pd
+from pydantic import ValidationError
 import asyncio
 import logging
-from typing import Optional
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 from fastapi import UploadFile
 
+from agent.category_brand.schemas import CategoryBrandSelectionSchema
+from agent.product.schemas import ProductGenSchema, ProductTextRequest
 from api.venu_api import VenuSellerAPI
+from services.catalog_cache import catalog_cache
+from services.job_store import (
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_INTERRUPTED,
+    ROW_DONE,
+    ROW_FAILED,
+    ROW_SKIPPED,
+    job_store,
+)
 from services.product_service import ProductService, get_default_image_path
+from services.text_batcher import ProductTextBatcher
+from core.config import settings
+from core.executor import run_blocking
+from core.image_cache import image_cache
+from core.image_format import EncodedImage
 from core.manager import ConnectionManager
-from api.yandex import get_product_images_from_yandex
+from core.metrics import JobMetrics, bind_job, finish_job, span
+from core.stage_graph import StageGraph
+from api.yandex import aget_product_images_from_yandex
 
 logger = logging.getLogger(__name__)
 
 
+class _RowSkipped(Exception):
+    """A row cannot be uploaded (e.g. no category); its other stages are cancelled."""
+
+
+class _LeaseLost(Exception):
+    """Another worker has taken the job over; this run must not write or create anything."""
+
+
+def _image_paths(images: List[Union[str, EncodedImage]]) -> Optional[List[str]]:
+    """File paths of a row's images, or None if some of them are only in memory."""
+    paths = [image if isinstance(image, str) else image.path for image in images]
+    return paths if all(paths) else None
+
+
+def _hold_images(images: List[Union[str, EncodedImage]]) -> bool:
+    """
+    Keep a row's image files from cache eviction until they are uploaded.
+
+    Returns:
+        bool: False if a file the upload would read is already gone
+    """
+    return all(
+        isinstance(image, EncodedImage) or image_cache.hold(image) for image in images
+    )
+
+
 class BulkUploadService:
     def __init__(self, connection_manager: ConnectionManager):
         self.manager = connection_manager
@@ -26,9 +73,13 @@ class BulkUploadService:
         client_id: str = None,
         image_search_site: Optional[str] = None,
         additional_search: bool = False,
+        max_workers: Optional[int] = None,
     ):
         """
         Process uploaded Excel file and upload products to Venu.
+
+        The rows are stored as a new job (``services.job_store``) and run
+        with :meth:`run_job`.
         """
         websocket = None
         # In a real scenario, we might want to target a specific websocket.
@@ -40,133 +91,589 @@ class BulkUploadService:
         # But this service runs in a background task, so we don't have the socket object easily unless we store it.
         # Let's rely on broadcast for this "AI" feel (all open tabs see the progress).
 
+        contents = await file.read()
+        await self.process_excel_bytes(
+            contents,
+            filename=file.filename or "",
+            email=email,
+            password=password,
+            image_search_site=image_search_site,
+            additional_search=additional_search,
+            max_workers=max_workers,
+        )
+
+    async def process_excel_bytes(
+        self,
+        contents: bytes,
+        filename: str,
+        email: str,
+        password: str,
+        image_search_site: Optional[str] = None,
+        additional_search: bool = False,
+        max_workers: Optional[int] = None,
+    ):
+        """Same as :meth:`process_excel` for an already read file."""
+        job_id = await self.create_job(
+            contents,
+            filename=filename,
+            email=email,
+            image_search_site=image_search_site,
+            additional_search=additional_search,
+        )
+        if job_id is not None:
+            await self.run_job(job_id, email, password, max_workers=max_workers)
+
+    async def create_job(
+        self,
+        contents: bytes,
+        filename: str,
+        email: str,
+        image_search_site: Optional[str] = None,
+        additional_search: bool = False,
+    ) -> Optional[str]:
+        """
+        Parse an Excel file and store its rows as a new job.
+
+        Returns:
+            Optional[str]: Job ID, or None if the file could not be read
+        """
         await self._log("🚀 Excel fayl qabul qilindi. Jarayon boshlanmoqda...")
 
+        try:
+            # Read Excel
+            # Pandas can read bytes directly
+            from io import BytesIO
+
+            df = await run_blocking(pd.read_excel, BytesIO(contents))
+            rows = [row.tolist() for _, row in df.iterrows()]
+
+            # Every row and its stage outputs are stored, so the job can be
+            # resumed after a restart (see resume_job)
+            job_id = await run_blocking(
+                job_store.create_job,
+                rows,
+                filename=filename,
+                email=email,
+                options={
+                    "image_search_site": image_search_site,
+                    "additional_search": additional_search,
+                },
+            )
+        except Exception as e:
+            logger.error(f"Bulk upload error: {e}", exc_info=True)
+            await self._log(f"❌ Kutilmagan xatolik: {str(e)}")
+            return None
+
+        await self._log(f"📄 Faylda {len(rows)} ta mahsulot topildi. Job ID: {job_id}")
+        return job_id
+
+    async def resume_job(
+        self,
+        job_id: str,
+        email: str,
+        password: str,
+        max_workers: Optional[int] = None,
+        stop: Optional[asyncio.Event] = None,
+        lease: Optional[str] = None,
+    ):
+        """
+        Continue a stored job: finished rows are skipped and unfinished rows
+        restart from their last completed stage.
+        """
+        await self._log(f"🔁 Job {job_id} davom ettirilmoqda...")
+        await self.run_job(
+            job_id, email, password, max_workers=max_workers, stop=stop, lease=lease
+        )
+
+    async def run_job(
+        self,
+        job_id: str,
+        email: str,
+        password: str,
+        max_workers: Optional[int] = None,
+        stop: Optional[asyncio.Event] = None,
+        lease: Optional[str] = None,
+    ):
+        """
+        Run the unfinished rows of a stored job.
+
+        Rows are processed by a bounded pool of workers
+        (``settings.bulk_max_workers``). Each external stage is additionally
+        limited by its own semaphore so OpenAI, image search and Venu calls
+        stay within their rate budgets.
+
+        Args:
+            job_id: Stored job ID
+            email: Venu account email
+            password: Venu account password
+            max_workers: Rows processed concurrently (default: from settings)
+            stop: When set, rows in flight are finished, no new rows are
+                started and the job is left ``interrupted`` (resumable)
+            lease: Worker lease of the job (see ``JobStore.take_over``); when
+                given, a product is only created while the lease is held
+        """
+        if not await run_blocking(job_store.claim, job_id, lease):
+            await self._log(f"⚠️ Job {job_id} topilmadi, allaqachon ishlamoqda yoki tugagan.")
+            return
+
+        # Stage spans of every row (tasks inherit the context) go to this job
+        job = JobMetrics(job_id)
+        job_token = bind_job(job)
+        # Set when a row finds the lease taken by another worker
+        lease_lost = asyncio.Event()
         try:
             # Login to Venu
             await self._log(f"🔑 {email} hisobiga kirilmoqda...")
             venu_api = VenuSellerAPI(email=email, password=password)
-            if not venu_api.login():
+            if not await run_blocking(venu_api.login):
                 await self._log(
                     "❌ Venu tizimiga kirishda xatolik! Login yoki parolni tekshiring."
                 )
+                await run_blocking(
+                    job_store.set_status, job_id, JOB_FAILED, "Venu login failed"
+                )
                 return
 
             await self._log("✅ Muvaffaqiyatli kirildi!")
 
-            # Read Excel
-            # Helper to read uploaded file into pandas
-            contents = await file.read()
-            # Save temporary to read with pandas (as bytes) might be tricky depending on engine
-            # Pandas can read bytes directly
-            from io import BytesIO
+            # Warm the catalog cache once so rows don't race to fetch it
+            await run_blocking(catalog_cache.get, venu_api)
+
+            stored_job = await run_blocking(job_store.get_job, job_id)
+            options = stored_job["options"]
+            total_rows = stored_job["total_rows"]
+            pending_rows = await run_blocking(job_store.unfinished_rows, job_id)
+            if len(pending_rows) < total_rows:
+                await self._log(
+                    f"⏭️ {total_rows - len(pending_rows)} ta qator avval yuklangan, "
+                    f"{len(pending_rows)} ta qoldi."
+                )
+
+            # Stage limits are created per job: semaphores are bound to the
+            # running event loop and must not leak between jobs.
+            limits = {
+                "openai": asyncio.Semaphore(max(1, settings.bulk_openai_concurrency)),
+                "images": asyncio.Semaphore(max(1, settings.bulk_image_concurrency)),
+                "venu": asyncio.Semaphore(max(1, settings.bulk_venu_concurrency)),
+            }
+            progress = {"done": total_rows - len(pending_rows), "saved": 0}
+
+            # Rows in flight share text-generation requests
+            text_batcher = None
+            if settings.product_text_batch_size > 1:
+                text_batcher = ProductTextBatcher(
+                    self.product_service.agenerate_product_contents,
+                    limit=limits["openai"],
+                )
 
-            df = pd.read_excel(BytesIO(contents))
+            queue: asyncio.Queue = asyncio.Queue()
+            for pending in pending_rows:
+                queue.put_nowait(pending)
 
-            total_rows = len(df)
-            await self._log(f"📄 Faylda {total_rows} ta mahsulot topildi.")
+            async def worker():
+                while not lease_lost.is_set() and (stop is None or not stop.is_set()):
+                    try:
+                        index, row_values, stages = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        saved = await self._process_row(
+                            job_id=job_id,
+                            index=index,
+                            row_values=row_values,
+                            stages=stages,
+                            total_rows=total_rows,
+                            venu_api=venu_api,
+                            limits=limits,
+                            image_search_site=options.get("image_search_site"),
+                            additional_search=options.get("additional_search", False),
+                            text_batcher=text_batcher,
+                            lease=lease,
+                        )
+                        if saved:
+                            progress["saved"] += 1
+                    except _LeaseLost:
+                        # The row belongs to the new owner now: record nothing
+                        lease_lost.set()
+                        return
+                    except Exception as e:
+                        logger.error(f"Error processing row {index}: {e}", exc_info=True)
+                        await run_blocking(
+                            job_store.finish_row, job_id, index, ROW_FAILED, error=str(e)
+                        )
+                        await self._log(
+                            f"❌ [{index+1}/{total_rows}] Qatorni ishlashda xatolik: {str(e)}"
+                        )
+                    finally:
+                        if not lease_lost.is_set():
+                            progress["done"] += 1
+                            # Stored, so the API sees jobs run by worker processes
+                            await run_blocking(
+                                job_store.save_metrics, job_id, job.summary()
+                            )
+                            await self._log(
+                                f"📊 Jarayon: {progress['done']}/{total_rows} "
+                                f"(yuklandi: {progress['saved']})"
+                            )
 
-            for index, row in df.iterrows():
-                try:
-                    # Expected columns: Name, Brand, Price, Stock (optional)
-                    # We will try to map loosely
-                    row_data = row.to_dict()
+            workers = max(1, max_workers or settings.bulk_max_workers)
+            await asyncio.gather(
+                *(worker() for _ in range(min(workers, len(pending_rows))))
+            )
 
-                    # Fallback to index based if keys not found (assuming Name (0), Brand (1), Price (2))
-                    # Convert row to list to access by index
-                    row_values = list(row_data.values())
+            if lease_lost.is_set():
+                await self._log(
+                    f"⚠️ Job {job_id} boshqa worker tomonidan olindi, bu yerda to'xtatildi."
+                )
+                return
 
-                    print(row_values)
+            if not queue.empty():
+                await run_blocking(job_store.set_status, job_id, JOB_INTERRUPTED)
+                await self._log(
+                    f"⏸️ Job {job_id} to'xtatildi, {queue.qsize()} ta qator qoldi "
+                    f"(davom ettirish mumkin)"
+                )
+                return
 
-                    product_name = row_values[0]
-                    brand_name = row_values[1]
-                    price = row_values[2]
-                    stock = 15
+            # Rows that failed keep the job resumable
+            failed = (await run_blocking(job_store.get_job, job_id))["rows"].get(ROW_FAILED, 0)
+            if failed:
+                await run_blocking(
+                    job_store.set_status, job_id, JOB_FAILED, f"{failed} rows failed"
+                )
+                await self._log(
+                    f"🏁 Jarayon tugadi. {failed} ta qator xatolik bilan "
+                    f"(Job ID: {job_id}, davom ettirish mumkin)"
+                )
+            else:
+                await run_blocking(job_store.set_status, job_id, JOB_COMPLETED)
+                await self._log("🏁 Barcha mahsulotlar qayta ishlandi!")
 
-                    await self._log(f"--- {index+1}/{total_rows}: {product_name} ---")
-                    await self._log(f"🤖 AI kontent yaratmoqda...")
+        except Exception as e:
+            logger.error(f"Bulk upload error: {e}", exc_info=True)
+            await run_blocking(job_store.set_status, job_id, JOB_FAILED, str(e))
+            await self._log(f"❌ Kutilmagan xatolik: {str(e)}")
+        finally:
+            summary = finish_job(job, job_token)
+            if not lease_lost.is_set():
+                await run_blocking(job_store.save_metrics, job_id, summary)
+            await self._log_job_summary(summary)
 
-                    # Generate Content
-                    product = self.product_service.generate_product_content(
-                        name=product_name, brand=brand_name, price=price, stock=stock
-                    )
+    async def _stage(
+        self,
+        job_id: str,
+        index: int,
+        stages: Dict[str, Any],
+        name: str,
+        compute: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda output: output,
+    ) -> Any:
+        """
+        Reuse the stored output of a stage, or run it and store the result.
 
-                    await self._log("📸 Rasmlar qidirilmoqda...")
-
-                    # Images
-                    additional_images = get_product_images_from_yandex(
-                        product_name,
-                        brand_name,
-                        max_images=5,
-                        site=image_search_site,
-                        additional_search=additional_search,
-                        format_images=True,
-                        output_quality=100,
-                    )
-                    if not additional_images:
-                        additional_images = [get_default_image_path()]
+        ``decode`` may return None to reject a stored output (e.g. deleted
+        image files); ``encode`` may return None to not store a result
+        (e.g. a failed upload).
+        """
+        if stages.get(name) is not None:
+            value = decode(stages[name])
+            if value is not None:
+                logger.debug(f"Row {index}: reusing stored '{name}' output")
+                return value
+
+        value = await compute()
+        output = encode(value)
+        if output is not None:
+            await run_blocking(job_store.save_stage, job_id, index, name, output)
+        return value
+
+    async def _process_row(
+        self,
+        job_id: str,
+        index: int,
+        row_values: List[Any],
+        stages: Dict[str, Any],
+        total_rows: int,
+        venu_api: VenuSellerAPI,
+        limits: Dict[str, asyncio.Semaphore],
+        image_search_site: Optional[str] = None,
+        additional_search: bool = False,
+        text_batcher: Optional[ProductTextBatcher] = None,
+        lease: Optional[str] = None,
+    ) -> bool:
+        """
+        Run all stages for a single Excel row.
+
+        Stages run as a :class:`StageGraph`: text generation, image search
+        and category selection start together; params follow the category
+        alone, the image upload follows the images and the category, and the
+        product is created once everything is ready. Each stage output is stored in the job,
+        and stages with a stored output are not run again. The product ID is
+        stored as soon as the product exists; a row resumed with it is only
+        cleaned up and published, never created again.
+
+        Returns:
+            bool: True if the product was saved to the shop
+        """
+        # Expected columns: Name, Brand, Price, Stock (optional)
+        # Assuming Name (0), Brand (1), Price (2)
+        logger.debug(f"Row {index}: {row_values}")
 
-                    main_image = additional_images[0]
+        product_name = row_values[0]
+        brand_name = row_values[1]
+        price = row_values[2]
+        stock = 15
 
-                    # Category Selection
-                    await self._log("📂 Kategoriya tanlanmoqda...")
+        prefix = f"[{index+1}/{total_rows}]"
+
+        await self._log(f"--- {index+1}/{total_rows}: {product_name} ---")
+
+        created = stages.get("create")
+        if created is not None:
+            # The product was created before a crash/restart: creating it
+            # again would duplicate it, so only clean up and publish it
+            product_id = created["product_id"]
+            await self._log(f"♻️ {prefix} Mahsulot avval yaratilgan (ID: {product_id}), yakunlanmoqda...")
+            await self._run_stage(
+                limits["venu"],
+                self.product_service.finish_shop_product,
+                product_id,
+                stages.get("images") or [],
+                api_client=venu_api,
+            )
+            await run_blocking(
+                job_store.finish_row, job_id, index, ROW_DONE, product_id=product_id
+            )
+            await self._log(f"✅ {prefix} Yuklandi! ID: {product_id}")
+            return True
+
+        def stage(name: str, compute, encode=lambda value: value, decode=lambda output: output):
+            return self._stage(job_id, index, stages, name, compute, encode, decode)
+
+        # Text, images and category are independent; params need only the
+        # category, and creating the product needs everything.
+        async def generate_text(_: Dict[str, Any]):
+            async def compute():
+                await self._log(f"🤖 {prefix} AI kontent yaratmoqda...")
+                return await self._generate_content(
+                    product_name, brand_name, price, stock, limits, text_batcher
+                )
+
+            return await stage(
+                "text",
+                compute,
+                encode=lambda product: product.model_dump(),
+                decode=ProductGenSchema.model_validate,
+            )
+
+        async def fetch_images():
+            await self._log(f"📸 {prefix} Rasmlar qidirilmoqda...")
+            async with limits["images"]:
+                images = await aget_product_images_from_yandex(
+                    product_name,
+                    brand_name,
+                    max_images=5,
+                    site=image_search_site,
+                    additional_search=additional_search,
+                    format_images=True,
+                    in_memory=not settings.image_write_files,
+                )
+            return images or [get_default_image_path()]
+
+        async def search_images(_: Dict[str, Any]):
+            # Only images with a file can be stored (in-memory ones are
+            # downloaded again on resume), and only while the files still exist
+            return await stage(
+                "images",
+                fetch_images,
+                encode=_image_paths,
+                decode=lambda paths: paths if all(map(os.path.exists, paths)) else None,
+            )
+
+        async def select_category(_: Dict[str, Any]):
+            async def compute():
+                await self._log(f"📂 {prefix} Kategoriya tanlanmoqda...")
+                async with limits["openai"]:
                     success, error_resp, selection = (
-                        self.product_service.select_category_and_brand(
+                        await self.product_service.aselect_category_and_brand(
                             product_name, brand_name, api_client=venu_api
                         )
                     )
+                if not success or not selection:
+                    raise _RowSkipped(f"Kategoriya yoki brend topilmadi: {error_resp}")
+                return selection
 
-                    if not success or not selection:
-                        await self._log(
-                            f"⚠️ Kategoriya yoki brend topilmadi: {error_resp}"
-                        )
-                        continue
+            return await stage(
+                "category",
+                compute,
+                encode=lambda selection: selection.model_dump(),
+                decode=CategoryBrandSelectionSchema.model_validate,
+            )
 
-                    product_params = get_product_params(
+        async def get_params(results: Dict[str, Any]):
+            async def compute():
+                selection = results["category"]
+                async with limits["openai"]:
+                    return await aget_product_params(
                         product_input=ProductInput(
                             name=product_name,
                             category=selection.category,
                             sub_category=selection.sub_category,
                             sub_sub_category=selection.sub_sub_category,
                             brand=brand_name,
-                            image_paths=additional_images,
                         )
                     )
 
-                    # Upload
-                    await self._log("⬆️ Do'konga yuklanmoqda...")
-                    shop_saved, shop_response = (
-                        self.product_service.save_product_to_shop(
-                            product=product,
-                            category_selection=selection,
-                            main_image_path=main_image,
-                            additional_images_paths=additional_images,
-                            api_client=venu_api,
-                            product_params=product_params,
-                            price=price,
-                            stock=stock,
-                        )
-                    )
+            return await stage("params", compute)
 
-                    if shop_saved:
-                        await self._log(
-                            f"✅ Yuklandi! ID:"
+        async def upload_images(results: Dict[str, Any]):
+            async def compute():
+                await self._log(f"🖼️ {prefix} Rasmlar do'konga yuklanmoqda...")
+                images = results["images"]
+                # Cached files idle for a while may be evicted while the row
+                # waits for its category; fetch them again (from the cache
+                # where it still has them) instead of failing the upload
+                if not await run_blocking(_hold_images, images):
+                    await self._log(f"♻️ {prefix} Rasm fayllari keshdan o'chirilgan, qayta olinmoqda...")
+                    images = await fetch_images()
+                    paths = _image_paths(images)
+                    if paths is not None:
+                        await run_blocking(
+                            job_store.save_stage, job_id, index, "images", paths
                         )
-                    else:
-                        await self._log(f"❌ Yuklashda xatolik: {shop_response}")
+                return await self._run_stage(
+                    limits["venu"],
+                    self.product_service.upload_shop_images,
+                    main_image_path=images[0],
+                    additional_images_paths=images,
+                    api_client=venu_api,
+                )
 
-                    # Sleep briefly to avoid rate limits and allow frontend to update
-                    await asyncio.sleep(1)
+            # Only successful uploads are stored: (True, {"thumbnail", "images"})
+            return await stage(
+                "upload",
+                compute,
+                encode=lambda result: result[1] if result[0] else None,
+                decode=lambda uploaded: (True, uploaded),
+            )
 
-                except Exception as e:
-                    logger.error(f"Error processing row {index}: {e}", exc_info=True)
-                    await self._log(f"❌ Qatorni ishlashda xatolik: {str(e)}")
+        async def create_product(results: Dict[str, Any]):
+            uploaded, upload_response = results["upload"]
+            if not uploaded:
+                return False, upload_response
 
-            await self._log("🏁 Barcha mahsulotlar qayta ishlandi!")
+            # Fencing: a worker that lost the job must not create the product
+            if lease is not None and not await run_blocking(
+                job_store.holds_lease, job_id, lease
+            ):
+                raise _LeaseLost(job_id)
 
-        except Exception as e:
-            logger.error(f"Bulk upload error: {e}", exc_info=True)
-            await self._log(f"❌ Kutilmagan xatolik: {str(e)}")
+            await self._log(f"⬆️ {prefix} Do'konga yuklanmoqda...")
+            images = results["images"]
+            return await self._run_stage(
+                limits["venu"],
+                self.product_service.create_shop_product,
+                product=results["text"],
+                category_selection=results["category"],
+                uploaded_images=upload_response,
+                main_image_path=images[0],
+                additional_images_paths=images,
+                api_client=venu_api,
+                product_params=results["params"],
+                price=price,
+                stock=stock,
+                # Recorded before cleanup/publishing, so a resume never creates it twice
+                on_created=lambda product_id: job_store.save_stage(
+                    job_id, index, "create", {"product_id": product_id}
+                ),
+            )
+
+        graph = (
+            StageGraph()
+            .add("text", generate_text)
+            .add("images", search_images)
+            .add("category", select_category)
+            .add("params", get_params, deps=("category",))
+            # After the category, so rows that will be skipped upload nothing
+            .add("upload", upload_images, deps=("images", "category"))
+            .add(
+                "create",
+                create_product,
+                deps=("text", "images", "category", "params", "upload"),
+            )
+        )
+        try:
+            with span("row"):
+                results = await graph.run()
+        except _RowSkipped as e:
+            await run_blocking(
+                job_store.finish_row, job_id, index, ROW_SKIPPED, error=str(e)
+            )
+            await self._log(f"⚠️ {prefix} {e}")
+            return False
+
+        shop_saved, shop_response = results["create"]
+        if shop_saved:
+            product_id = shop_response.get("request", {}).get("id")
+            await run_blocking(
+                job_store.finish_row, job_id, index, ROW_DONE, product_id=product_id
+            )
+            await self._log(f"✅ {prefix} Yuklandi! ID: {product_id}")
+        else:
+            await run_blocking(
+                job_store.finish_row, job_id, index, ROW_FAILED, error=str(shop_response)
+            )
+            await self._log(f"❌ {prefix} Yuklashda xatolik: {shop_response}")
+
+        return shop_saved
+
+    async def _generate_content(
+        self,
+        product_name: Any,
+        brand_name: Any,
+        price: Any,
+        stock: int,
+        limits: Dict[str, asyncio.Semaphore],
+        text_batcher: Optional[ProductTextBatcher],
+    ):
+        """Generate row text through the batcher, or alone if batching is off."""
+        if text_batcher is not None:
+            try:
+                request = ProductTextRequest(
+                    name=product_name, brand=brand_name, price=price, stock=stock
+                )
+            except ValidationError:
+                # Unusual cell values: keep the lenient single-product path
+                request = None
+            if request is not None:
+                return await text_batcher.submit(request)
+
+        async with limits["openai"]:
+            return await self.product_service.agenerate_product_content(
+                name=product_name, brand=brand_name, price=price, stock=stock
+            )
+
+    @staticmethod
+    async def _run_stage(
+        limit: asyncio.Semaphore, func: Callable[..., Any], *args, **kwargs
+    ) -> Any:
+        """Run a blocking stage in the shared executor under a concurrency limit."""
+        async with limit:
+            return await run_blocking(func, *args, **kwargs)
+
+    async def _log_job_summary(self, summary: Dict[str, Any]) -> None:
+        """Log where the job spent its time (slowest stages first)."""
+        logger.info(f"Bulk job {summary['job_id']} metrics: {summary}")
+        stages = [
+            f"{stage}: {stats['seconds']}s/{stats['count']}"
+            for stage, stats in summary["stages"].items()
+            if stage != "row"
+        ][:5]
+        if stages:
+            await self._log(
+                f"⏱️ Vaqt ({summary['wall_seconds']}s): " + ", ".join(stages)
+            )
 
     async def _log(self, message: str):
         # Broadcast message to websockets
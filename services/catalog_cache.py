@@ -0,0 +1,192 @@
+"""Process-wide category/brand catalog cache keyed by seller account."""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from api.venu_api import VenuSellerAPI
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES_PATH = "/api/v3/seller/categories"
+BRANDS_PATH = "/api/v3/seller/brands"
+
+
+@dataclass
+class CatalogEntry:
+    """Cached catalog of one seller account."""
+
+    categories: List[Dict[str, Any]]
+    brands: List[Dict[str, Any]]
+    # Content fingerprint; changes only when the catalog itself changes
+    version: str
+    fetched_at: float
+    # Per-resource HTTP validators: {"etag": ..., "last_modified": ...}
+    validators: Dict[str, Dict[str, Optional[str]]] = field(default_factory=dict)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+def _catalog_version(categories: List[Dict[str, Any]], brands: List[Dict[str, Any]]) -> str:
+    payload = json.dumps([categories, brands], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+class CatalogCache:
+    """
+    TTL cache for ``get_categories()`` / ``get_brands()`` results.
+
+    - Fresh entries (younger than ``ttl``) are returned without any request.
+    - Stale entries (up to ``max_stale``) are returned immediately while a
+      background thread revalidates them with ETag / If-Modified-Since.
+    - Missing or expired entries are fetched synchronously; concurrent callers
+      for the same account wait for a single fetch.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_stale: Optional[float] = None,
+    ):
+        self.ttl = ttl if ttl is not None else settings.catalog_cache_ttl_seconds
+        self.max_stale = (
+            max_stale
+            if max_stale is not None
+            else settings.catalog_cache_max_stale_seconds
+        )
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._refreshing: set = set()
+        self._guard = threading.Lock()
+
+    @staticmethod
+    def account_key(api_client: VenuSellerAPI) -> str:
+        return f"{api_client.BASE_URL}|{(api_client.email or '').strip().lower()}"
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, api_client: VenuSellerAPI) -> Optional[CatalogEntry]:
+        """
+        Get the catalog for the account of ``api_client``.
+
+        Args:
+            api_client: Authenticated Venu API client
+
+        Returns:
+            Optional[CatalogEntry]: Cached catalog, or None if it could not be loaded
+        """
+        key = self.account_key(api_client)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if entry.age < self.ttl:
+                return entry
+            if entry.age < self.ttl + self.max_stale:
+                self._refresh_in_background(key, api_client)
+                return entry
+
+        with self._lock_for(key):
+            # Another caller may have refreshed while we were waiting
+            entry = self._entries.get(key)
+            if entry is not None and entry.age < self.ttl:
+                return entry
+            return self._refresh(key, api_client)
+
+    def invalidate(self, api_client: Optional[VenuSellerAPI] = None) -> None:
+        """Drop the cached catalog of one account (or of all accounts)."""
+        if api_client is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(self.account_key(api_client), None)
+
+    def _refresh(self, key: str, api_client: VenuSellerAPI) -> Optional[CatalogEntry]:
+        """Revalidate/reload the catalog; keeps the old entry if the fetch fails."""
+        entry = self._entries.get(key)
+        validators = entry.validators if entry else {}
+
+        resources = {}
+        for name, path in (("categories", CATEGORIES_PATH), ("brands", BRANDS_PATH)):
+            previous = validators.get(name, {})
+            resources[name] = api_client.get_conditional(
+                path,
+                etag=previous.get("etag"),
+                last_modified=previous.get("last_modified"),
+            )
+
+        if any(resp is None for resp in resources.values()):
+            logger.warning("Katalogni yangilab bo'lmadi, eski ma'lumot ishlatiladi")
+            return entry
+
+        categories = resources["categories"]
+        brands = resources["brands"]
+        if entry is None and (categories.not_modified or brands.not_modified):
+            # Cannot happen without validators, but never cache a half catalog
+            return None
+
+        new_validators = {
+            name: {"etag": resp.etag, "last_modified": resp.last_modified}
+            for name, resp in resources.items()
+        }
+
+        if categories.not_modified and brands.not_modified:
+            entry.fetched_at = time.monotonic()
+            entry.validators = new_validators
+            logger.info(f"Katalog o'zgarmagan (version={entry.version})")
+            return entry
+
+        category_data = entry.categories if categories.not_modified else categories.data
+        brand_data = entry.brands if brands.not_modified else brands.data
+        if not category_data or not brand_data:
+            return entry
+
+        version = _catalog_version(category_data, brand_data)
+        if entry is not None and entry.version == version:
+            # Same content: keep the existing objects so derived indexes stay valid
+            entry.fetched_at = time.monotonic()
+            entry.validators = new_validators
+            return entry
+
+        new_entry = CatalogEntry(
+            categories=category_data,
+            brands=brand_data,
+            version=version,
+            fetched_at=time.monotonic(),
+            validators=new_validators,
+        )
+        self._entries[key] = new_entry
+        logger.info(
+            f"Katalog yuklandi: {len(category_data)} kategoriya, "
+            f"{len(brand_data)} brend (version={version})"
+        )
+        return new_entry
+
+    def _refresh_in_background(self, key: str, api_client: VenuSellerAPI) -> None:
+        with self._guard:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                with self._lock_for(key):
+                    self._refresh(key, api_client)
+            except Exception as e:
+                logger.warning(f"Background catalog refresh failed: {e}")
+            finally:
+                with self._guard:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="catalog-refresh", daemon=True).start()
+
+
+# Global catalog cache instance
+catalog_cache = CatalogCache()
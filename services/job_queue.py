@@ -0,0 +1,343 @@
+"""Queue of bulk upload tasks for worker processes (see worker.py)."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import settings
+from core.executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Task kinds
+TASK_EXCEL = "excel"
+TASK_RESUME = "resume"
+
+# Task statuses
+TASK_QUEUED = "queued"
+TASK_CLAIMED = "claimed"
+TASK_DONE = "done"
+TASK_FAILED = "failed"
+
+# Progress messages older than this are deleted
+_EVENTS_TTL_SECONDS = 7 * 24 * 3600
+
+
+@dataclass
+class QueuedTask:
+    """A claimed task as seen by a worker."""
+
+    task_id: str
+    kind: str
+    payload: Dict[str, Any]
+    credentials: Dict[str, Any]
+    data: Optional[bytes]
+    attempts: int
+
+
+class JobQueue(ABC):
+    """
+    Bulk upload task queue shared by the web process and the workers.
+
+    The web process enqueues tasks and relays their progress messages to
+    WebSocket clients; workers claim tasks one at a time, heartbeat while
+    running them and publish progress messages. Tasks of workers that stop
+    heartbeating are handed to another worker.
+    """
+
+    @abstractmethod
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        credentials: Optional[Dict[str, Any]] = None,
+        data: Optional[bytes] = None,
+    ) -> str:
+        """Add a task; ``credentials`` and ``data`` are dropped once it finishes."""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[QueuedTask]:
+        """Take the oldest queued task, or None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        """
+        Tell the queue the worker of a claimed task is alive.
+
+        Returns False if the task is no longer claimed by ``worker_id``
+        (it was requeued and possibly given to another worker).
+        """
+
+    @abstractmethod
+    def update_payload(self, task_id: str, payload: Dict[str, Any]) -> None:
+        """Replace the payload (e.g. record the job ID created by the task)."""
+
+    @abstractmethod
+    def complete(self, task_id: str, worker_id: Optional[str] = None) -> None:
+        """Mark a claimed task done (only if still claimed by ``worker_id``, if given)."""
+
+    @abstractmethod
+    def fail(self, task_id: str, error: str, worker_id: Optional[str] = None) -> None:
+        """Mark a claimed task failed (only if still claimed by ``worker_id``, if given)."""
+
+    @abstractmethod
+    def release(self, task_id: str, worker_id: Optional[str] = None) -> None:
+        """Put a claimed task back in the queue (worker shutting down)."""
+
+    @abstractmethod
+    def requeue_stale(self, stale_seconds: float) -> int:
+        """Requeue claimed tasks without a heartbeat for ``stale_seconds``."""
+
+    @abstractmethod
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Task status and payload (without credentials/data), or None."""
+
+    @abstractmethod
+    def publish(self, task_id: str, message: str) -> None:
+        """Append a progress message of a task."""
+
+    @abstractmethod
+    def events_after(self, last_id: int, limit: int = 500) -> List[Tuple[int, str, str]]:
+        """Progress messages newer than ``last_id`` as (id, task_id, message)."""
+
+    @abstractmethod
+    def last_event_id(self) -> int:
+        """ID of the newest progress message (0 if there is none)."""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_queue (
+    task_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL DEFAULT '{}',
+    credentials TEXT,
+    data BLOB,
+    status TEXT NOT NULL,
+    worker_id TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    claimed_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_job_queue_status ON job_queue(status, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    message TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_events_created ON job_events(created_at);
+"""
+
+
+class SqliteJobQueue(JobQueue):
+    """
+    Local queue backend in a SQLite database (WAL mode).
+
+    Needs no external service; every web and worker process on the same
+    machine (or sharing the volume) opens the same file. Claims run in
+    ``BEGIN IMMEDIATE`` transactions, so a task goes to exactly one worker.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or settings.jobs_db_path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        credentials: Optional[Dict[str, Any]] = None,
+        data: Optional[bytes] = None,
+    ) -> str:
+        task_id = uuid.uuid4().hex[:12]
+        self._connection().execute(
+            "INSERT INTO job_queue(task_id, kind, payload, credentials, data, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                task_id,
+                kind,
+                json.dumps(payload, ensure_ascii=False),
+                json.dumps(credentials) if credentials is not None else None,
+                data,
+                TASK_QUEUED,
+                time.time(),
+            ),
+        )
+        return task_id
+
+    def claim(self, worker_id: str) -> Optional[QueuedTask]:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM job_queue WHERE status = ? ORDER BY created_at LIMIT 1",
+                (TASK_QUEUED,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE job_queue SET status = ?, worker_id = ?, attempts = attempts + 1, "
+                    "claimed_at = ?, heartbeat_at = ? WHERE task_id = ?",
+                    (TASK_CLAIMED, worker_id, now, now, row["task_id"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        if row is None:
+            return None
+        return QueuedTask(
+            task_id=row["task_id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            credentials=json.loads(row["credentials"]) if row["credentials"] else {},
+            data=row["data"],
+            attempts=row["attempts"] + 1,
+        )
+
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        return self._connection().execute(
+            "UPDATE job_queue SET heartbeat_at = ? "
+            "WHERE task_id = ? AND status = ? AND worker_id = ?",
+            (time.time(), task_id, TASK_CLAIMED, worker_id),
+        ).rowcount == 1
+
+    def update_payload(self, task_id: str, payload: Dict[str, Any]) -> None:
+        self._connection().execute(
+            "UPDATE job_queue SET payload = ? WHERE task_id = ?",
+            (json.dumps(payload, ensure_ascii=False), task_id),
+        )
+
+    def _finish(
+        self,
+        task_id: str,
+        status: str,
+        error: Optional[str] = None,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        # Credentials and the uploaded file are only needed while the task can run
+        self._connection().execute(
+            "UPDATE job_queue SET status = ?, error = ?, finished_at = ?, "
+            "credentials = NULL, data = NULL "
+            "WHERE task_id = ? AND (? IS NULL OR worker_id = ?)",
+            (status, error, time.time(), task_id, worker_id, worker_id),
+        )
+
+    def complete(self, task_id: str, worker_id: Optional[str] = None) -> None:
+        self._finish(task_id, TASK_DONE, worker_id=worker_id)
+
+    def fail(self, task_id: str, error: str, worker_id: Optional[str] = None) -> None:
+        self._finish(task_id, TASK_FAILED, error, worker_id=worker_id)
+
+    def release(self, task_id: str, worker_id: Optional[str] = None) -> None:
+        self._connection().execute(
+            "UPDATE job_queue SET status = ?, worker_id = NULL "
+            "WHERE task_id = ? AND status = ? AND (? IS NULL OR worker_id = ?)",
+            (TASK_QUEUED, task_id, TASK_CLAIMED, worker_id, worker_id),
+        )
+
+    def requeue_stale(self, stale_seconds: float) -> int:
+        conn = self._connection()
+        now = time.time()
+        requeued = conn.execute(
+            "UPDATE job_queue SET status = ?, worker_id = NULL "
+            "WHERE status = ? AND heartbeat_at < ?",
+            (TASK_QUEUED, TASK_CLAIMED, now - stale_seconds),
+        ).rowcount
+        if requeued:
+            logger.warning(f"Requeued {requeued} tasks of unresponsive workers")
+        conn.execute(
+            "DELETE FROM job_events WHERE created_at < ?", (now - _EVENTS_TTL_SECONDS,)
+        )
+        return requeued
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT task_id, kind, payload, status, worker_id, attempts, error, "
+            "created_at, claimed_at, finished_at FROM job_queue WHERE task_id = ?",
+            (task_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        task = dict(row)
+        task["payload"] = json.loads(task["payload"])
+        return task
+
+    def publish(self, task_id: str, message: str) -> None:
+        self._connection().execute(
+            "INSERT INTO job_events(task_id, message, created_at) VALUES (?, ?, ?)",
+            (task_id, message, time.time()),
+        )
+
+    def events_after(self, last_id: int, limit: int = 500) -> List[Tuple[int, str, str]]:
+        rows = self._connection().execute(
+            "SELECT id, task_id, message FROM job_events WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, limit),
+        ).fetchall()
+        return [(row["id"], row["task_id"], row["message"]) for row in rows]
+
+    def last_event_id(self) -> int:
+        row = self._connection().execute("SELECT MAX(id) FROM job_events").fetchone()
+        return row[0] or 0
+
+
+class QueueEventPublisher:
+    """
+    Progress sink for :class:`BulkUploadService` inside a worker.
+
+    Has the ``broadcast`` method of ``ConnectionManager``; messages go to
+    the queue, and the web process relays them to WebSocket clients.
+    """
+
+    def __init__(self, queue: JobQueue, task_id: str):
+        self.queue = queue
+        self.task_id = task_id
+
+    async def broadcast(self, message: str) -> None:
+        await run_blocking(self.queue.publish, self.task_id, message)
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Get the configured queue backend (``settings.bulk_queue_backend``).
+
+    Raises:
+        ValueError: If the backend is unknown or the queue is disabled
+    """
+    global _queue
+    if _queue is None:
+        backend = settings.bulk_queue_backend
+        if backend == "sqlite":
+            _queue = SqliteJobQueue()
+        else:
+            raise ValueError(f"No job queue for bulk_queue_backend={backend!r}")
+    return _queue
@@ -0,0 +1,391 @@
+"""Durable bulk upload jobs: per-row stage outputs in SQLite, so jobs can resume."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_INTERRUPTED = "interrupted"
+
+# Row statuses
+ROW_PENDING = "pending"
+ROW_DONE = "done"
+ROW_FAILED = "failed"
+ROW_SKIPPED = "skipped"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bulk_jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT NOT NULL DEFAULT '',
+    email TEXT NOT NULL DEFAULT '',
+    options TEXT NOT NULL DEFAULT '{}',
+    total_rows INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    metrics TEXT,
+    lease TEXT,
+    lease_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bulk_job_rows (
+    job_id TEXT NOT NULL,
+    row_index INTEGER NOT NULL,
+    input TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    stages TEXT NOT NULL DEFAULT '{}',
+    product_id TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, row_index)
+);
+CREATE INDEX IF NOT EXISTS idx_bulk_jobs_created ON bulk_jobs(created_at);
+"""
+
+# Columns added after the tables were first created: (table, column, type)
+_ADDED_COLUMNS = (
+    ("bulk_jobs", "metrics", "TEXT"),
+    ("bulk_jobs", "lease", "TEXT"),
+    ("bulk_jobs", "lease_at", "REAL"),
+)
+
+
+def _add_missing_columns(conn: sqlite3.Connection) -> None:
+    for table, column, column_type in _ADDED_COLUMNS:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column in existing:
+            continue
+        try:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        except sqlite3.OperationalError as e:
+            # Another process added it first
+            if "duplicate column" not in str(e):
+                raise
+
+
+class JobStore:
+    """
+    Bulk upload jobs and the outputs of every stage of every row.
+
+    Each finished stage (generated text, images, category, params,
+    uploaded image names, created product ID) is written as soon as it
+    completes, so a job resumed after a restart only runs the stages that
+    are still missing.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or settings.jobs_db_path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.executescript(_SCHEMA)
+            _add_missing_columns(conn)
+            self._local.conn = conn
+        return conn
+
+    # ---------------------------
+    # Jobs
+    # ---------------------------
+
+    def create_job(
+        self,
+        rows: List[List[Any]],
+        filename: str = "",
+        email: str = "",
+        options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Store a new job with its input rows.
+
+        Args:
+            rows: Cell values of each Excel row (name, brand, price, ...)
+            filename: Uploaded file name
+            email: Venu account (the password is never stored)
+            options: Processing options (image search site etc.)
+
+        Returns:
+            str: New job ID
+        """
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO bulk_jobs"
+                "(job_id, status, filename, email, options, total_rows, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    JOB_PENDING,
+                    filename,
+                    email,
+                    json.dumps(options or {}),
+                    len(rows),
+                    now,
+                    now,
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO bulk_job_rows(job_id, row_index, input, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    (job_id, index, json.dumps(values, ensure_ascii=False, default=str), now)
+                    for index, values in enumerate(rows)
+                ),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        self._connection().execute(
+            "UPDATE bulk_jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?",
+            (status, error, time.time(), job_id),
+        )
+
+    def claim(self, job_id: str, lease: Optional[str] = None) -> bool:
+        """
+        Mark a job running unless it already is (or is finished).
+
+        Args:
+            job_id: Job ID
+            lease: Token of the worker run (see :meth:`take_over`); a running
+                job whose lease the caller already holds can be claimed
+
+        Returns:
+            bool: True if the caller may run the job
+        """
+        now = time.time()
+        cursor = self._connection().execute(
+            "UPDATE bulk_jobs SET status = ?, error = NULL, lease = ?, lease_at = ?, "
+            "updated_at = ? WHERE job_id = ? AND status != ? AND (status != ? OR lease = ?)",
+            (JOB_RUNNING, lease, now, now, job_id, JOB_COMPLETED, JOB_RUNNING, lease),
+        )
+        return cursor.rowcount == 1
+
+    def take_over(self, job_id: str, lease: str, stale_seconds: float) -> bool:
+        """
+        Take a job over from a worker that stopped renewing its lease.
+
+        A job that is not running needs no takeover. A running job is only
+        taken over once its lease is ``stale_seconds`` old, so a worker that
+        is slow but alive keeps it.
+
+        Returns:
+            bool: True if the caller may claim the job with ``lease``
+        """
+        now = time.time()
+        conn = self._connection()
+        taken = conn.execute(
+            "UPDATE bulk_jobs SET lease = ?, lease_at = ? WHERE job_id = ? AND status = ? "
+            "AND (lease IS NULL OR lease = ? OR lease_at IS NULL OR lease_at < ?)",
+            (lease, now, job_id, JOB_RUNNING, lease, now - stale_seconds),
+        ).rowcount
+        if taken:
+            return True
+        row = conn.execute("SELECT status FROM bulk_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row is not None and row["status"] != JOB_RUNNING
+
+    def renew_lease(self, job_id: str, lease: str) -> bool:
+        """
+        Refresh the lease of a job the caller runs.
+
+        Returns:
+            bool: False if another worker has taken the job over
+        """
+        conn = self._connection()
+        if conn.execute(
+            "UPDATE bulk_jobs SET lease_at = ? WHERE job_id = ? AND lease = ?",
+            (time.time(), job_id, lease),
+        ).rowcount:
+            return True
+        # Not claimed by anyone yet
+        row = conn.execute("SELECT lease FROM bulk_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row is not None and row["lease"] is None
+
+    def holds_lease(self, job_id: str, lease: str) -> bool:
+        """True if the job is still leased to ``lease``."""
+        row = self._connection().execute(
+            "SELECT lease FROM bulk_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return row is not None and row["lease"] == lease
+
+    def mark_interrupted(self) -> int:
+        """
+        Flag jobs left ``running`` by a previous process (call at startup).
+
+        Returns:
+            int: Number of interrupted jobs
+        """
+        return self._connection().execute(
+            "UPDATE bulk_jobs SET status = ?, updated_at = ? WHERE status = ?",
+            (JOB_INTERRUPTED, time.time(), JOB_RUNNING),
+        ).rowcount
+
+    def save_metrics(self, job_id: str, summary: Dict[str, Any]) -> None:
+        """Store the stage timing summary of a job (``JobMetrics.summary``)."""
+        self._connection().execute(
+            "UPDATE bulk_jobs SET metrics = ? WHERE job_id = ?",
+            (json.dumps(summary), job_id),
+        )
+
+    def recent_metrics(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Stored stage timing summaries, most recent jobs first.
+
+        Jobs run by worker processes are only visible to the API this way:
+        their spans are collected in the worker's memory.
+        """
+        rows = self._connection().execute(
+            "SELECT metrics FROM bulk_jobs WHERE metrics IS NOT NULL "
+            "ORDER BY created_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [json.loads(row["metrics"]) for row in rows]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job with row counts per status, or None."""
+        conn = self._connection()
+        row = conn.execute("SELECT * FROM bulk_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return self._job_dict(row, self._row_counts(conn, [job_id]).get(job_id, {}))
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent jobs first."""
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT * FROM bulk_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        counts = self._row_counts(conn, [row["job_id"] for row in rows])
+        return [self._job_dict(row, counts.get(row["job_id"], {})) for row in rows]
+
+    @staticmethod
+    def _row_counts(
+        conn: sqlite3.Connection, job_ids: List[str]
+    ) -> Dict[str, Dict[str, int]]:
+        if not job_ids:
+            return {}
+        placeholders = ",".join("?" * len(job_ids))
+        counts: Dict[str, Dict[str, int]] = {}
+        for job_id, status, count in conn.execute(
+            f"SELECT job_id, status, COUNT(*) FROM bulk_job_rows "
+            f"WHERE job_id IN ({placeholders}) GROUP BY job_id, status",
+            job_ids,
+        ):
+            counts.setdefault(job_id, {})[status] = count
+        return counts
+
+    @staticmethod
+    def _job_dict(row: sqlite3.Row, counts: Dict[str, int]) -> Dict[str, Any]:
+        job = dict(row)
+        for internal in ("metrics", "lease", "lease_at"):
+            job.pop(internal, None)
+        job["options"] = json.loads(job["options"])
+        job["rows"] = counts
+        return job
+
+    # ---------------------------
+    # Rows
+    # ---------------------------
+
+    def unfinished_rows(self, job_id: str) -> List[Tuple[int, List[Any], Dict[str, Any]]]:
+        """
+        Rows that still need work (not ``done``), with their saved stage outputs.
+
+        Returns:
+            List of (row_index, input values, {stage: output})
+        """
+        rows = self._connection().execute(
+            "SELECT row_index, input, stages FROM bulk_job_rows "
+            "WHERE job_id = ? AND status != ? ORDER BY row_index",
+            (job_id, ROW_DONE),
+        ).fetchall()
+        return [
+            (row["row_index"], json.loads(row["input"]), json.loads(row["stages"]))
+            for row in rows
+        ]
+
+    def job_rows(self, job_id: str) -> List[Dict[str, Any]]:
+        """Status, product ID and error of every row (stage outputs excluded)."""
+        rows = self._connection().execute(
+            "SELECT row_index, input, status, product_id, error, stages "
+            "FROM bulk_job_rows WHERE job_id = ? ORDER BY row_index",
+            (job_id,),
+        ).fetchall()
+        return [
+            {
+                "row_index": row["row_index"],
+                "input": json.loads(row["input"]),
+                "status": row["status"],
+                "product_id": row["product_id"],
+                "error": row["error"],
+                "completed_stages": sorted(json.loads(row["stages"])),
+            }
+            for row in rows
+        ]
+
+    def save_stage(self, job_id: str, row_index: int, stage: str, output: Any) -> None:
+        """Persist the output of one finished stage of a row."""
+        self._connection().execute(
+            "UPDATE bulk_job_rows SET stages = json_set(stages, ?, json(?)), updated_at = ? "
+            "WHERE job_id = ? AND row_index = ?",
+            (
+                f"$.{stage}",
+                json.dumps(output, ensure_ascii=False, default=str),
+                time.time(),
+                job_id,
+                row_index,
+            ),
+        )
+
+    def finish_row(
+        self,
+        job_id: str,
+        row_index: int,
+        status: str,
+        product_id: Optional[Any] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        self._connection().execute(
+            "UPDATE bulk_job_rows SET status = ?, product_id = ?, error = ?, updated_at = ? "
+            "WHERE job_id = ? AND row_index = ?",
+            (
+                status,
+                str(product_id) if product_id is not None else None,
+                error,
+                time.time(),
+                job_id,
+                row_index,
+            ),
+        )
+
+
+# Global job store instance
+job_store = JobStore()
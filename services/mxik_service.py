@@ -0,0 +1,105 @@
+"""In-memory MXIK code lookup keyed by sub-sub-category ID."""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from services.mxik_store import MxikStore, mxik_store
+
+logger = logging.getLogger(__name__)
+
+# Returned when a category has no MXIK row
+DEFAULT_CODES: Tuple[Any, Any] = (0, 0)
+
+
+def _as_int(value: Any) -> Any:
+    """Convert stored numeric text to int, leaving other text untouched."""
+    if value is None or value == "":
+        return 0
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        try:
+            return int(float(value))
+        except (ValueError, TypeError):
+            return value
+
+
+def _as_category_id(value: Any) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return None
+
+
+class MxikCodeIndex:
+    """
+    Loads the MXIK table once into a dict and serves O(1) lookups.
+
+    The dict is rebuilt when the store's generation counter changes (checked
+    at most every ``check_interval`` seconds, so edits from other processes
+    are picked up) or immediately after :meth:`invalidate`.
+    """
+
+    def __init__(self, store: MxikStore = mxik_store, check_interval: float = 1.0):
+        self.store = store
+        self.check_interval = check_interval
+        self._codes: Dict[int, Tuple[Any, Any]] = {}
+        self._generation: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        codes: Dict[int, Tuple[Any, Any]] = {}
+        for category_id, (mxik, package_code) in self.store.codes_by_category().items():
+            search_id = _as_category_id(category_id)
+            # Header/blank rows have no numeric ID
+            if search_id is not None:
+                codes.setdefault(search_id, (_as_int(mxik), _as_int(package_code)))
+
+        self._codes = codes
+        logger.info(f"MXIK kodlari yuklandi: {len(codes)} ta kategoriya")
+
+    def _ensure_fresh(self) -> None:
+        now = time.monotonic()
+        if self._generation is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            generation = self.store.generation()
+            if generation != self._generation:
+                self._load()
+                self._generation = generation
+
+    def invalidate(self) -> None:
+        """Force a reload on the next lookup."""
+        with self._lock:
+            self._generation = None
+            self._checked_at = 0.0
+
+    def lookup(self, sub_sub_category_id: Optional[Any]) -> Tuple[Any, Any]:
+        """
+        Get (mxik_code, package_code) for a sub-sub-category.
+
+        Args:
+            sub_sub_category_id: Category ID (int or numeric string)
+
+        Returns:
+            Tuple[Any, Any]: Codes, or (0, 0) if not found
+        """
+        search_id = _as_category_id(sub_sub_category_id)
+        if search_id is None:
+            return DEFAULT_CODES
+
+        try:
+            self._ensure_fresh()
+        except Exception as e:
+            logger.error(f"Error reading MXIK codes: {e}")
+            return DEFAULT_CODES
+
+        return self._codes.get(search_id, DEFAULT_CODES)
+
+
+# Global MXIK index instance
+mxik_codes = MxikCodeIndex()
@@ -0,0 +1,313 @@
+"""SQLite-backed MXIK code table (Excel is only an import/export format)."""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from core.config import settings
+from core.constants import MXIK_EXCEL_PATH
+
+logger = logging.getLogger(__name__)
+
+# Column order of the Excel sheet (no header row in the file format)
+MXIK_COLUMNS = ("category_id", "name", "mxik_code", "package_code")
+
+# LIKE wildcards and the escape character itself
+_LIKE_ESCAPE_RE = re.compile(r"[\\%_]")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mxik_codes (
+    row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL DEFAULT '',
+    mxik_code TEXT NOT NULL DEFAULT '',
+    package_code TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_mxik_codes_category_id ON mxik_codes(category_id);
+CREATE TABLE IF NOT EXISTS mxik_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _cell(value: Any) -> str:
+    """Convert a cell/JSON value to the stored text form."""
+    if value is None:
+        return ""
+    try:
+        if pd.isna(value):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+
+class MxikStore:
+    """
+    MXIK rows in SQLite (WAL mode).
+
+    Every edit is a single short transaction, so concurrent edits from the
+    web UI no longer overwrite each other and a single-row change does not
+    rewrite the whole table. A ``generation`` counter in ``mxik_meta`` is
+    bumped on every write so readers in any process can detect changes.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        seed_excel_path: str = MXIK_EXCEL_PATH,
+    ):
+        self.db_path = db_path or settings.mxik_db_path
+        self.seed_excel_path = seed_excel_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    # ---------------------------
+    # Connection handling
+    # ---------------------------
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        if not self._initialized:
+            self._initialize(conn)
+        return conn
+
+    def _initialize(self, conn: sqlite3.Connection) -> None:
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn.executescript(_SCHEMA)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                seeded = conn.execute(
+                    "SELECT value FROM mxik_meta WHERE key = 'seeded'"
+                ).fetchone()
+                if seeded is None and os.path.exists(self.seed_excel_path):
+                    # One-time migration from the legacy Excel file
+                    df = pd.read_excel(self.seed_excel_path, header=None, dtype=str)
+                    self._replace_all(conn, df)
+                    logger.info(f"MXIK jadvali Excel fayldan ko'chirildi: {len(df)} qator")
+                conn.execute(
+                    "INSERT OR IGNORE INTO mxik_meta(key, value) VALUES ('seeded', '1')"
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._initialized = True
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction that also bumps the generation counter."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute(
+                "INSERT INTO mxik_meta(key, value) VALUES ('generation', '1') "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---------------------------
+    # Reads
+    # ---------------------------
+
+    def generation(self) -> int:
+        """Change counter; increases on every write from any process."""
+        row = self._connection().execute(
+            "SELECT value FROM mxik_meta WHERE key = 'generation'"
+        ).fetchone()
+        return int(row["value"]) if row else 0
+
+    def all_rows(self) -> List[Dict[str, Any]]:
+        """All rows in sheet order as dicts (row_id + MXIK_COLUMNS)."""
+        cursor = self._connection().execute(
+            "SELECT row_id, category_id, name, mxik_code, package_code "
+            "FROM mxik_codes ORDER BY row_id"
+        )
+        return [dict(row) for row in cursor]
+
+    def query_rows(
+        self,
+        search: Optional[str] = None,
+        category_id: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        One page of rows in sheet order, filtered in SQL.
+
+        Args:
+            search: Case-insensitive substring of name, MXIK or package code
+            category_id: Exact category ID filter
+            limit: Page size
+            offset: Rows to skip (ignored when ``cursor`` is given)
+            cursor: ``next_cursor`` of the previous page (keyset pagination)
+
+        Returns:
+            Dict with ``items``, ``total`` (rows matching the filters) and
+            ``next_cursor`` (None on the last page)
+        """
+        where: List[str] = []
+        params: List[Any] = []
+        if search:
+            pattern = "%" + _LIKE_ESCAPE_RE.sub(r"\\\g<0>", search.strip()) + "%"
+            where.append(
+                "(name LIKE ? ESCAPE '\\' OR mxik_code LIKE ? ESCAPE '\\' "
+                "OR package_code LIKE ? ESCAPE '\\')"
+            )
+            params.extend([pattern] * 3)
+        if category_id:
+            where.append("category_id = ?")
+            params.append(str(category_id).strip())
+        filters = " AND ".join(where) or "1"
+
+        conn = self._connection()
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM mxik_codes WHERE {filters}", params
+        ).fetchone()[0]
+
+        page_filters, page_params = filters, list(params)
+        if cursor is not None:
+            page_filters += " AND row_id > ?"
+            page_params.append(cursor)
+            offset = 0
+        # One extra row tells whether another page exists
+        rows = conn.execute(
+            "SELECT row_id, category_id, name, mxik_code, package_code "
+            f"FROM mxik_codes WHERE {page_filters} ORDER BY row_id LIMIT ? OFFSET ?",
+            (*page_params, limit + 1, offset),
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        columns = ("row_id",) + MXIK_COLUMNS
+        return {
+            "items": [dict(zip(columns, row)) for row in rows],
+            "total": total,
+            "next_cursor": rows[-1][0] if has_more else None,
+        }
+
+    def count(self) -> int:
+        cursor = self._connection().execute("SELECT COUNT(*) FROM mxik_codes")
+        return cursor.fetchone()[0]
+
+    def codes_by_category(self) -> Dict[str, Tuple[str, str]]:
+        """{category_id: (mxik_code, package_code)}; the first row per category wins."""
+        cursor = self._connection().execute(
+            "SELECT category_id, mxik_code, package_code FROM mxik_codes ORDER BY row_id"
+        )
+        codes: Dict[str, Tuple[str, str]] = {}
+        for category_id, mxik_code, package_code in cursor:
+            codes.setdefault(category_id.strip(), (mxik_code, package_code))
+        return codes
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+
+    def update_rows(self, updates: List[Dict[str, Any]]) -> int:
+        """
+        Apply partial updates ``{"row_id": ..., <column>: value}``.
+
+        Returns:
+            int: Number of rows changed
+        """
+        changed = 0
+        with self._write() as conn:
+            for update in updates:
+                try:
+                    row_id = int(update.get("row_id"))
+                except (ValueError, TypeError):
+                    continue
+                fields = [column for column in MXIK_COLUMNS if column in update]
+                if not fields:
+                    continue
+                assignments = ", ".join(f"{column} = ?" for column in fields)
+                values = [_cell(update[column]) for column in fields]
+                cursor = conn.execute(
+                    f"UPDATE mxik_codes SET {assignments} WHERE row_id = ?",
+                    (*values, row_id),
+                )
+                changed += cursor.rowcount
+        return changed
+
+    def add_row(self, item: Dict[str, Any]) -> int:
+        """Append a row and return its row_id."""
+        with self._write() as conn:
+            cursor = conn.execute(
+                "INSERT INTO mxik_codes(category_id, name, mxik_code, package_code) "
+                "VALUES (?, ?, ?, ?)",
+                tuple(_cell(item.get(column)) for column in MXIK_COLUMNS),
+            )
+            return cursor.lastrowid
+
+    def delete_row(self, row_id: int) -> bool:
+        """Delete a row; returns False if it did not exist."""
+        with self._write() as conn:
+            cursor = conn.execute("DELETE FROM mxik_codes WHERE row_id = ?", (row_id,))
+            return cursor.rowcount > 0
+
+    def replace_from_dataframe(self, df: pd.DataFrame) -> int:
+        """Replace the whole table with a 4-column DataFrame (Excel import)."""
+        with self._write() as conn:
+            self._replace_all(conn, df)
+        return len(df)
+
+    @staticmethod
+    def _replace_all(conn: sqlite3.Connection, df: pd.DataFrame) -> None:
+        conn.execute("DELETE FROM mxik_codes")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'mxik_codes'")
+        frame = df.iloc[:, : len(MXIK_COLUMNS)]
+        rows = (
+            tuple(_cell(value) for value in values)
+            + ("",) * (len(MXIK_COLUMNS) - len(values))
+            for values in frame.itertuples(index=False, name=None)
+        )
+        conn.executemany(
+            "INSERT INTO mxik_codes(category_id, name, mxik_code, package_code) "
+            "VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+    # ---------------------------
+    # Excel import/export
+    # ---------------------------
+
+    def export_excel(self) -> bytes:
+        """Render the table in the legacy sheet format (4 columns, no header)."""
+        df = pd.DataFrame(
+            [[row[column] for column in MXIK_COLUMNS] for row in self.all_rows()],
+            columns=list(MXIK_COLUMNS),
+        )
+        buffer = BytesIO()
+        df.to_excel(buffer, index=False, header=False)
+        return buffer.getvalue()
+
+
+# Global MXIK store instance
+mxik_store = MxikStore()
@@ -3,16 +3,28 @@
 import logging
 import os
 from pathlib import Path
-from typing import Any, List, Optional, Tuple
-
-import pandas as pd
-
-from agent import generate_product_text, select_category_brand
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+from agent import (
+    aselect_category_brand,
+    agenerate_product_text,
+    agenerate_product_texts,
+    astream_product_text,
+    generate_product_text,
+    select_category_brand,
+)
 from agent.category_brand.schemas import CategoryBrandSelectionSchema
-from agent.product.schemas import ProductGenSchema
+from agent.product.agent import ProductTextResult
+from agent.product.schemas import ProductGenSchema, ProductTextRequest
 from api import VenuSellerAPI
 from core.config import settings
 from core.constants import DEFAULT_FALLBACK_IMAGE
+from core.executor import run_blocking
+from core.image_cache import image_cache
+from core.image_format import EncodedImage
+from core.metrics import span
+from services.catalog_cache import catalog_cache
+from services.mxik_service import mxik_codes
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +41,10 @@ class ShopSaveError(ProductServiceError):
     pass
 
 
+# Fallback image used when DEFAULT_FALLBACK_IMAGE is missing
+_DEFAULT_PRODUCT_IMAGE = str(Path("media/products") / "default_product.png")
+
+
 def get_default_image_path() -> str:
     """
     Get default image path for products.
@@ -40,13 +56,28 @@ def get_default_image_path() -> str:
         return DEFAULT_FALLBACK_IMAGE
 
     # Create media/products directory if it doesn't exist
-    media_dir = Path("media/products")
+    media_dir = Path(_DEFAULT_PRODUCT_IMAGE).parent
     media_dir.mkdir(parents=True, exist_ok=True)
 
     # Return default path (will be created if needed)
-    default_path = str(media_dir / "default_product.png")
-    logger.info(f"Using default image path: {default_path}")
-    return default_path
+    logger.info(f"Using default image path: {_DEFAULT_PRODUCT_IMAGE}")
+    return _DEFAULT_PRODUCT_IMAGE
+
+
+def _is_default_image(path: str) -> bool:
+    """True for the shared fallback images (used by many rows, never deleted)."""
+    real_path = os.path.realpath(path)
+    return real_path in (
+        os.path.realpath(DEFAULT_FALLBACK_IMAGE),
+        os.path.realpath(_DEFAULT_PRODUCT_IMAGE),
+    )
+
+
+def _image_location(image: Union[str, EncodedImage]) -> str:
+    """Path of an image, or its file name if it only exists in memory."""
+    if isinstance(image, str):
+        return image
+    return image.path or image.name
 
 
 class ProductService:
@@ -87,58 +118,23 @@ class ProductService:
         sub_sub_category_id: Optional[Any] = None
     ) -> Tuple[Any, Any]:
         """
-        Get MXIK and package codes from Excel file.
-        Tries sub_sub_sub_category_id first, then falls back to sub_sub_category_id.
+        Get MXIK and package codes for a sub-sub-category.
 
         Args:
-            sub_sub_sub_category_id: Sub-sub-sub-category ID to look up (takes priority)
+            sub_sub_category_id: Sub-sub-category ID to look up
 
         Returns:
             Tuple[any, any]: (mxik_code, package_code) - can be int or str
         """
-        default_mxik = 0
-        default_package = 0
-
-        # Try sub_sub_sub_category_id first if available
         if sub_sub_category_id is None:
             logger.info("Sub-sub-category ID not provided")
-            return default_mxik, default_package
+            return 0, 0
 
-        print(f"Looking up codes for sub-sub-category ID: {sub_sub_category_id}")
-
-        try:
-            excel_path = Path("api/mxik-codes.xlsx")
-            df = pd.read_excel(excel_path, header=None)
-            
-            # Convert sub_sub_category_id to int for comparison (Excel column is numeric)
-            try:
-                search_id = int(sub_sub_category_id) if sub_sub_category_id is not None else None
-            except (ValueError, TypeError):
-                search_id = sub_sub_category_id
-            
-            # Convert Excel column 0 to numeric for proper comparison
-            df[0] = pd.to_numeric(df[0], errors='coerce')
-            
-            match = df[df[0] == search_id]
-            if not match.empty:
-                mxik = match.iloc[0, 2]
-                package_code = match.iloc[0, 3]
-                try:
-                    if pd.notna(mxik):
-                        mxik = int(mxik)
-                    if pd.notna(package_code):
-                        package_code = int(package_code)
-                except:
-                    pass
-                return mxik, package_code
-            return default_mxik, default_package
-
-        except Exception as e:
-            logger.error(f"Error reading MXIK codes from Excel: {e}")
-            return default_mxik, default_package
+        logger.debug(f"Looking up codes for sub-sub-category ID: {sub_sub_category_id}")
+        return mxik_codes.lookup(sub_sub_category_id)
 
     def generate_product_content(
-        self, name: str, brand: str, price: int, stock: int
+        self, name: str, brand: str, price: int, stock: int, use_cache: bool = True
     ) -> ProductGenSchema:
         """
         Generate product text content using AI.
@@ -148,12 +144,62 @@ class ProductService:
             brand: Product brand
             price: Product price
             stock: Product stock
+            use_cache: Reuse a cached result for identical inputs (default: True)
 
         Returns:
             ProductGenSchema: Generated product content
         """
         logger.info(f"Generating product content: {name} ({brand})")
-        return generate_product_text(name=name, brand=brand, price=price, stock=stock)
+        return generate_product_text(
+            name=name, brand=brand, price=price, stock=stock, use_cache=use_cache
+        )
+
+    async def agenerate_product_content(
+        self, name: str, brand: str, price: int, stock: int, use_cache: bool = True
+    ) -> ProductGenSchema:
+        """Async counterpart of :meth:`generate_product_content`."""
+        logger.info(f"Generating product content: {name} ({brand})")
+        return await agenerate_product_text(
+            name=name, brand=brand, price=price, stock=stock, use_cache=use_cache
+        )
+
+    async def astream_product_content(
+        self, name: str, brand: str, price: int, stock: int, use_cache: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream product text generation events (see ``astream_product_text``).
+
+        Args:
+            name: Product name
+            brand: Product brand
+            price: Product price
+            stock: Product stock
+            use_cache: Reuse a cached result for identical inputs (default: True)
+
+        Yields:
+            Dict[str, Any]: Field deltas, then the validated product
+        """
+        logger.info(f"Streaming product content: {name} ({brand})")
+        async for event in astream_product_text(
+            name=name, brand=brand, price=price, stock=stock, use_cache=use_cache
+        ):
+            yield event
+
+    async def agenerate_product_contents(
+        self, items: List[ProductTextRequest], use_cache: bool = True
+    ) -> List[ProductTextResult]:
+        """
+        Generate product text for several products in batched requests.
+
+        Args:
+            items: Products to generate
+            use_cache: Reuse cached results for identical inputs (default: True)
+
+        Returns:
+            List[ProductTextResult]: Product or exception per item, in input order
+        """
+        logger.info(f"Generating product content for {len(items)} products")
+        return await agenerate_product_texts(items, use_cache=use_cache)
 
     def get_product_images(
         self,
@@ -180,8 +226,8 @@ class ProductService:
         self,
         product: ProductGenSchema,
         category_selection: CategoryBrandSelectionSchema,
-        main_image_path: str,
-        additional_images_paths: List[str],
+        main_image_path: Union[str, EncodedImage],
+        additional_images_paths: List[Union[str, EncodedImage]],
         api_client: Optional[VenuSellerAPI] = None,
         product_params: Optional[dict] = None,
         price: int = 0,
@@ -190,13 +236,102 @@ class ProductService:
         """
         Save product to shop via Venu API.
 
+        Uploads the images (:meth:`upload_shop_images`), then creates the
+        product (:meth:`create_shop_product`).
+
+        Args:
+            product: ProductGenSchema instance
+            category_selection: CategoryBrandSelectionSchema instance
+            main_image_path: Main image (path or in-memory ``EncodedImage``)
+            additional_images_paths: Additional images (paths or ``EncodedImage``)
+            api_client: Optional VenuSellerAPI client (overrides default)
+            product_params: Optional dict with weight, height, width, length
+
+        Returns:
+            Tuple[bool, dict]: (success, response) - success status and API response
+        """
+        uploaded, upload_response = self.upload_shop_images(
+            main_image_path, additional_images_paths, api_client=api_client
+        )
+        if not uploaded:
+            return False, upload_response
+
+        return self.create_shop_product(
+            product=product,
+            category_selection=category_selection,
+            uploaded_images=upload_response,
+            main_image_path=main_image_path,
+            additional_images_paths=additional_images_paths,
+            api_client=api_client,
+            product_params=product_params,
+            price=price,
+            stock=stock,
+        )
+
+    def upload_shop_images(
+        self,
+        main_image_path: Union[str, EncodedImage],
+        additional_images_paths: List[Union[str, EncodedImage]],
+        api_client: Optional[VenuSellerAPI] = None,
+    ) -> Tuple[bool, dict]:
+        """
+        Upload product images to the shop (first half of :meth:`save_product_to_shop`).
+
+        Args:
+            main_image_path: Main image (path or in-memory ``EncodedImage``)
+            additional_images_paths: Additional images (paths or ``EncodedImage``)
+            api_client: Optional VenuSellerAPI client (overrides default)
+
+        Returns:
+            Tuple[bool, dict]: (success, uploaded image names or error response)
+        """
+        try:
+            venu_api = api_client if api_client else self._get_venu_api()
+            if not venu_api.token:
+                return False, {"status": "error", "message": "Not authenticated"}
+
+            uploaded = venu_api.upload_product_images(
+                main_image_path, additional_images_paths
+            )
+            if not uploaded:
+                logger.error("Do'konga rasm yuklashda xatolik: thumbnail yuklanmadi")
+                return False, {"status": "error", "message": "Failed to upload thumbnail"}
+            return True, uploaded
+
+        except ShopSaveError as e:
+            logger.error(f"Do'konga saqlashda xatolik: {e}")
+            return False, {"error": str(e)}
+        except Exception as e:
+            logger.error(f"Do'konga rasm yuklashda kutilmagan xatolik: {e}", exc_info=True)
+            return False, {"error": str(e)}
+
+    def create_shop_product(
+        self,
+        product: ProductGenSchema,
+        category_selection: CategoryBrandSelectionSchema,
+        uploaded_images: dict,
+        main_image_path: Union[str, EncodedImage],
+        additional_images_paths: List[Union[str, EncodedImage]],
+        api_client: Optional[VenuSellerAPI] = None,
+        product_params: Optional[dict] = None,
+        price: int = 0,
+        stock: int = 5,
+        on_created: Optional[Callable[[Any], None]] = None,
+    ) -> Tuple[bool, dict]:
+        """
+        Create the product from uploaded images, then clean up and publish it.
+
         Args:
             product: ProductGenSchema instance
             category_selection: CategoryBrandSelectionSchema instance
-            main_image_path: Path to main image
-            additional_images_paths: List of additional image paths
+            uploaded_images: Result of :meth:`upload_shop_images`
+            main_image_path: Main image, path or ``EncodedImage`` (used as meta image)
+            additional_images_paths: Images whose local files are deleted after success
             api_client: Optional VenuSellerAPI client (overrides default)
             product_params: Optional dict with weight, height, width, length
+            on_created: Called with the new product ID as soon as the product
+                exists, before cleanup and publishing (e.g. to record it, so
+                a resumed job does not create it twice)
 
         Returns:
             Tuple[bool, dict]: (success, response) - success status and API response
@@ -224,19 +359,19 @@ class ProductService:
             )
 
             # Add product to shop
-            result = venu_api.add_product(
+            result = venu_api.create_product(
                 name_ru=product.name_ru,
                 name_uz=product.name_uz,
                 description_ru=product.description_ru,
                 description_uz=product.description_uz,
-                meta_image=main_image_path,
+                meta_image=_image_location(main_image_path),
                 meta_title=product.meta_title,
                 meta_description=product.meta_description,
                 tags=product.tags,
                 price=price,
                 brand_id=category_selection.brand_id,
-                main_image_path=main_image_path,
-                additional_images_paths=additional_images_paths,
+                thumbnail=uploaded_images["thumbnail"],
+                images=uploaded_images["images"],
                 stock=stock,
                 category_id=category_selection.category_id,
                 sub_category_id=category_selection.sub_category_id,
@@ -255,39 +390,11 @@ class ProductService:
                 return False, result
 
             logger.info(f"Mahsulot muvaffaqiyatli do'konga saqlandi: {product.name_ru}")
-            
-            # Clean up downloaded images
-            for image_path in additional_images_paths:
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-                    logger.info(f"Rasm o'chirildi: {image_path}")
-                else:
-                    logger.warning(f"Rasm topilmadi: {image_path}")
 
-            # Clean up broken images and update status
-            try:
-                product_id = result.get("request", {}).get("id")
-                if product_id:
-                    # Clean up broken images (path is null and status is 404)
-                    logger.info(f"Rasmlarni tekshiryapman va buzilgan rasmlarni olib tashlayapman (product_id: {product_id})...")
-                    removed_count = venu_api.cleanup_broken_images(product_id)
-                    if removed_count > 0:
-                        logger.info(f"{removed_count} ta buzilgan rasm olib tashlandi (product_id: {product_id})")
-                    else:
-                        logger.info(f"Buzilgan rasm topilmadi (product_id: {product_id})")
-                    
-                    # Update product status to 1
-                    logger.info(f"Mahsulot statusini yangilayapman (product_id: {product_id}, status: 1)...")
-                    if venu_api.update_product_status(product_id, status=1):
-                        logger.info(f"Mahsulot statusi muvaffaqiyatli yangilandi (product_id: {product_id}, status: 1)")
-                    else:
-                        logger.warning(f"Mahsulot statusini yangilashda xatolik (product_id: {product_id})")
-                else:
-                    logger.warning(f"Product ID topilmadi, rasmlarni tozalash va status yangilash o'tkazib yuborildi. Response: {result}")
-            except Exception as e:
-                # Cleanup and status update failures should not affect product creation success
-                logger.warning(f"Rasmlarni tozalash yoki status yangilashda xatolik (product yaratilgan): {e}")
-            
+            product_id = result.get("request", {}).get("id")
+            if product_id and on_created is not None:
+                on_created(product_id)
+            self.finish_shop_product(product_id, additional_images_paths, venu_api)
             return True, result
 
         except ShopSaveError as e:
@@ -297,6 +404,69 @@ class ProductService:
             logger.error(f"Do'konga saqlashda kutilmagan xatolik: {e}", exc_info=True)
             return False, {"error": str(e)}
 
+    def finish_shop_product(
+        self,
+        product_id: Any,
+        image_paths: List[Union[str, EncodedImage]],
+        api_client: Optional[VenuSellerAPI] = None,
+    ) -> None:
+        """
+        Delete the local image files of a created product, then remove its
+        broken images and publish it (status 1).
+
+        Failures are only logged: the product already exists.
+
+        Args:
+            product_id: ID returned by ``create_product`` (nothing remote is done without it)
+            image_paths: Images whose local files are deleted
+            api_client: Optional VenuSellerAPI client (overrides default)
+        """
+        venu_api = api_client if api_client else self._get_venu_api()
+
+        # Clean up downloaded images (cached ones are reused by later products)
+        with span("cleanup_local"):
+            for image in image_paths:
+                image_path = image if isinstance(image, str) else image.path
+                # In-memory images have no file to delete; cached and
+                # fallback images are shared with other rows
+                if (
+                    image_path is None
+                    or image_cache.owns(image_path)
+                    or _is_default_image(image_path)
+                ):
+                    continue
+                if os.path.exists(image_path):
+                    os.remove(image_path)
+                    logger.info(f"Rasm o'chirildi: {image_path}")
+                else:
+                    logger.warning(f"Rasm topilmadi: {image_path}")
+
+        # Clean up broken images and update status
+        try:
+            if product_id:
+                # Clean up broken images (path is null and status is 404)
+                logger.info(f"Rasmlarni tekshiryapman va buzilgan rasmlarni olib tashlayapman (product_id: {product_id})...")
+                with span("cleanup_remote"):
+                    removed_count = venu_api.cleanup_broken_images(product_id)
+                if removed_count > 0:
+                    logger.info(f"{removed_count} ta buzilgan rasm olib tashlandi (product_id: {product_id})")
+                else:
+                    logger.info(f"Buzilgan rasm topilmadi (product_id: {product_id})")
+
+                # Update product status to 1
+                logger.info(f"Mahsulot statusini yangilayapman (product_id: {product_id}, status: 1)...")
+                with span("status_update"):
+                    status_updated = venu_api.update_product_status(product_id, status=1)
+                if status_updated:
+                    logger.info(f"Mahsulot statusi muvaffaqiyatli yangilandi (product_id: {product_id}, status: 1)")
+                else:
+                    logger.warning(f"Mahsulot statusini yangilashda xatolik (product_id: {product_id})")
+            else:
+                logger.warning("Product ID topilmadi, rasmlarni tozalash va status yangilash o'tkazib yuborildi.")
+        except Exception as e:
+            # Cleanup and status update failures should not affect product creation success
+            logger.warning(f"Rasmlarni tozalash yoki status yangilashda xatolik (product yaratilgan): {e}")
+
     def select_category_and_brand(
         self,
         product_name: str,
@@ -317,12 +487,10 @@ class ProductService:
         try:
             venu_api = api_client if api_client else self._get_venu_api()
 
-            # Get categories and brands
-            logger.info("Kategoriya va brendlarni yuklayapman...")
-            categories = venu_api.get_categories()
-            brands = venu_api.get_brands()
+            # Get categories and brands (cached per seller account)
+            catalog = catalog_cache.get(venu_api)
 
-            if not categories or not brands:
+            if catalog is None:
                 error_msg = "Kategoriya yoki brendlar yuklanmadi"
                 logger.error(error_msg)
                 return False, {"error": error_msg}, None
@@ -335,8 +503,63 @@ class ProductService:
             category_selection = select_category_brand(
                 product_name=product_name,
                 brand_name=brand_name,
-                categories=categories,
-                brands=brands,
+                categories=catalog.categories,
+                brands=catalog.brands,
+                catalog_version=catalog.version,
+            )
+
+            logger.info(
+                f"Aniqlangan: category_id={category_selection.category_id}, "
+                f"sub_category_id={category_selection.sub_category_id}, "
+                f"sub_sub_category_id={category_selection.sub_sub_category_id}, "
+                f"brand_id={category_selection.brand_id}"
+            )
+
+            return True, None, category_selection
+
+        except ShopSaveError as e:
+            logger.error(f"Kategoriya va brand aniqlashda xatolik: {e}")
+            return False, {"error": str(e)}, None
+        except Exception as e:
+            logger.error(
+                f"Kategoriya va brand aniqlashda kutilmagan xatolik: {e}", exc_info=True
+            )
+            return False, {"error": str(e)}, None
+
+    async def aselect_category_and_brand(
+        self,
+        product_name: str,
+        brand_name: str,
+        api_client: Optional[VenuSellerAPI] = None,
+    ) -> Tuple[bool, Optional[dict], Optional[CategoryBrandSelectionSchema]]:
+        """
+        Async counterpart of :meth:`select_category_and_brand`.
+
+        Catalog requests run in the shared executor; the AI steps use the
+        pooled async OpenAI client.
+        """
+        try:
+            venu_api = api_client if api_client else await run_blocking(
+                self._get_venu_api
+            )
+
+            catalog = await run_blocking(catalog_cache.get, venu_api)
+
+            if catalog is None:
+                error_msg = "Kategoriya yoki brendlar yuklanmadi"
+                logger.error(error_msg)
+                return False, {"error": error_msg}, None
+
+            logger.info(
+                f"AI yordamida kategoriya va brand ni aniqlayapman: "
+                f"{product_name} ({brand_name})"
+            )
+            category_selection = await aselect_category_brand(
+                product_name=product_name,
+                brand_name=brand_name,
+                categories=catalog.categories,
+                brands=catalog.brands,
+                catalog_version=catalog.version,
             )
 
             logger.info(
@@ -0,0 +1,102 @@
+"""Micro-batching of product text requests from concurrent pipeline rows."""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from agent.product.agent import ProductTextResult
+from agent.product.schemas import ProductGenSchema, ProductTextRequest
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BatchGenerator = Callable[[List[ProductTextRequest]], Awaitable[List[ProductTextResult]]]
+
+
+class ProductTextBatcher:
+    """
+    Collects single-product text requests into batch generation calls.
+
+    A batch is sent when ``batch_size`` requests are waiting or ``max_wait``
+    seconds after the first one arrived, whichever comes first. Each caller
+    gets its own product (or exception) back. Must be created and used
+    inside one event loop (one batcher per bulk job).
+    """
+
+    def __init__(
+        self,
+        generate: BatchGenerator,
+        batch_size: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        limit: Optional[asyncio.Semaphore] = None,
+    ):
+        self._generate = generate
+        self.batch_size = max(1, batch_size or settings.product_text_batch_size)
+        self.max_wait = (
+            max_wait if max_wait is not None else settings.product_text_batch_max_wait
+        )
+        self._limit = limit
+        self._pending: List[Tuple[ProductTextRequest, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: ProductTextRequest) -> ProductGenSchema:
+        """
+        Queue one product and wait for its generated text.
+
+        Raises:
+            Exception: The error of this item if its generation failed
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        # Keep a reference so the task is not garbage-collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[ProductTextRequest, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        logger.debug(f"Sending product text batch of {len(items)}")
+        try:
+            if self._limit is not None:
+                async with self._limit:
+                    results = await self._generate(items)
+            else:
+                results = await self._generate(items)
+        except Exception as e:
+            results = [e] * len(batch)
+
+        if len(results) != len(batch):
+            logger.error(
+                f"Product text batch returned {len(results)} results for {len(batch)} products"
+            )
+        if len(results) < len(batch):
+            # Never leave a caller waiting on a future nobody will resolve
+            missing = RuntimeError(
+                f"No product text result in a batch of {len(batch)} "
+                f"({len(results)} returned)"
+            )
+            results = list(results) + [missing] * (len(batch) - len(results))
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -12,6 +12,24 @@ document.addEventListener('DOMContentLoaded', () => {
     const uploadBtn = document.getElementById('upload-btn');
     const dropArea = document.getElementById('drop-area');
 
+    // DOM Elements - Single product
+    const generateForm = document.getElementById('generate-form');
+    const productNameInput = document.getElementById('product-name');
+    const productBrandInput = document.getElementById('product-brand');
+    const productPriceInput = document.getElementById('product-price');
+    const generateBtn = document.getElementById('generate-btn');
+
+    // Streamed fields, in display order
+    const STREAM_FIELDS = {
+        name_ru: 'Nomi (RU)',
+        name_uz: 'Nomi (UZ)',
+        description_ru: 'Tavsif (RU)',
+        description_uz: 'Tavsif (UZ)',
+        meta_title: 'Meta title',
+        meta_description: 'Meta description',
+        tags: 'Teglar',
+    };
+
     // State
     let isProcessing = false;
 
@@ -33,6 +51,10 @@ document.addEventListener('DOMContentLoaded', () => {
         uploadForm.addEventListener('submit', handleUpload);
     }
 
+    if (generateForm) {
+        generateForm.addEventListener('submit', handleGenerate);
+    }
+
     if (dropArea) {
         // Enable pointer events on drop-area for drag and drop
         dropArea.addEventListener('dragover', (e) => {
@@ -91,6 +113,101 @@ document.addEventListener('DOMContentLoaded', () => {
         };
     }
 
+    // Streaming generation (one socket per request; closed when the product arrives)
+    function handleGenerate(e) {
+        e.preventDefault();
+
+        const request = {
+            name: productNameInput.value.trim(),
+            brand: productBrandInput.value.trim(),
+            price: Number(productPriceInput.value),
+        };
+        if (!request.name || !request.brand) {
+            alert("Barcha maydonlarni to'ldiring!");
+            return;
+        }
+
+        addMessage('user', `✍️ ${escapeHtml(request.name)} (${escapeHtml(request.brand)})`);
+        const view = addStreamMessage();
+        generateBtn.disabled = true;
+
+        const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const socket = new WebSocket(`${protocol}//${window.location.host}/ws/generate`);
+
+        socket.onopen = () => socket.send(JSON.stringify(request));
+
+        socket.onmessage = (event) => {
+            const data = JSON.parse(event.data);
+            if (data.type === 'delta') {
+                view.append(data.field, data.text);
+            } else if (data.type === 'field') {
+                view.set(data.field, data.value);
+            } else if (data.type === 'retry') {
+                view.reset(`🔄 Qayta urinish (${data.attempt})...`);
+            } else if (data.type === 'product') {
+                Object.keys(STREAM_FIELDS).forEach((field) => view.set(field, data.product[field]));
+                view.status('✅ Tayyor');
+                socket.close();
+            } else if (data.type === 'error') {
+                view.status(`⚠️ ${data.message}`);
+                socket.close();
+            }
+            scrollToBottom();
+        };
+
+        socket.onclose = () => {
+            generateBtn.disabled = false;
+        };
+    }
+
+    function addStreamMessage() {
+        addMessage('ai', '');
+        const content = outputArea.lastElementChild.lastElementChild;
+
+        const statusLine = document.createElement('div');
+        statusLine.className = 'text-xs text-slate-400 mb-2';
+        statusLine.textContent = 'Yozilmoqda...';
+        content.appendChild(statusLine);
+
+        const values = {};
+        Object.entries(STREAM_FIELDS).forEach(([field, label]) => {
+            const row = document.createElement('div');
+            row.className = 'mb-2';
+            const title = document.createElement('div');
+            title.className = 'text-xs font-semibold text-slate-400';
+            title.textContent = label;
+            const value = document.createElement('div');
+            value.className = 'whitespace-pre-wrap';
+            row.appendChild(title);
+            row.appendChild(value);
+            content.appendChild(row);
+            values[field] = value;
+        });
+
+        return {
+            append(field, text) {
+                if (values[field]) values[field].textContent += text;
+            },
+            set(field, value) {
+                if (!values[field] || value === undefined) return;
+                values[field].textContent = Array.isArray(value) ? value.join(', ') : value;
+            },
+            reset(message) {
+                Object.values(values).forEach((el) => { el.textContent = ''; });
+                statusLine.textContent = message;
+            },
+            status(message) {
+                statusLine.textContent = message;
+            },
+        };
+    }
+
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
     // Handlers
     async function handleUpload(e) {
         e.preventDefault();
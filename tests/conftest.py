@@ -0,0 +1,7 @@
+import os
+import sys
+
+# core.config requires an API key at import; tests never call OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -5416,7 +5416,74 @@ BRANDS = [
 ]
 
 
+import pytest
+
 from agent import select_category_brand
+from agent.category_brand.brand_index import BrandIndex
+
+
+@pytest.fixture(scope="module")
+def brand_index():
+    return BrandIndex(BRANDS)
+
+
+@pytest.mark.parametrize(
+    "brand_name, brand_id",
+    [("SAMSUNG", 14), ("samsung", 14), ("Shivaki", 15), ("Tp Link", 134), ("tp-link", 134)],
+)
+def test_exact_match(brand_index, brand_name, brand_id):
+    match = brand_index.match(brand_name)
+    assert (match.brand_id, match.method, match.confidence) == (brand_id, "exact", 1.0)
+
+
+@pytest.mark.parametrize(
+    "brand_name, brand_id", [("Samsung Electronics", 14), ("LG Electronics", 67)]
+)
+def test_alias_match(brand_index, brand_name, brand_id):
+    match = brand_index.match(brand_name)
+    assert (match.brand_id, match.method, match.confidence) == (brand_id, "alias", 1.0)
+
+
+def test_alias_to_brand_missing_from_catalog_is_ignored(brand_index):
+    # "redmi" -> "Xiaomi", but the catalog spells it "Xiomi"
+    assert brand_index.match("Redmi").method == "fallback"
+
+    match = BrandIndex(BRANDS, aliases={"redmi": "Xiomi"}).match("Redmi")
+    assert (match.brand_id, match.method) == (79, "alias")
+
+
+@pytest.mark.parametrize(
+    "brand_name, brand_id", [("Самсунг", 14), ("Шиваки", 15), ("Леново", 6)]
+)
+def test_cyrillic_match(brand_index, brand_name, brand_id):
+    match = brand_index.match(brand_name)
+    assert (match.brand_id, match.method) == (brand_id, "exact")
+
+
+@pytest.mark.parametrize(
+    "brand_name, brand_id", [("Xiaomi", 79), ("Kingstone", 18), ("Thermaltake", 28)]
+)
+def test_fuzzy_match(brand_index, brand_name, brand_id):
+    match = brand_index.match(brand_name)
+    assert (match.brand_id, match.method) == (brand_id, "fuzzy")
+    assert 0.9 <= match.confidence < 1.0
+
+
+@pytest.mark.parametrize("brand_name", [None, "", "   ", "Qwxyz"])
+def test_fallback_to_first_brand(brand_index, brand_name):
+    match = brand_index.match(brand_name)
+    assert (match.brand_id, match.method, match.confidence) == (1, "fallback", 0.0)
+
+
+def test_fuzzy_match_below_threshold_falls_back(brand_index):
+    assert brand_index.match("Apple", threshold=0.6).method == "fuzzy"
+    assert brand_index.match("Apple", threshold=0.8).method == "fallback"
+
+
+def test_empty_catalog_fallback():
+    match = BrandIndex([]).match("Samsung")
+    assert (match.brand_id, match.name, match.method) == (0, None, "fallback")
+
 
 if __name__ == "__main__":
     import os
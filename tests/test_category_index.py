@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+import agent.category_brand.embeddings as embeddings
+from agent.category_brand.index import CategoryIndex, VersionedIndexCache
+
+CATEGORIES = [
+    {
+        "id": 1,
+        "name": "Maishiy texnika",
+        "childes": [{"id": 2, "name": "Choynaklar", "childes": []}],
+    }
+]
+
+
+def _slow_builder(calls):
+    def build(source):
+        calls.append(source)
+        time.sleep(0.05)
+        return {"built": source}
+
+    return build
+
+
+def _get_concurrently(cache, callers=8):
+    barrier = threading.Barrier(callers)
+    results = []
+
+    def call():
+        barrier.wait()
+        try:
+            results.append(cache.get("catalog", "v1"))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_misses_build_once():
+    calls = []
+    cache = VersionedIndexCache(_slow_builder(calls))
+
+    results = _get_concurrently(cache)
+
+    assert calls == ["catalog"]
+    assert len(results) == 8
+    assert all(result is results[0] for result in results)
+    assert cache.get("catalog", "v1") is results[0]
+
+
+def test_failed_build_is_shared_and_retried():
+    calls = []
+
+    def build(source):
+        calls.append(source)
+        time.sleep(0.05)
+        raise RuntimeError("catalog unavailable")
+
+    cache = VersionedIndexCache(build)
+
+    results = _get_concurrently(cache)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # The failure is not cached
+    with pytest.raises(RuntimeError):
+        cache.get("catalog", "v1")
+    assert len(calls) == 2
+
+
+def test_fingerprint_covers_category_paths_only():
+    index = CategoryIndex(CATEGORIES)
+    renamed = [dict(CATEGORIES[0], name="Texnika")]
+
+    assert index.fingerprint == CategoryIndex(CATEGORIES).fingerprint
+    assert index.fingerprint != CategoryIndex(renamed).fingerprint
+    assert embeddings.catalog_fingerprint(index) == index.fingerprint
+
+
+def test_embeddings_survive_a_brand_only_catalog_change(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        embeddings, "_embedding_indexes", VersionedIndexCache(_slow_builder(calls))
+    )
+
+    # Same categories, catalog versions differ because the brands changed
+    first = embeddings.get_category_embeddings(CATEGORIES, "brands-v1")
+    second = embeddings.get_category_embeddings(CATEGORIES, "brands-v2")
+
+    assert first is second
+    assert len(calls) == 1
@@ -0,0 +1,69 @@
+import os
+import time
+
+import pytest
+
+from core.image_cache import ImageCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ImageCache(
+        cache_dir=str(tmp_path / "images"),
+        db_path=str(tmp_path / "cache.db"),
+        max_bytes=0,
+    )
+
+
+def _age(cache, seconds):
+    cache._connection().execute(
+        "UPDATE image_cache_files SET accessed_at = ?", (time.time() - seconds,)
+    )
+
+
+def test_evict_removes_idle_files(cache):
+    _, path = cache.put("https://example.com/a.jpg", b"a" * 10)
+    _age(cache, 3600)
+
+    assert cache.evict() == 1
+    assert not os.path.exists(path)
+    assert not cache.hold(path)
+    assert cache.lookup_url("https://example.com/a.jpg") is None
+
+
+def test_held_file_is_not_evicted(cache):
+    _, path = cache.put("https://example.com/a.jpg", b"a" * 10)
+    _age(cache, 3600)
+
+    assert cache.hold(path)
+
+    assert cache.evict() == 0
+    assert os.path.exists(path)
+
+
+def test_file_held_after_the_eviction_scan_is_kept(cache, monkeypatch):
+    _, path = cache.put("https://example.com/a.jpg", b"a" * 10)
+    _age(cache, 3600)
+
+    # A row holds the file between the eviction's SELECT and its DELETE
+    connection = cache._connection()
+
+    class _HoldingConnection:
+        def execute(self, sql, params=()):
+            cursor = connection.execute(sql, params)
+            if sql.startswith("SELECT content_hash, variant"):
+                cache.hold(path)
+            return cursor
+
+    monkeypatch.setattr(cache, "_connection", lambda: _HoldingConnection())
+
+    assert cache.evict() == 0
+    assert os.path.exists(path)
+
+
+def test_hold_of_a_file_outside_the_cache(cache, tmp_path):
+    path = tmp_path / "default.png"
+
+    assert not cache.hold(str(path))
+    path.write_bytes(b"png")
+    assert cache.hold(str(path))
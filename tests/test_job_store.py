@@ -0,0 +1,219 @@
+import asyncio
+
+import pytest
+
+import services.bulk_upload_service as bulk_upload_service
+from services.bulk_upload_service import BulkUploadService
+from services.job_store import (
+    JOB_COMPLETED,
+    JOB_INTERRUPTED,
+    JOB_RUNNING,
+    ROW_DONE,
+    ROW_FAILED,
+    JobStore,
+)
+
+ROWS = [["iPhone 15", "Apple", 1500], ["Galaxy S24", "Samsung", 1200]]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+def test_unfinished_rows_keep_saved_stages(store):
+    job_id = store.create_job(ROWS, filename="products.xlsx", email="a@b.uz")
+    store.save_stage(job_id, 0, "text", {"name_ru": "iPhone 15"})
+    store.save_stage(job_id, 0, "images", ["media/products/1.webp"])
+    store.save_stage(job_id, 1, "category", {"category_id": "7"})
+
+    assert store.unfinished_rows(job_id) == [
+        (0, ROWS[0], {"text": {"name_ru": "iPhone 15"}, "images": ["media/products/1.webp"]}),
+        (1, ROWS[1], {"category": {"category_id": "7"}}),
+    ]
+
+    store.finish_row(job_id, 0, ROW_DONE, product_id=42)
+    store.finish_row(job_id, 1, ROW_FAILED, error="upload failed")
+    # Failed rows are run again on resume
+    assert [index for index, _, _ in store.unfinished_rows(job_id)] == [1]
+
+    job = store.get_job(job_id)
+    assert job["total_rows"] == 2
+    assert job["rows"] == {ROW_DONE: 1, ROW_FAILED: 1}
+    assert store.job_rows(job_id)[0]["product_id"] == "42"
+
+
+def test_claim_refuses_running_and_completed_jobs(store):
+    job_id = store.create_job(ROWS)
+
+    assert store.claim(job_id)
+    assert store.get_job(job_id)["status"] == JOB_RUNNING
+    assert not store.claim(job_id)
+
+    store.set_status(job_id, JOB_COMPLETED)
+    assert not store.claim(job_id)
+
+    store.set_status(job_id, JOB_INTERRUPTED, "stopped")
+    assert store.claim(job_id)
+    assert store.get_job(job_id)["error"] is None
+
+
+def test_claim_with_lease(store):
+    job_id = store.create_job(ROWS)
+
+    assert store.claim(job_id, "w1/t1/1")
+    assert store.claim(job_id, "w1/t1/1")
+    assert not store.claim(job_id, "w2/t1/2")
+    assert store.holds_lease(job_id, "w1/t1/1")
+
+
+def test_take_over_waits_for_stale_lease(store):
+    job_id = store.create_job(ROWS)
+    store.claim(job_id, "w1/t1/1")
+
+    assert not store.take_over(job_id, "w2/t1/2", stale_seconds=300)
+    assert store.renew_lease(job_id, "w1/t1/1")
+
+    assert store.take_over(job_id, "w2/t1/2", stale_seconds=0)
+    assert store.holds_lease(job_id, "w2/t1/2")
+    assert not store.renew_lease(job_id, "w1/t1/1")
+    assert store.claim(job_id, "w2/t1/2")
+
+
+def test_mark_interrupted_only_touches_running_jobs(store):
+    running = store.create_job(ROWS)
+    completed = store.create_job(ROWS)
+    pending = store.create_job(ROWS)
+    store.claim(running)
+    store.set_status(completed, JOB_COMPLETED)
+
+    assert store.mark_interrupted() == 1
+    assert store.get_job(running)["status"] == JOB_INTERRUPTED
+    assert store.get_job(completed)["status"] == JOB_COMPLETED
+    assert store.get_job(pending)["status"] == "pending"
+    # An interrupted job can be resumed
+    assert store.claim(running)
+
+
+@pytest.fixture
+def service(store, monkeypatch):
+    monkeypatch.setattr(bulk_upload_service, "job_store", store)
+    return BulkUploadService(connection_manager=None)
+
+
+def _counting(value):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return value
+
+    return compute, calls
+
+
+def test_stage_computes_and_stores_output(service, store):
+    job_id = store.create_job(ROWS)
+    compute, calls = _counting(["a.webp"])
+
+    value = asyncio.run(service._stage(job_id, 0, {}, "images", compute))
+
+    assert value == ["a.webp"]
+    assert calls == [1]
+    assert store.unfinished_rows(job_id)[0][2] == {"images": ["a.webp"]}
+
+
+def test_stage_reuses_stored_output(service, store):
+    job_id = store.create_job(ROWS)
+    compute, calls = _counting(["new.webp"])
+
+    value = asyncio.run(
+        service._stage(job_id, 0, {"images": ["old.webp"]}, "images", compute)
+    )
+
+    assert value == ["old.webp"]
+    assert calls == []
+
+
+def test_stage_recomputes_when_decode_rejects_output(service, store):
+    job_id = store.create_job(ROWS)
+    compute, calls = _counting(["new.webp"])
+
+    value = asyncio.run(
+        service._stage(
+            job_id,
+            0,
+            {"images": ["deleted.webp"]},
+            "images",
+            compute,
+            decode=lambda output: None,
+        )
+    )
+
+    assert value == ["new.webp"]
+    assert calls == [1]
+    assert store.unfinished_rows(job_id)[0][2] == {"images": ["new.webp"]}
+
+
+def test_stage_does_not_store_when_encode_returns_none(service, store):
+    job_id = store.create_job(ROWS)
+    compute, calls = _counting({"success": False})
+
+    value = asyncio.run(
+        service._stage(job_id, 0, {}, "upload", compute, encode=lambda value: None)
+    )
+
+    assert value == {"success": False}
+    assert store.unfinished_rows(job_id)[0][2] == {}
+
+
+class _Manager:
+    def __init__(self):
+        self.messages = []
+
+    async def broadcast(self, message):
+        self.messages.append(message)
+
+
+class _VenuAPI:
+    def __init__(self, email, password):
+        pass
+
+    def login(self):
+        return True
+
+
+class _ProductService:
+    def __init__(self):
+        self.finished = []
+
+    async def agenerate_product_contents(self, items, use_cache=True):
+        raise AssertionError("the text was not needed")
+
+    def create_shop_product(self, **kwargs):
+        raise AssertionError("the product was already created")
+
+    def finish_shop_product(self, product_id, image_paths, api_client=None):
+        self.finished.append((product_id, image_paths))
+
+
+def test_resume_does_not_create_a_created_product_again(store, monkeypatch):
+    monkeypatch.setattr(bulk_upload_service, "job_store", store)
+    monkeypatch.setattr(bulk_upload_service, "VenuSellerAPI", _VenuAPI)
+    catalog_cache = type("CatalogCache", (), {"get": lambda self, api: None})()
+    monkeypatch.setattr(bulk_upload_service, "catalog_cache", catalog_cache)
+    service = BulkUploadService(connection_manager=_Manager())
+    service.product_service = _ProductService()
+
+    job_id = store.create_job(ROWS[:1])
+    store.save_stage(job_id, 0, "images", ["media/products/1.webp"])
+    # Crashed after create_product returned, before the row was finished
+    store.save_stage(job_id, 0, "create", {"product_id": 42})
+    store.claim(job_id)
+    store.mark_interrupted()
+
+    asyncio.run(service.resume_job(job_id, "a@b.uz", "secret"))
+
+    assert service.product_service.finished == [(42, ["media/products/1.webp"])]
+    assert store.unfinished_rows(job_id) == []
+    assert store.job_rows(job_id)[0]["product_id"] == "42"
+    assert store.get_job(job_id)["status"] == JOB_COMPLETED
@@ -0,0 +1,217 @@
+import json
+
+import pytest
+
+import agent.product.agent as product_agent
+from agent.product.agent import _generation_cache_key, _parse_batch_content
+from agent.product.schemas import ProductGenSchema, ProductTextRequest
+from core.llm_steps import run_steps
+
+ITEMS = [
+    ProductTextRequest(name="Чайник Tefal", brand="Tefal", price=150000, stock=3),
+    ProductTextRequest(name="Фен Philips", brand="Philips", price=90000, stock=0),
+    ProductTextRequest(name="Утюг Braun", brand="Braun", price=120000),
+]
+
+
+def _answer(key, **overrides):
+    answer = {
+        "key": key,
+        "name_ru": "Чайник",
+        "name_uz": "Choynak",
+        "description_ru": "Электрический чайник",
+        "description_uz": "Elektr choynak",
+        "meta_title": "Чайник",
+        "meta_description": "Электрический чайник",
+        "tags": ["Чайник", "tefal", "чайник"],
+        "price": 1,
+        "stock": 99,
+    }
+    answer.update(overrides)
+    return answer
+
+
+# ---------------------------
+# _parse_batch_content
+# ---------------------------
+
+
+def test_batch_items_are_matched_by_key():
+    content = json.dumps({"items": [_answer("1"), _answer("0"), _answer("2")]})
+
+    outcome = _parse_batch_content(content, ITEMS, [0, 1, 2], attempt=0)
+
+    assert sorted(outcome) == [0, 1, 2]
+    assert all(isinstance(result, ProductGenSchema) for result in outcome.values())
+    # Price and stock always come from the request, tags are cleaned up
+    assert (outcome[0].price, outcome[0].stock) == (150000, 3)
+    assert (outcome[1].price, outcome[1].stock) == (90000, 0)
+    assert outcome[0].tags == ["чайник", "tefal"]
+
+
+def test_batch_only_parses_the_chunk():
+    content = json.dumps({"items": [_answer("0"), _answer("2")]})
+
+    outcome = _parse_batch_content(content, ITEMS, [2], attempt=0)
+
+    assert list(outcome) == [2]
+    assert outcome[2].price == 120000
+
+
+def test_batch_items_fail_independently():
+    content = json.dumps(
+        {"items": [_answer("0"), _answer("1", name_ru=""), {"name_ru": "no key"}]}
+    )
+
+    outcome = _parse_batch_content(content, ITEMS, [0, 1, 2], attempt=0)
+
+    assert isinstance(outcome[0], ProductGenSchema)
+    assert isinstance(outcome[1], ValueError)
+    assert "key=2" in str(outcome[2])
+
+
+def test_batch_integer_keys_are_accepted():
+    content = json.dumps({"items": [_answer(0)]})
+
+    outcome = _parse_batch_content(content, ITEMS, [0], attempt=0)
+
+    assert isinstance(outcome[0], ProductGenSchema)
+
+
+@pytest.mark.parametrize(
+    "content", ["not json", '{"products": []}', '{"items": {"0": {}}}', "[]"]
+)
+def test_invalid_batch_json_fails_every_item(content):
+    outcome = _parse_batch_content(content, ITEMS, [0, 1], attempt=1)
+
+    assert sorted(outcome) == [0, 1]
+    assert outcome[0] is outcome[1]
+    assert "attempt=2" in str(outcome[0])
+
+
+# ---------------------------
+# Generation cache key
+# ---------------------------
+
+
+def test_cache_key_ignores_case_width_and_whitespace():
+    key = _generation_cache_key("iPhone 15 Pro", "Apple", "gpt-4o-mini", 0.3)
+
+    assert _generation_cache_key("  IPHONE   15\tpro ", "APPLE", "gpt-4o-mini", 0.3) == key
+    # NFKC: full-width letters and digits
+    assert _generation_cache_key("ｉＰｈｏｎｅ １５ Ｐｒｏ", "Apple", "gpt-4o-mini", 0.3) == key
+    assert _generation_cache_key("iPhone 15 Pro", "Apple", "gpt-4o-mini", 0.30001) == key
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ("iPhone 15", "Apple", "gpt-4o-mini", 0.3),
+        ("iPhone 15 Pro", "Samsung", "gpt-4o-mini", 0.3),
+        ("iPhone 15 Pro", "Apple", "gpt-4o", 0.3),
+        ("iPhone 15 Pro", "Apple", "gpt-4o-mini", 0.7),
+    ],
+)
+def test_cache_key_depends_on_every_input(args):
+    key = _generation_cache_key("iPhone 15 Pro", "Apple", "gpt-4o-mini", 0.3)
+
+    assert _generation_cache_key(*args) != key
+
+
+def test_cache_key_depends_on_prompt_version(monkeypatch):
+    key = _generation_cache_key("iPhone 15 Pro", "Apple", "gpt-4o-mini", 0.3)
+
+    monkeypatch.setattr(product_agent, "PROMPT_VERSION", "changed")
+
+    assert _generation_cache_key("iPhone 15 Pro", "Apple", "gpt-4o-mini", 0.3) != key
+
+
+def test_prompt_version_covers_batch_prompt_and_schemas(monkeypatch):
+    version = product_agent._prompt_version()
+    assert version == product_agent.PROMPT_VERSION
+
+    with monkeypatch.context() as m:
+        m.setattr(
+            product_agent,
+            "_build_batch_user_prompt",
+            lambda products: "changed batch prompt",
+        )
+        assert product_agent._prompt_version() != version
+
+    with monkeypatch.context() as m:
+        m.setattr(product_agent, "BATCH_RESPONSE_FORMAT", {"type": "json_object"})
+        assert product_agent._prompt_version() != version
+
+    with monkeypatch.context() as m:
+        m.setattr(product_agent, "PRODUCT_RESPONSE_FORMAT", {"type": "json_object"})
+        assert product_agent._prompt_version() != version
+
+
+# ---------------------------
+# Request loops (driven without a client)
+# ---------------------------
+
+
+class _Response:
+    def __init__(self, content):
+        message = type("Message", (), {"content": content})
+        self.choices = [type("Choice", (), {"message": message})]
+
+
+def _steps_answering(steps, answers):
+    requests = []
+
+    def perform(request):
+        requests.append(request)
+        answer = answers.pop(0)
+        return answer if isinstance(answer, Exception) else _Response(answer)
+
+    return run_steps(steps, perform), requests
+
+
+def test_product_text_steps_retry_with_correction():
+    steps = product_agent._product_text_steps(
+        "Чайник", "Tefal", 150000, 3, "gpt-4o-mini", 0.3, max_retries=2
+    )
+    answer = _answer("0")
+    del answer["key"]
+    product, requests = _steps_answering(
+        steps, [RuntimeError("timeout"), "not json", json.dumps(answer)]
+    )
+
+    assert (product.price, product.stock) == (150000, 3)
+    assert len(requests) == 3
+    assert all(request.stage == "llm.product_text" for request in requests)
+    assert "Output ONLY strict JSON" in requests[2].kwargs["messages"][1]["content"]
+
+
+def test_product_text_steps_raise_last_api_error():
+    steps = product_agent._product_text_steps(
+        "Чайник", "Tefal", 150000, 3, "gpt-4o-mini", 0.3, max_retries=1
+    )
+
+    with pytest.raises(RuntimeError, match="down"):
+        _steps_answering(steps, [RuntimeError("down"), RuntimeError("down")])
+
+
+def test_product_texts_steps_only_resend_failed_items():
+    def answer(*keys, invalid=()):
+        items = [_answer(key, name_ru="" if key in invalid else "Чайник") for key in keys]
+        return json.dumps({"items": items})
+
+    steps = product_agent._product_texts_steps(
+        ITEMS, [0, 1, 2], "gpt-4o-mini", 0.3, max_retries=1, batch_size=2
+    )
+    requests = []
+
+    def perform(batch):
+        requests.append(batch)
+        if len(requests) == 1:
+            return [_Response(answer("0", "1", invalid=("1",))), RuntimeError("down")]
+        return [_Response(answer("1", "2"))]
+
+    results = run_steps(steps, perform)
+
+    assert [len(batch) for batch in requests] == [2, 1]
+    assert all(isinstance(results[i], ProductGenSchema) for i in (0, 1, 2))
+    assert results[2].price == 120000
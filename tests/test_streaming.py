@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+import pytest
+
+import agent.product.streaming as streaming
+from agent.product.streaming import PartialJsonObject
+
+DOCUMENT = (
+    '{"name_ru": "Чайник \\"Tefal\\"\\n1.7 л", "name_uz": "Choynak \\ud83d\\ude00",'
+    ' "meta_keywords": ["чайник", "tefal\\u0021"], "price": 150000, "in_stock": true}'
+)
+
+
+def _feed(chunks):
+    parser = PartialJsonObject()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return parser, events
+
+
+def _fields(events):
+    return [(e["field"], e["value"], e["done"]) for e in events if e["type"] == "field"]
+
+
+def _deltas(events, field):
+    return "".join(e["text"] for e in events if e["type"] == "delta" and e["field"] == field)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, len(DOCUMENT)])
+def test_any_chunking_matches_json_loads(size):
+    chunks = [DOCUMENT[i : i + size] for i in range(0, len(DOCUMENT), size)]
+    parser, events = _feed(chunks)
+
+    assert parser.done and not parser.failed
+    assert parser.values == json.loads(DOCUMENT)
+    assert _fields(events) == [
+        ("name_ru", 'Чайник "Tefal"\n1.7 л', True),
+        ("name_uz", "Choynak 😀", True),
+        ("meta_keywords", ["чайник"], False),
+        ("meta_keywords", ["чайник", "tefal!"], False),
+        ("meta_keywords", ["чайник", "tefal!"], True),
+        ("price", 150000, True),
+        ("in_stock", True, True),
+    ]
+    assert _deltas(events, "name_ru") == 'Чайник "Tefal"\n1.7 л'
+    assert _deltas(events, "name_uz") == "Choynak 😀"
+
+
+def test_chunk_split_inside_escape():
+    parser, events = _feed(['{"name_ru": "a\\', 'nb', '\\u04', '1f"}'])
+
+    assert parser.values == {"name_ru": "a\nbП"}
+    assert [e["text"] for e in events if e["type"] == "delta"] == ["a", "\nb", "П"]
+
+
+def test_chunk_split_between_surrogates():
+    parser = PartialJsonObject()
+
+    assert parser.feed('{"name_uz": "x\\ud83d') == [
+        {"type": "delta", "field": "name_uz", "text": "x"}
+    ]
+    # Nothing is emitted for the high surrogate on its own
+    assert parser.feed("\\ude") == []
+    assert parser.feed('00"}') == [
+        {"type": "delta", "field": "name_uz", "text": "😀"},
+        {"type": "field", "field": "name_uz", "value": "x😀", "done": True},
+    ]
+    assert parser.done
+
+
+def test_deltas_of_one_chunk_are_merged():
+    parser = PartialJsonObject()
+
+    events = parser.feed('{"description_ru": "Мощный')
+
+    assert events == [{"type": "delta", "field": "description_ru", "text": "Мощный"}]
+    assert parser.values == {}
+    assert not parser.done
+
+
+def test_nested_object_stops_incremental_events():
+    parser, events = _feed(['{"name_ru": "a", "extra": {"x": 1}, ', '"name_uz": "b"}'])
+
+    assert parser.failed
+    assert parser.values == {"name_ru": "a"}
+    assert _fields(events) == [("name_ru", "a", True)]
+
+
+def test_invalid_escape_fails():
+    parser, _ = _feed(['{"name_ru": "\\x"}'])
+
+    assert parser.failed
+
+
+def test_input_after_end_is_ignored():
+    parser, events = _feed(['{"stock": 5}', ' {"stock": 6}'])
+
+    assert parser.values == {"stock": 5}
+    assert _fields(events) == [("stock", 5, True)]
+
+
+class _Chunk:
+    def __init__(self, text):
+        delta = type("Delta", (), {"content": text})
+        self.choices = [type("Choice", (), {"delta": delta})]
+        self.usage = None
+
+
+class _Client:
+    def __init__(self, text):
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+        self._text = text
+
+    async def create(self, **kwargs):
+        self.calls += 1
+
+        async def chunks():
+            yield _Chunk(self._text)
+
+        return chunks()
+
+
+def test_stream_failure_matches_non_streaming_error(monkeypatch):
+    client = _Client("not json")
+    monkeypatch.setattr(streaming, "get_async_openai_client", lambda: client)
+
+    async def run():
+        return [
+            event
+            async for event in streaming.astream_product_text(
+                "Чайник", "Tefal", 150000, max_retries=1, use_cache=False
+            )
+        ]
+
+    with pytest.raises(ValueError, match="valid product JSON after 2 attempts"):
+        asyncio.run(run())
+
+    assert client.calls == 2
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from agent.product.schemas import ProductTextRequest
+from services.text_batcher import ProductTextBatcher
+
+ITEMS = [
+    ProductTextRequest(name="Чайник Tefal", brand="Tefal", price=150000),
+    ProductTextRequest(name="Фен Philips", brand="Philips", price=90000),
+    ProductTextRequest(name="Утюг Braun", brand="Braun", price=120000),
+]
+
+
+def _submit_all(generate, items=ITEMS):
+    async def run():
+        batcher = ProductTextBatcher(generate, batch_size=len(items), max_wait=1)
+        return await asyncio.gather(
+            *(batcher.submit(item) for item in items), return_exceptions=True
+        )
+
+    return asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+
+def test_each_caller_gets_its_own_result():
+    calls = []
+
+    async def generate(items):
+        calls.append(len(items))
+        return [item.name for item in items[:2]] + [ValueError("invalid")]
+
+    results = _submit_all(generate)
+
+    assert calls == [3]
+    assert results[:2] == ["Чайник Tefal", "Фен Philips"]
+    assert isinstance(results[2], ValueError)
+
+
+def test_short_batch_result_fails_the_remaining_callers():
+    async def generate(items):
+        return [items[0].name]
+
+    results = _submit_all(generate)
+
+    assert results[0] == "Чайник Tefal"
+    assert all(isinstance(result, RuntimeError) for result in results[1:])
+
+
+def test_batch_error_fails_every_caller():
+    async def generate(items):
+        raise ConnectionError("down")
+
+    results = _submit_all(generate)
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+@pytest.mark.parametrize("batch_size", [None, 0])
+def test_default_batch_size_disables_batching(batch_size):
+    async def generate(items):
+        return []
+
+    assert ProductTextBatcher(generate, batch_size=batch_size).batch_size == 1
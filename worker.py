@@ -0,0 +1,297 @@
+"""
+Bulk upload worker.
+
+Runs the bulk upload tasks queued by the web process when
+``BULK_QUEUE_BACKEND=sqlite``, so long Excel jobs run outside the API
+process. Start as many workers as the machine (or the machines sharing the
+queue database) can handle::
+
+    python worker.py                 # one worker process
+    python worker.py --processes 4   # four worker processes
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from typing import Optional
+
+from core.config import settings
+from core.executor import run_blocking, shutdown_executor
+from core.http_client import close_async_http_client
+from core.image_format import shutdown_format_pool
+from core.openai_client import close_async_openai_client
+from services.bulk_upload_service import BulkUploadService
+from services.job_queue import (
+    TASK_RESUME,
+    JobQueue,
+    QueuedTask,
+    QueueEventPublisher,
+    get_job_queue,
+)
+from services.job_store import JOB_INTERRUPTED, JOB_RUNNING, job_store
+from utils.logging_config import setup_logging
+
+logger = logging.getLogger("worker")
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Heartbeats a claimed task and renews its job lease from a dedicated thread.
+
+    Bulk stages keep the shared executor busy, so a heartbeat scheduled
+    there could be delayed past ``WORKER_STALE_SECONDS`` while the worker
+    is alive. If the queue or the job store reports that the task or job
+    now belongs to another worker, ``on_lost`` is called and the
+    heartbeat stops.
+    """
+
+    def __init__(self, queue: JobQueue, task_id: str, worker_id: str, lease: str, on_lost):
+        super().__init__(name=f"heartbeat-{task_id}", daemon=True)
+        self.queue = queue
+        self.task_id = task_id
+        self.worker_id = worker_id
+        self.lease = lease
+        self.on_lost = on_lost
+        # Set once the task has stored (or created) its job
+        self.job_id: Optional[str] = None
+        self.lost = False
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(settings.worker_heartbeat_seconds):
+            try:
+                alive = self.queue.heartbeat(self.task_id, self.worker_id)
+                if alive and self.job_id is not None:
+                    alive = job_store.renew_lease(self.job_id, self.lease)
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for task {self.task_id}: {e}")
+                continue
+            if not alive:
+                logger.error(f"Task {self.task_id} was taken over by another worker")
+                self.lost = True
+                self.on_lost()
+                return
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+async def _interrupt_job(job_id: Optional[str], lease: str) -> None:
+    """Mark a job this worker left ``running`` as interrupted (resumable)."""
+    if job_id is None:
+        return
+    if await run_blocking(job_store.holds_lease, job_id, lease):
+        job = await run_blocking(job_store.get_job, job_id)
+        if job is not None and job["status"] == JOB_RUNNING:
+            await run_blocking(job_store.set_status, job_id, JOB_INTERRUPTED)
+
+
+async def _take_over(job_id: str, lease: str, stop: asyncio.Event) -> bool:
+    """
+    Wait until the job of a retried task can be taken over.
+
+    The previous worker may be slow rather than dead: its job lease is only
+    taken once it is ``WORKER_STALE_SECONDS`` old.
+    """
+    while not stop.is_set():
+        if await run_blocking(job_store.take_over, job_id, lease, settings.worker_stale_seconds):
+            return True
+        logger.info(f"Job {job_id} is still leased by another worker, waiting")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.worker_poll_interval)
+        except asyncio.TimeoutError:
+            pass
+    return False
+
+
+async def run_task(
+    queue: JobQueue,
+    task: QueuedTask,
+    stop: asyncio.Event,
+    worker_id: str,
+    heartbeat: _Heartbeat,
+) -> None:
+    """
+    Run one queued task.
+
+    An ``excel`` task stores its sheet as a job first (the job ID is saved in
+    the task payload, so a retried task continues the same job); a
+    ``resume`` task continues an existing job. If ``stop`` is set, the rows
+    in flight are finished and the task goes back to the queue.
+
+    The job runs under the lease of this claim (``heartbeat.lease``): a
+    retried task waits for the previous worker's lease to expire, and if
+    another worker takes the job over, this one stops creating products.
+
+    Args:
+        queue: Queue the task was claimed from
+        task: Claimed task
+        stop: Set at worker shutdown or when the task is lost
+        worker_id: ID this worker claimed the task with
+        heartbeat: Running heartbeat of the task
+    """
+    service = BulkUploadService(QueueEventPublisher(queue, task.task_id))
+    payload = task.payload
+    email = task.credentials.get("email", "")
+    password = task.credentials.get("password", "")
+    lease = heartbeat.lease
+
+    job_id = payload.get("job_id")
+    if job_id is None:
+        job_id = await service.create_job(
+            task.data or b"",
+            filename=payload.get("filename", ""),
+            email=email,
+            image_search_site=payload.get("image_search_site"),
+            additional_search=payload.get("additional_search", False),
+        )
+        if job_id is None:
+            await run_blocking(
+                queue.fail, task.task_id, "Excel file could not be read", worker_id
+            )
+            return
+        payload["job_id"] = job_id
+        await run_blocking(queue.update_payload, task.task_id, payload)
+    elif task.attempts > 1 and not await _take_over(job_id, lease, stop):
+        # Stopped while the previous worker still held the job
+        if not heartbeat.lost:
+            await run_blocking(queue.release, task.task_id, worker_id)
+        return
+    heartbeat.job_id = job_id
+
+    if task.kind == TASK_RESUME:
+        await service.resume_job(job_id, email, password, stop=stop, lease=lease)
+    else:
+        await service.run_job(job_id, email, password, stop=stop, lease=lease)
+
+    if heartbeat.lost or not await run_blocking(queue.heartbeat, task.task_id, worker_id):
+        # Another worker owns the task now; leave it alone
+        logger.warning(f"Task {task.task_id} lost to another worker")
+        return
+
+    job = await run_blocking(job_store.get_job, job_id)
+    if stop.is_set() and job is not None and job["status"] == JOB_INTERRUPTED:
+        # Stopped between rows: the next worker resumes the job
+        await run_blocking(queue.release, task.task_id, worker_id)
+        logger.info(f"Task {task.task_id} returned to the queue")
+    else:
+        await run_blocking(queue.complete, task.task_id, worker_id)
+
+
+async def _stop_on(source: asyncio.Event, target: asyncio.Event) -> None:
+    await source.wait()
+    target.set()
+
+
+async def run_worker(stop: asyncio.Event, worker_id: str) -> None:
+    """
+    Claim and run tasks until ``stop`` is set.
+
+    At shutdown the running job finishes its rows in flight (no row is cut
+    off halfway, so no product is created twice), then the task goes back
+    to the queue and the next worker resumes the job.
+    """
+    queue = get_job_queue()
+    loop = asyncio.get_running_loop()
+    logger.info(f"Worker {worker_id} started (queue: {settings.bulk_queue_backend})")
+
+    while not stop.is_set():
+        await run_blocking(queue.requeue_stale, settings.worker_stale_seconds)
+        task = await run_blocking(queue.claim, worker_id)
+        if task is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.worker_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        logger.info(f"Worker {worker_id} claimed task {task.task_id} ({task.kind})")
+        # Stops this task at shutdown, or as soon as it is lost
+        task_stop = asyncio.Event()
+        forward_stop = asyncio.ensure_future(_stop_on(stop, task_stop))
+        heartbeat = _Heartbeat(
+            queue,
+            task.task_id,
+            worker_id,
+            lease=f"{worker_id}/{task.task_id}/{task.attempts}",
+            on_lost=lambda: loop.call_soon_threadsafe(task_stop.set),
+        )
+        heartbeat.start()
+        try:
+            await run_task(queue, task, task_stop, worker_id, heartbeat)
+        except Exception as e:
+            logger.error(f"Task {task.task_id} failed: {e}", exc_info=True)
+            await _interrupt_job(heartbeat.job_id or task.payload.get("job_id"), heartbeat.lease)
+            if not heartbeat.lost:
+                await run_blocking(queue.fail, task.task_id, str(e), worker_id)
+        finally:
+            heartbeat.stop()
+            forward_stop.cancel()
+
+    logger.info(f"Worker {worker_id} stopped")
+
+
+async def _main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await run_worker(stop, f"{socket.gethostname()}-{os.getpid()}")
+    finally:
+        await close_async_openai_client()
+        await close_async_http_client()
+        shutdown_executor(wait=False)
+        shutdown_format_pool(wait=False)
+
+
+def _worker_process() -> None:
+    setup_logging()
+    asyncio.run(_main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk upload worker")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of worker processes (default: 1)",
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    # Fail early on a misconfigured backend instead of in every child
+    get_job_queue()
+
+    if args.processes <= 1:
+        asyncio.run(_main())
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=_worker_process, name=f"worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, _frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()